@@ -1,17 +1,684 @@
-from flask import Flask, request, jsonify
+from __future__ import annotations
+
+import time
+_MODULE_IMPORT_STARTED = time.perf_counter()
+
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
-import pandas as pd
-import numpy as np
+from collections import OrderedDict
 from datetime import datetime, timedelta
+import importlib
 import json
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterator, List, Tuple, Optional
 import warnings
 import os
+import sys
+import argparse
+import hashlib
+import shutil
+import tempfile
+import threading
 warnings.filterwarnings('ignore')
 
+class _LazyModule:
+    """
+    Stand-in for a heavy module that is imported on first attribute access
+    Static knowledge endpoints never touch pandas/numpy, so they are served
+    without paying for the import
+    """
+    
+    def __init__(self, global_name: str, module_name: str):
+        self._global_name = global_name
+        self._module_name = module_name
+    
+    def __getattr__(self, attr):
+        module = importlib.import_module(self._module_name)
+        # Rebind the module global so later lookups skip this proxy
+        globals()[self._global_name] = module
+        return getattr(module, attr)
+
+pd = _LazyModule('pd', 'pandas')
+np = _LazyModule('np', 'numpy')
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+# How the data-backed system starts: 'lazy' (on first use), 'warmup'
+# (background thread at import) or 'eager' (at import, blocking)
+INIT_MODE = os.environ.get('GSAK_INIT_MODE', 'lazy').lower()
+
+# Number of most recent years averaged when comparing districts
+SIMILARITY_WINDOW_YEARS = 3
+
+# Supported distance measures for similar-district search
+SIMILARITY_DISTANCES = ('relative', 'zscore', 'cosine')
+
+# Keywords identifying crop-related columns in the ICRISAT dataset
+CROP_KEYWORDS = ['RICE', 'WHEAT', 'COTTON', 'SUGARCANE', 'GRAM', 'MUSTARD', 'ONION']
+
+# Binary snapshot format written by `python gsak.py snapshot`
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_SUFFIX = '.snapshot'
+
+# Batch advice limits: larger batches are streamed back as NDJSON
+MAX_BATCH_SIZE = 1000
+BATCH_STREAM_THRESHOLD = 50
+
+# Maximum number of serialized responses kept by the response cache
+RESPONSE_CACHE_SIZE = int(os.environ.get('GSAK_RESPONSE_CACHE_SIZE', 1024))
+
+# Demo districts used when no dataset is configured
+SAMPLE_DISTRICTS = {
+    101: "Adilabad",
+    102: "Nizamabad", 
+    103: "Karimnagar",
+    104: "Medak",
+    105: "Hyderabad",
+    201: "Krishna",
+    202: "Guntur",
+    203: "Prakasam",
+    204: "Nellore",
+    205: "Chittoor"
+}
+
+# KVK-style agricultural recommendations database
+CROP_RECOMMENDATIONS = {
+    'RICE': {
+        'best_practices': [
+            "Maintain water level 2-5 cm during vegetative stage",
+            "Apply nitrogen in 3 splits: 50% basal, 25% tillering, 25% panicle initiation",
+            "Use System of Rice Intensification (SRI) for better yields"
+        ],
+        'pest_control': [
+            "Brown planthopper: Use resistant varieties like Swarna-Sub1",
+            "Stem borer: Install pheromone traps @ 8-10/hectare",
+            "Leaf folder: Spray Chlorantraniliprole 18.5% SC @ 150ml/hectare"
+        ],
+        'rotation_crops': ['WHEAT', 'MUSTARD', 'GRAM', 'PEA'],
+        'optimal_season': 'Kharif (June-November)',
+        'soil_requirements': 'Clay loam with pH 6.0-7.0'
+    },
+    'WHEAT': {
+        'best_practices': [
+            "Sow at proper time: Mid-November to early December",
+            "Use certified seed @ 100-125 kg/hectare",
+            "Apply balanced fertilization: 120:60:40 NPK kg/hectare"
+        ],
+        'pest_control': [
+            "Aphid: Spray Imidacloprid 17.8% SL @ 125ml/hectare",
+            "Termite: Treat seed with Chlorpyrifos 20% EC @ 2.5ml/kg seed",
+            "Rust: Use resistant varieties like HD-2967, WH-147"
+        ],
+        'rotation_crops': ['RICE', 'SUGARCANE', 'COTTON'],
+        'optimal_season': 'Rabi (November-April)',
+        'soil_requirements': 'Well-drained loam with pH 6.0-7.5'
+    },
+    'COTTON': {
+        'best_practices': [
+            "Plant Bt cotton varieties for bollworm resistance",
+            "Maintain plant spacing: 90cm x 60cm for irrigated conditions",
+            "Apply balanced nutrition with micronutrients"
+        ],
+        'pest_control': [
+            "Pink bollworm: Use pheromone traps and mating disruption",
+            "Whitefly: Spray Spiromesifen 22.9% SC @ 1ml/liter",
+            "Thrips: Use blue sticky traps @ 12-15/hectare"
+        ],
+        'rotation_crops': ['WHEAT', 'MUSTARD', 'GRAM'],
+        'optimal_season': 'Kharif (May-October)',
+        'soil_requirements': 'Black cotton soil with pH 7.5-8.5'
+    },
+    'SUGARCANE': {
+        'best_practices': [
+            "Use healthy, disease-free seed cane",
+            "Plant in furrows with proper spacing: 90-120cm",
+            "Apply organic matter @ 25 tonnes/hectare"
+        ],
+        'pest_control': [
+            "Early shoot borer: Apply Carbofuran 3G @ 33kg/hectare",
+            "Red rot: Use resistant varieties like Co-0238, Co-86032",
+            "Smut: Remove and burn affected plants immediately"
+        ],
+        'rotation_crops': ['WHEAT', 'POTATO', 'MUSTARD'],
+        'optimal_season': 'February-March or October-November',
+        'soil_requirements': 'Deep, well-drained soil with pH 6.5-7.5'
+    },
+    'GRAM': {
+        'best_practices': [
+            "Sow during October-November for optimal yields",
+            "Use seed rate of 75-80 kg/hectare for normal varieties",
+            "Apply Rhizobium culture for nitrogen fixation"
+        ],
+        'pest_control': [
+            "Pod borer: Spray Indoxacarb 14.5% SC @ 1ml/liter",
+            "Aphid: Use yellow sticky traps and neem oil spray",
+            "Wilt: Use resistant varieties like JG-11, JG-16"
+        ],
+        'rotation_crops': ['WHEAT', 'MUSTARD', 'BARLEY'],
+        'optimal_season': 'Rabi (October-March)',
+        'soil_requirements': 'Well-drained soil with pH 6.0-7.5'
+    },
+    'MUSTARD': {
+        'best_practices': [
+            "Sow in mid-October for timely sowing",
+            "Use seed rate of 4-5 kg/hectare",
+            "Apply sulfur fertilizer for better oil content"
+        ],
+        'pest_control': [
+            "Aphid: Spray Dimethoate 30% EC @ 1ml/liter",
+            "Painted bug: Monitor and spray insecticides if needed",
+            "White rust: Use resistant varieties and proper drainage"
+        ],
+        'rotation_crops': ['RICE', 'COTTON', 'SUGARCANE'],
+        'optimal_season': 'Rabi (October-March)',
+        'soil_requirements': 'Loamy soil with pH 6.0-8.0'
+    }
+}
+
+# Key agricultural activities per crop, used by the crop calendar
+CROP_CALENDARS = {
+    'RICE': {
+        'nursery_preparation': 'May-June',
+        'transplanting': 'June-July', 
+        'fertilizer_application': 'July, August, September',
+        'pest_monitoring': 'August-October',
+        'harvesting': 'October-November'
+    },
+    'WHEAT': {
+        'land_preparation': 'October-November',
+        'sowing': 'November-December',
+        'fertilizer_application': 'December, January, February',
+        'irrigation': 'December-March',
+        'harvesting': 'March-April'
+    },
+    'COTTON': {
+        'land_preparation': 'April-May',
+        'sowing': 'May-June',
+        'fertilizer_application': 'June, July, August',
+        'pest_monitoring': 'July-September',
+        'harvesting': 'October-December'
+    },
+    'GRAM': {
+        'land_preparation': 'September-October',
+        'sowing': 'October-November',
+        'fertilizer_application': 'November, December',
+        'pest_monitoring': 'December-February',
+        'harvesting': 'February-March'
+    },
+    'MUSTARD': {
+        'land_preparation': 'September-October',
+        'sowing': 'October-November',
+        'fertilizer_application': 'November, December',
+        'pest_monitoring': 'December-February',
+        'harvesting': 'March-April'
+    }
+}
+
+class DistrictStore:
+    """
+    Columnar, load-time index over the crop dataset
+    Rows are grouped by district and sorted by year so that every district
+    is a contiguous [start, stop) range in each crop column array
+    """
+    
+    def __init__(self, dataset: pd.DataFrame, columns: List[str],
+                 window: int = SIMILARITY_WINDOW_YEARS):
+        """Build the index from a dataset containing 'Dist Code' and 'Year'"""
+        sort_keys = ['Dist Code', 'Year'] if 'Year' in dataset.columns else ['Dist Code']
+        ordered = dataset.sort_values(sort_keys, kind='mergesort')
+        
+        codes = ordered['Dist Code'].to_numpy()
+        self.years = ordered['Year'].to_numpy() if 'Year' in ordered.columns else np.arange(len(ordered))
+        self.columns = {
+            col: np.ascontiguousarray(pd.to_numeric(ordered[col], errors='coerce').to_numpy(dtype=float))
+            for col in columns
+        }
+        
+        # District boundaries: positions where the code changes
+        boundaries = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+        self.starts = np.concatenate(([0], boundaries)).astype(np.int64)
+        self.stops = np.concatenate((boundaries, [len(codes)])).astype(np.int64)
+        self.district_codes = codes[self.starts] if len(codes) else codes
+        self.offsets = {
+            code: (int(start), int(stop))
+            for code, start, stop in zip(self.district_codes.tolist(), self.starts, self.stops)
+        }
+        
+        # Districts x crop columns matrix of trailing-window averages
+        self.window = window
+        self.column_index = {col: j for j, col in enumerate(self.columns)}
+        self.row_index = {code: i for i, code in enumerate(self.district_codes.tolist())}
+        self.trailing_means = self.compute_trailing_means(window)
+        self.column_mean = np.nanmean(self.trailing_means, axis=0) if len(self.row_index) else np.array([])
+        self.column_std = np.nanstd(self.trailing_means, axis=0) if len(self.row_index) else np.array([])
+    
+    def compute_trailing_means(self, window: int) -> np.ndarray:
+        """Average of the last `window` rows per district for every column, ignoring NaNs"""
+        matrix = np.full((len(self.starts), len(self.columns)), np.nan)
+        lower = np.maximum(self.stops - window, self.starts)
+        
+        for j, values in enumerate(self.columns.values()):
+            valid = ~np.isnan(values)
+            sums = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0))))
+            counts = np.concatenate(([0], np.cumsum(valid)))
+            window_sums = sums[self.stops] - sums[lower]
+            window_counts = counts[self.stops] - counts[lower]
+            matrix[:, j] = np.where(window_counts > 0, window_sums / np.maximum(window_counts, 1), np.nan)
+        
+        return matrix
+    
+    def with_districts(self, rows: Dict) -> 'DistrictStore':
+        """
+        Copy of the store with some districts' rows replaced or added
+        `rows` maps a district code to (years, values) with one values column
+        per store column, sorted by year. Unchanged districts are copied as
+        contiguous runs and keep their trailing averages; only the given
+        districts are re-indexed
+        """
+        codes = self.district_codes.tolist()
+        new_codes = [code for code in rows if code not in self.row_index]
+        order = sorted(codes + new_codes)
+        
+        year_parts, value_parts, trailing = [], [], []
+        run_start = None
+        for code in order + [None]:
+            position = self.row_index.get(code)
+            if code is not None and code not in rows:
+                start, stop = self.offsets[code]
+                run_start = start if run_start is None else run_start
+                run_stop = stop
+                trailing.append(self.trailing_means[position])
+                continue
+            if run_start is not None:
+                # Flush the run of unchanged districts before this one
+                year_parts.append(self.years[run_start:run_stop])
+                value_parts.append(np.column_stack([values[run_start:run_stop] for values in self.columns.values()])
+                                   if self.columns else np.empty((run_stop - run_start, 0)))
+                run_start = None
+            if code is None:
+                break
+            years, values = rows[code]
+            values = np.asarray(values, dtype=float).reshape(len(years), len(self.columns))
+            year_parts.append(np.asarray(years))
+            value_parts.append(values)
+            trailing.append(self.window_means(values, self.window))
+        
+        store = DistrictStore.__new__(DistrictStore)
+        store.window = self.window
+        store.years = np.concatenate(year_parts) if year_parts else self.years[:0]
+        matrix = np.vstack(value_parts) if value_parts else np.empty((0, len(self.columns)))
+        store.columns = {col: np.ascontiguousarray(matrix[:, j]) for j, col in enumerate(self.columns)}
+        
+        counts = np.array([self.offsets[code][1] - self.offsets[code][0] if code not in rows else len(rows[code][0])
+                           for code in order], dtype=np.int64)
+        store.stops = np.cumsum(counts)
+        store.starts = store.stops - counts
+        store.district_codes = np.array(order, dtype=self.district_codes.dtype)
+        store.offsets = {code: (int(start), int(stop)) for code, start, stop in zip(order, store.starts, store.stops)}
+        store.column_index = dict(self.column_index)
+        store.row_index = {code: i for i, code in enumerate(order)}
+        store.trailing_means = np.vstack(trailing) if trailing else np.empty((0, len(self.columns)))
+        store.column_mean = np.nanmean(store.trailing_means, axis=0) if len(order) else np.array([])
+        store.column_std = np.nanstd(store.trailing_means, axis=0) if len(order) else np.array([])
+        return store
+    
+    @staticmethod
+    def window_means(values: np.ndarray, window: int) -> np.ndarray:
+        """Average of the last `window` rows of one district's values, ignoring NaNs"""
+        tail = values[-window:] if window > 0 else values[:0]
+        valid = ~np.isnan(tail)
+        counts = valid.sum(axis=0)
+        sums = np.where(valid, tail, 0.0).sum(axis=0)
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+    
+    def district_rows(self, district_code) -> Tuple[np.ndarray, np.ndarray]:
+        """(years, values) of one district, one values column per store column"""
+        start, stop = self.offsets[district_code]
+        values = np.column_stack([values[start:stop] for values in self.columns.values()]) \
+            if self.columns else np.empty((stop - start, 0))
+        return self.years[start:stop], values
+    
+    def __len__(self) -> int:
+        return len(self.years)
+
+class TrendTable:
+    """
+    Per-district prefix sums for O(1) trend queries over any trailing window
+    For every district and crop column it keeps cumulative counts, sums and
+    rank-weighted sums of the non-missing values, which is all an ordinary
+    least-squares slope over the last N years needs. New years are appended
+    to a district's block without touching any other district
+    """
+    
+    def __init__(self, columns: List[str]):
+        self.columns = list(columns)
+        self.column_index = {col: j for j, col in enumerate(self.columns)}
+        self.blocks = {}
+    
+    @classmethod
+    def from_store(cls, store: DistrictStore) -> 'TrendTable':
+        """Build blocks for every district in a DistrictStore"""
+        table = cls(list(store.columns))
+        if not table.columns:
+            matrix = np.empty((len(store), 0))
+        else:
+            matrix = np.column_stack([store.columns[col] for col in table.columns])
+        for code, (start, stop) in store.offsets.items():
+            table.set_district(code, store.years[start:stop], matrix[start:stop])
+        return table
+    
+    def set_district(self, district_code, years: np.ndarray, values: np.ndarray):
+        """(Re)build one district's block from its year-sorted rows"""
+        values = np.asarray(values, dtype=float).reshape(len(years), len(self.columns))
+        block = {
+            'years': np.asarray(years).copy(),
+            'values': values.copy(),
+            'count': np.zeros((1, len(self.columns)), dtype=np.int64),
+            'sum': np.zeros((1, len(self.columns))),
+            'rank_sum': np.zeros((1, len(self.columns))),
+            'last': np.full((1, len(self.columns)), -1, dtype=np.int64)
+        }
+        self.blocks[district_code] = block
+        self._extend_prefixes(block, values, 0)
+    
+    def append_rows(self, district_code, years: np.ndarray, values: np.ndarray):
+        """Add rows for later years to a district, updating only its prefix sums"""
+        years = np.asarray(years)
+        values = np.asarray(values, dtype=float).reshape(len(years), len(self.columns))
+        block = self.blocks.get(district_code)
+        
+        if block is None:
+            order = np.argsort(years, kind='mergesort')
+            self.set_district(district_code, years[order], values[order])
+            return
+        
+        if len(block['years']) and (np.any(years <= block['years'][-1]) or np.any(np.diff(years) <= 0)):
+            # Out-of-order or corrected years: rebuild just this district
+            merged_years = np.concatenate((block['years'], years))
+            merged_values = np.vstack((block['values'], values))
+            # Keep the newest row for each year
+            _, last_positions = np.unique(merged_years[::-1], return_index=True)
+            keep = len(merged_years) - 1 - last_positions
+            self.set_district(district_code, merged_years[keep], merged_values[keep])
+            return
+        
+        offset = len(block['years'])
+        block['years'] = np.concatenate((block['years'], years))
+        block['values'] = np.vstack((block['values'], values))
+        self._extend_prefixes(block, values, offset)
+    
+    @staticmethod
+    def _extend_prefixes(block: Dict, values: np.ndarray, offset: int):
+        """Continue the cumulative arrays of a block over newly added rows"""
+        valid = ~np.isnan(values)
+        filled = np.where(valid, values, 0.0)
+        
+        counts = block['count'][-1] + np.cumsum(valid, axis=0)
+        # Rank of each value among the district's non-missing values
+        ranks = np.vstack((block['count'][-1:], counts[:-1]))
+        sums = block['sum'][-1] + np.cumsum(filled, axis=0)
+        rank_sums = block['rank_sum'][-1] + np.cumsum(filled * ranks, axis=0)
+        
+        row_positions = np.arange(offset, offset + len(values))[:, None]
+        last = np.maximum.accumulate(np.where(valid, row_positions, -1), axis=0) if len(values) else np.empty((0, values.shape[1]), dtype=np.int64)
+        last = np.maximum(last, block['last'][-1])
+        
+        block['count'] = np.vstack((block['count'], counts))
+        block['sum'] = np.vstack((block['sum'], sums))
+        block['rank_sum'] = np.vstack((block['rank_sum'], rank_sums))
+        block['last'] = np.vstack((block['last'], last))
+    
+    def copy(self) -> 'TrendTable':
+        """
+        Table sharing every block's arrays, safe to append to while readers use
+        the original: append_rows replaces a block's arrays rather than writing into them
+        """
+        table = TrendTable(self.columns)
+        table.blocks = {code: dict(block) for code, block in self.blocks.items()}
+        return table
+    
+    def has_district(self, district_code) -> bool:
+        return district_code in self.blocks
+    
+    def summary(self, district_code, column: str, years: int) -> Optional[Dict]:
+        """OLS slope, mean and latest value over the district's last `years` rows"""
+        block = self.blocks.get(district_code)
+        j = self.column_index.get(column)
+        if block is None or j is None:
+            return None
+        
+        stop = len(block['years'])
+        lower = max(stop - max(years, 0), 0)
+        first_rank = block['count'][lower, j]
+        n = int(block['count'][stop, j] - first_rank)
+        if n == 0:
+            return {'count': 0}
+        
+        total = block['sum'][stop, j] - block['sum'][lower, j]
+        # Sum of (local x) * y with x = 0..n-1 over the window's values
+        sum_xy = (block['rank_sum'][stop, j] - block['rank_sum'][lower, j]) - first_rank * total
+        sum_x = n * (n - 1) / 2
+        sum_xx = (n - 1) * n * (2 * n - 1) / 6
+        denominator = n * sum_xx - sum_x ** 2
+        slope = (n * sum_xy - sum_x * total) / denominator if denominator else 0.0
+        
+        return {
+            'count': n,
+            'slope': float(slope),
+            'mean': float(total / n),
+            'latest': float(block['values'][block['last'][stop, j], j]),
+            'window': (lower, stop, j)
+        }
+    
+    def window_values(self, district_code, window: Tuple[int, int, int]) -> np.ndarray:
+        """Non-missing values inside a window returned by summary()"""
+        lower, stop, j = window
+        values = self.blocks[district_code]['values'][lower:stop, j]
+        return values[~np.isnan(values)]
+
+class ResponseCache:
+    """
+    Bounded LRU cache of serialized JSON responses
+    Keys combine the endpoint, normalized parameters and dataset version;
+    each entry carries a strong ETag over its exact body bytes
+    """
+    
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def make_key(endpoint: str, params: Dict, dataset_version) -> str:
+        return json.dumps([endpoint, params, dataset_version], sort_keys=True, default=str)
+    
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+    
+    def put(self, key: str, body: bytes) -> str:
+        """Store a body and return its ETag"""
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        with self.lock:
+            self.entries[key] = (body, etag)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return etag
+    
+    def record_not_modified(self):
+        with self.lock:
+            self.not_modified += 1
+    
+    def clear(self, *_):
+        """Drop every entry; used as a dataset-change listener"""
+        with self.lock:
+            self.entries.clear()
+    
+    def stats(self) -> Dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'not_modified': self.not_modified,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+def build_crop_calendar(district_name: str, crop_name: str) -> Dict:
+    """Crop calendar for a district; needs no dataset"""
+    calendar = dict(CROP_CALENDARS.get(crop_name.upper(), {}))
+    calendar['district'] = district_name
+    calendar['crop'] = crop_name
+    return calendar
+
+def identify_crop_columns(columns) -> List[str]:
+    """Return the dataset columns that hold crop statistics"""
+    return [col for col in columns if any(keyword in col.upper() for keyword in CROP_KEYWORDS)]
+
+def district_mapping_from(dataset: pd.DataFrame) -> Dict:
+    """Map district codes to names, falling back to generated names"""
+    if 'Dist Name' in dataset.columns:
+        district_names = dataset[['Dist Code', 'Dist Name']].drop_duplicates()
+        return dict(zip(district_names['Dist Code'], district_names['Dist Name']))
+    return {code: f"District_{code}" for code in dataset['Dist Code'].unique()}
+
+def snapshot_path(csv_path: str) -> str:
+    """Location of the binary snapshot built from a CSV: <csv>.snapshot"""
+    return csv_path + SNAPSHOT_SUFFIX
+
+def file_sha256(path: str) -> str:
+    """Content hash used to tie a snapshot to the CSV it was built from"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def snapshot_matches_source(manifest: Dict, csv_path: str) -> bool:
+    """
+    Whether a snapshot manifest was built from the CSV as it is now
+    The file is only hashed when its size or mtime differ from the manifest's;
+    a snapshot deployed without its CSV always matches
+    """
+    if not os.path.exists(csv_path):
+        return True
+    stat = os.stat(csv_path)
+    if (manifest.get('source_size'), manifest.get('source_mtime_ns')) == (stat.st_size, stat.st_mtime_ns):
+        return True
+    return manifest.get('source_sha256') == file_sha256(csv_path)
+
+def memmap_frame(columns: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """
+    DataFrame over memory-mapped columns, built with copy=False
+    Raises ValueError if pandas copied any numeric column into RAM instead of
+    keeping it a view of its .npy file
+    """
+    frame = pd.DataFrame(columns, copy=False)
+    copied = [col for col, values in columns.items()
+              if values.dtype.kind in 'biufc' and not is_memory_mapped(frame, col)]
+    if copied:
+        raise ValueError(f"pandas copied {len(copied)} of {len(columns)} snapshot columns into memory: "
+                         f"{', '.join(copied[:5])}")
+    return frame
+
+def is_memory_mapped(frame: pd.DataFrame, column: str) -> bool:
+    """Whether a column's values are still a view of an np.memmap"""
+    values = frame[column].to_numpy()
+    while values is not None and not isinstance(values, np.memmap):
+        values = getattr(values, 'base', None)
+    return values is not None
+
+def build_snapshot(csv_path: str, output_dir: Optional[str] = None) -> str:
+    """
+    Convert the CSV into a typed columnar snapshot directory
+    Each column is a .npy file (memory-mappable) and manifest.json records the
+    source hash, column dtypes, crop columns and district mapping
+    """
+    output_dir = output_dir or snapshot_path(csv_path)
+    dataset = pd.read_csv(csv_path)
+    dataset.columns = dataset.columns.str.strip()
+    
+    parent = os.path.dirname(os.path.abspath(output_dir))
+    staging_dir = tempfile.mkdtemp(prefix='.snapshot-', dir=parent)
+    columns = []
+    try:
+        for position, col in enumerate(dataset.columns):
+            series = dataset[col]
+            if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+                values = series.to_numpy()
+                kind = 'numeric'
+            else:
+                # Fixed-width unicode keeps text columns memory-mappable
+                values = series.fillna('').astype(str).to_numpy(dtype=str)
+                kind = 'text'
+            file_name = f"{position:04d}.npy"
+            np.save(os.path.join(staging_dir, file_name), np.ascontiguousarray(values))
+            columns.append({'name': col, 'file': file_name, 'kind': kind, 'dtype': values.dtype.str})
+        
+        district_mapping = district_mapping_from(dataset) if 'Dist Code' in dataset.columns else {}
+        manifest = {
+            'format_version': SNAPSHOT_FORMAT_VERSION,
+            'source_file': os.path.basename(csv_path),
+            'source_sha256': file_sha256(csv_path),
+            # Cheap staleness check before hashing the CSV
+            'source_size': os.stat(csv_path).st_size,
+            'source_mtime_ns': os.stat(csv_path).st_mtime_ns,
+            'rows': len(dataset),
+            'columns': columns,
+            'crop_columns': identify_crop_columns(dataset.columns),
+            # Pairs rather than an object so integer codes survive JSON
+            'district_mapping': [[np.asarray(code).item(), str(name)] for code, name in district_mapping.items()],
+            'created_at': datetime.now().isoformat()
+        }
+        with open(os.path.join(staging_dir, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        
+        if os.path.exists(output_dir):
+            shutil.rmtree(output_dir)
+        os.replace(staging_dir, output_dir)
+    except Exception:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+    
+    return output_dir
+
+def read_snapshot(snapshot_dir: str, source_path: Optional[str] = None) -> Optional[Tuple[pd.DataFrame, List[str], Dict]]:
+    """Memory-map a snapshot, returning None if it is missing, stale or from another format"""
+    manifest_file = os.path.join(snapshot_dir, 'manifest.json')
+    if not os.path.exists(manifest_file):
+        return None
+    
+    with open(manifest_file) as f:
+        manifest = json.load(f)
+    
+    if manifest.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+        return None
+    if source_path is not None and not snapshot_matches_source(manifest, source_path):
+        return None
+    
+    data = {
+        col['name']: np.load(os.path.join(snapshot_dir, col['file']), mmap_mode='r')
+        for col in manifest['columns']
+    }
+    dataset = memmap_frame(data)
+    district_mapping = {code: name for code, name in manifest['district_mapping']}
+    return dataset, manifest['crop_columns'], district_mapping
+
 class GramSathiAgriKnowledge:
     """
     Agricultural Knowledge Integration System for GramSathi
@@ -23,100 +690,16 @@ class GramSathiAgriKnowledge:
         self.dataset = None
         self.crop_columns = []
         self.district_mapping = {}
+        self.district_store = None
+        self.trend_table = None
+        # Serializes ingests; readers use whichever indexes were swapped in last
+        self.ingest_lock = threading.Lock()
+        # Bumped whenever the data behind responses changes
+        self.dataset_version = 0
+        self.dataset_listeners = []
         
         # KVK-style agricultural recommendations database
-        self.crop_recommendations = {
-            'RICE': {
-                'best_practices': [
-                    "Maintain water level 2-5 cm during vegetative stage",
-                    "Apply nitrogen in 3 splits: 50% basal, 25% tillering, 25% panicle initiation",
-                    "Use System of Rice Intensification (SRI) for better yields"
-                ],
-                'pest_control': [
-                    "Brown planthopper: Use resistant varieties like Swarna-Sub1",
-                    "Stem borer: Install pheromone traps @ 8-10/hectare",
-                    "Leaf folder: Spray Chlorantraniliprole 18.5% SC @ 150ml/hectare"
-                ],
-                'rotation_crops': ['WHEAT', 'MUSTARD', 'GRAM', 'PEA'],
-                'optimal_season': 'Kharif (June-November)',
-                'soil_requirements': 'Clay loam with pH 6.0-7.0'
-            },
-            'WHEAT': {
-                'best_practices': [
-                    "Sow at proper time: Mid-November to early December",
-                    "Use certified seed @ 100-125 kg/hectare",
-                    "Apply balanced fertilization: 120:60:40 NPK kg/hectare"
-                ],
-                'pest_control': [
-                    "Aphid: Spray Imidacloprid 17.8% SL @ 125ml/hectare",
-                    "Termite: Treat seed with Chlorpyrifos 20% EC @ 2.5ml/kg seed",
-                    "Rust: Use resistant varieties like HD-2967, WH-147"
-                ],
-                'rotation_crops': ['RICE', 'SUGARCANE', 'COTTON'],
-                'optimal_season': 'Rabi (November-April)',
-                'soil_requirements': 'Well-drained loam with pH 6.0-7.5'
-            },
-            'COTTON': {
-                'best_practices': [
-                    "Plant Bt cotton varieties for bollworm resistance",
-                    "Maintain plant spacing: 90cm x 60cm for irrigated conditions",
-                    "Apply balanced nutrition with micronutrients"
-                ],
-                'pest_control': [
-                    "Pink bollworm: Use pheromone traps and mating disruption",
-                    "Whitefly: Spray Spiromesifen 22.9% SC @ 1ml/liter",
-                    "Thrips: Use blue sticky traps @ 12-15/hectare"
-                ],
-                'rotation_crops': ['WHEAT', 'MUSTARD', 'GRAM'],
-                'optimal_season': 'Kharif (May-October)',
-                'soil_requirements': 'Black cotton soil with pH 7.5-8.5'
-            },
-            'SUGARCANE': {
-                'best_practices': [
-                    "Use healthy, disease-free seed cane",
-                    "Plant in furrows with proper spacing: 90-120cm",
-                    "Apply organic matter @ 25 tonnes/hectare"
-                ],
-                'pest_control': [
-                    "Early shoot borer: Apply Carbofuran 3G @ 33kg/hectare",
-                    "Red rot: Use resistant varieties like Co-0238, Co-86032",
-                    "Smut: Remove and burn affected plants immediately"
-                ],
-                'rotation_crops': ['WHEAT', 'POTATO', 'MUSTARD'],
-                'optimal_season': 'February-March or October-November',
-                'soil_requirements': 'Deep, well-drained soil with pH 6.5-7.5'
-            },
-            'GRAM': {
-                'best_practices': [
-                    "Sow during October-November for optimal yields",
-                    "Use seed rate of 75-80 kg/hectare for normal varieties",
-                    "Apply Rhizobium culture for nitrogen fixation"
-                ],
-                'pest_control': [
-                    "Pod borer: Spray Indoxacarb 14.5% SC @ 1ml/liter",
-                    "Aphid: Use yellow sticky traps and neem oil spray",
-                    "Wilt: Use resistant varieties like JG-11, JG-16"
-                ],
-                'rotation_crops': ['WHEAT', 'MUSTARD', 'BARLEY'],
-                'optimal_season': 'Rabi (October-March)',
-                'soil_requirements': 'Well-drained soil with pH 6.0-7.5'
-            },
-            'MUSTARD': {
-                'best_practices': [
-                    "Sow in mid-October for timely sowing",
-                    "Use seed rate of 4-5 kg/hectare",
-                    "Apply sulfur fertilizer for better oil content"
-                ],
-                'pest_control': [
-                    "Aphid: Spray Dimethoate 30% EC @ 1ml/liter",
-                    "Painted bug: Monitor and spray insecticides if needed",
-                    "White rust: Use resistant varieties and proper drainage"
-                ],
-                'rotation_crops': ['RICE', 'COTTON', 'SUGARCANE'],
-                'optimal_season': 'Rabi (October-March)',
-                'soil_requirements': 'Loamy soil with pH 6.0-8.0'
-            }
-        }
+        self.crop_recommendations = CROP_RECOMMENDATIONS
         
         # Initialize with sample data if CSV is not available
         self.initialize_sample_data()
@@ -127,18 +710,7 @@ class GramSathiAgriKnowledge:
     
     def initialize_sample_data(self):
         """Initialize with sample district data for demo purposes"""
-        self.district_mapping = {
-            101: "Adilabad",
-            102: "Nizamabad", 
-            103: "Karimnagar",
-            104: "Medak",
-            105: "Hyderabad",
-            201: "Krishna",
-            202: "Guntur",
-            203: "Prakasam",
-            204: "Nellore",
-            205: "Chittoor"
-        }
+        self.district_mapping = dict(SAMPLE_DISTRICTS)
         
         # Create sample dataset if none exists
         if self.dataset is None:
@@ -167,6 +739,7 @@ class GramSathiAgriKnowledge:
             self.crop_columns = [col for col in self.dataset.columns 
                                if any(keyword in col.upper() for keyword in 
                                     ['RICE', 'WHEAT', 'COTTON', 'SUGARCANE', 'GRAM', 'MUSTARD'])]
+            self.build_district_index()
     
     def load_dataset(self, dataset_path: str):
         """Load and preprocess the agricultural dataset"""
@@ -181,6 +754,27 @@ class GramSathiAgriKnowledge:
             
             dataset_loaded = False
             for path in possible_paths:
+                if not path:
+                    continue
+                
+                # Prefer a binary snapshot that matches the CSV contents
+                snapshot = None
+                snapshot_dir = snapshot_path(path)
+                if os.path.isdir(snapshot_dir):
+                    try:
+                        snapshot = read_snapshot(snapshot_dir, path)
+                    except ValueError as e:
+                        print(f"Error: snapshot {snapshot_dir} could not be memory-mapped ({e}), loading the CSV instead")
+                    else:
+                        if snapshot is None:
+                            print(f"Snapshot {snapshot_dir} is stale, rebuild it with: python gsak.py snapshot \"{path}\"")
+                
+                if snapshot is not None:
+                    self.dataset, self.crop_columns, self.district_mapping = snapshot
+                    print(f"Dataset snapshot loaded from {snapshot_dir} with {len(self.dataset)} records")
+                    self.build_district_index()
+                    return
+                
                 if os.path.exists(path):
                     self.dataset = pd.read_csv(path)
                     # Strip whitespace from all column names
@@ -194,29 +788,39 @@ class GramSathiAgriKnowledge:
                 return
             
             # Identify crop-related columns
-            self.crop_columns = [col for col in self.dataset.columns 
-                               if any(keyword in col.upper() for keyword in 
-                                    ['RICE', 'WHEAT', 'COTTON', 'SUGARCANE', 'GRAM', 'MUSTARD', 'ONION'])]
+            self.crop_columns = identify_crop_columns(self.dataset.columns)
             
             print(f"Identified {len(self.crop_columns)} crop-related columns")
             
-            # Create district mapping if available
+            # Create district mapping and index if available
             if 'Dist Code' in self.dataset.columns:
                 self.create_district_mapping()
+            self.build_district_index()
                 
         except Exception as e:
             print(f"Error loading dataset: {e}, using sample data")
     
     def create_district_mapping(self):
         """Create mapping of district codes to names"""
-        unique_districts = self.dataset['Dist Code'].unique()
+        self.district_mapping = district_mapping_from(self.dataset)
+    
+    def build_district_index(self):
+        """Group the dataset by district into contiguous per-crop arrays"""
+        if self.dataset is None or 'Dist Code' not in self.dataset.columns:
+            self.district_store = None
+            self.trend_table = None
+            return
         
-        # If district names are available in dataset, use them
-        if 'Dist Name' in self.dataset.columns:
-            district_names = self.dataset[['Dist Code', 'Dist Name']].drop_duplicates()
-            self.district_mapping = dict(zip(district_names['Dist Code'], district_names['Dist Name']))
-        else:
-            self.district_mapping = {code: f"District_{code}" for code in unique_districts}
+        self.district_store = DistrictStore(self.dataset, self.crop_columns)
+        self.trend_table = TrendTable.from_store(self.district_store)
+        print(f"Indexed {len(self.district_store.offsets)} districts across {len(self.crop_columns)} crop columns")
+        self.notify_dataset_changed()
+    
+    def notify_dataset_changed(self):
+        """Bump the dataset version and tell listeners (e.g. response caches)"""
+        self.dataset_version += 1
+        for listener in self.dataset_listeners:
+            listener(self.dataset_version)
     
     def get_crop_trends(self, district_code: int, crop_name: str, years: int = 5) -> Dict:
         """Analyze crop trends for a specific district and crop"""
@@ -229,45 +833,122 @@ class GramSathiAgriKnowledge:
         if not crop_cols:
             return {"error": f"No data found for crop: {crop_name}"}
         
-        # Filter data for district
-        district_data = self.dataset[self.dataset['Dist Code'] == district_code]
-        
-        if district_data.empty:
+        # Look up the district's precomputed trend statistics
+        trend_table = self.trend_table
+        if trend_table is None or not trend_table.has_district(district_code):
             return {"error": f"No data found for district code: {district_code}"}
         
-        # Get recent years data
-        recent_data = district_data.tail(years)
-        
         trends = {}
         for col in crop_cols:
-            if col in recent_data.columns:
-                values = recent_data[col].dropna()
-                if len(values) > 1:
-                    # Calculate trend
-                    trend_slope = np.polyfit(range(len(values)), values, 1)[0]
-                    trends[col] = {
-                        'recent_values': values.tolist(),
-                        'trend': 'increasing' if trend_slope > 0 else 'decreasing',
-                        'average': float(values.mean()),
-                        'latest': float(values.iloc[-1]) if len(values) > 0 else 0
-                    }
+            # Get recent years statistics
+            summary = trend_table.summary(district_code, col, years)
+            if summary is None:
+                continue
+            if summary['count'] > 1:
+                values = trend_table.window_values(district_code, summary['window'])
+                trends[col] = {
+                    'recent_values': values.tolist(),
+                    'trend': 'increasing' if summary['slope'] > 0 else 'decreasing',
+                    'average': summary['mean'],
+                    'latest': summary['latest']
+                }
         
         return trends
     
+    def ingest_records(self, records: List[Dict]) -> Dict:
+        """
+        Append new yearly rows (e.g. a new season's district statistics)
+        Only the affected districts are re-indexed in the district store,
+        similarity matrix and trend table; `dataset` stays the frame that was
+        loaded. Ingests run one at a time and build new indexes aside, swapping them
+        in once complete so concurrent readers never see a partial update
+        """
+        with self.ingest_lock:
+            return self._ingest_records(records)
+    
+    def _ingest_records(self, records: List[Dict]) -> Dict:
+        if self.dataset is None or self.district_store is None:
+            raise ValueError("Dataset not loaded")
+        
+        new_rows = pd.DataFrame(records)
+        new_rows.columns = new_rows.columns.str.strip()
+        for column in ('Dist Code', 'Year'):
+            if column not in new_rows.columns:
+                raise ValueError(f"Missing required field: {column}")
+        
+        new_rows['Dist Code'] = new_rows['Dist Code'].astype(self.dataset['Dist Code'].dtype)
+        new_rows['Year'] = new_rows['Year'].astype(int)
+        new_rows = new_rows.drop_duplicates(['Dist Code', 'Year'], keep='last')
+        ignored_columns = [col for col in new_rows.columns if col not in self.dataset.columns]
+        new_rows = new_rows.drop(columns=ignored_columns)
+        
+        district_mapping = dict(self.district_mapping)
+        for code in new_rows['Dist Code'].unique().tolist():
+            if code not in district_mapping:
+                district_mapping[code] = f"District_{code}"
+        
+        # Only the ingested districts are touched: newer rows replace existing
+        # (district, year) rows in their store blocks and trend prefix sums
+        store = self.district_store
+        trend_table = self.trend_table.copy()
+        district_rows = {}
+        for code, rows in new_rows.sort_values('Year', kind='mergesort').groupby('Dist Code', sort=False):
+            code = np.asarray(code).item()
+            years = rows['Year'].to_numpy()
+            values = np.column_stack([
+                pd.to_numeric(rows[col], errors='coerce').to_numpy(dtype=float) if col in rows.columns
+                else np.full(len(rows), np.nan)
+                for col in trend_table.columns
+            ]) if trend_table.columns else np.empty((len(rows), 0))
+            trend_table.append_rows(code, years, values)
+            
+            if code in store.offsets:
+                old_years, old_values = store.district_rows(code)
+                kept = ~np.isin(old_years, years)
+                years = np.concatenate((old_years[kept], years))
+                values = np.vstack((old_values[kept], values))
+                order = np.argsort(years, kind='mergesort')
+                years, values = years[order], values[order]
+            district_rows[code] = (years, values)
+        
+        district_store = store.with_districts(district_rows)
+        
+        self.district_mapping = district_mapping
+        self.district_store = district_store
+        self.trend_table = trend_table
+        self.notify_dataset_changed()
+        
+        return {
+            'ingested_records': len(new_rows),
+            'districts_updated': int(new_rows['Dist Code'].nunique()),
+            'ignored_columns': ignored_columns,
+            'total_records': self.total_records()
+        }
+    
+    def total_records(self) -> int:
+        """Rows behind the indexes: the loaded dataset plus ingested rows"""
+        if self.district_store is not None:
+            return len(self.district_store)
+        return len(self.dataset) if self.dataset is not None else 0
+    
     def get_agricultural_advice(self, district_code: int, crop_name: str, 
-                              season: str = 'current') -> Dict:
-        """Get comprehensive agricultural advice"""
+                              season: str = 'current', trends: Optional[Dict] = None,
+                              recommendations: Optional[List[str]] = None) -> Dict:
+        """Get comprehensive agricultural advice, reusing precomputed trends/recommendations if given"""
         advice = {
             'district': self.district_mapping.get(district_code, f"District_{district_code}"),
             'crop': crop_name.upper(),
             'season': season,
+            # Generation time: /api/advice serves cached advice with the time it was computed
             'timestamp': datetime.now().isoformat()
         }
         
         # Get crop trends from dataset
-        trends = {}
+        if trends is None:
+            trends = {}
+            if self.dataset is not None:
+                trends = self.get_crop_trends(district_code, crop_name)
         if self.dataset is not None:
-            trends = self.get_crop_trends(district_code, crop_name)
             advice['historical_trends'] = trends
         
         # Get KVK/ICAR recommendations
@@ -283,11 +964,35 @@ class GramSathiAgriKnowledge:
             })
         
         # Generate specific recommendations
-        recommendations = self.generate_recommendations(district_code, crop_name, trends)
+        if recommendations is None:
+            recommendations = self.generate_recommendations(district_code, crop_name, trends)
         advice['specific_recommendations'] = recommendations
         
         return advice
     
+    def get_agricultural_advice_batch(self, items: List[Tuple[int, str, str]]) -> Iterator[Tuple[int, Dict]]:
+        """
+        Yield (position, advice) for many (district_code, crop_name, season) requests
+        Requests are grouped by district and trends/recommendations are computed
+        once per (district, crop), however many seasons ask for them
+        """
+        by_district = {}
+        for position, (district_code, crop_name, season) in enumerate(items):
+            by_district.setdefault(district_code, []).append((position, crop_name.upper(), season))
+        
+        for district_code, district_items in by_district.items():
+            computed = {}
+            for position, crop_name, season in district_items:
+                if crop_name not in computed:
+                    trends = {}
+                    if self.dataset is not None:
+                        trends = self.get_crop_trends(district_code, crop_name)
+                    computed[crop_name] = (trends, self.generate_recommendations(district_code, crop_name, trends))
+                
+                trends, recommendations = computed[crop_name]
+                yield position, self.get_agricultural_advice(district_code, crop_name, season,
+                                                             trends, list(recommendations))
+    
     def generate_recommendations(self, district_code: int, crop_name: str, trends: Dict) -> List[str]:
         """Generate specific recommendations based on historical data analysis"""
         recommendations = []
@@ -315,109 +1020,219 @@ class GramSathiAgriKnowledge:
     
     def get_crop_calendar(self, district_code: int, crop_name: str) -> Dict:
         """Generate crop calendar with key agricultural activities"""
-        crop_key = crop_name.upper()
-        base_calendar = {
-            'RICE': {
-                'nursery_preparation': 'May-June',
-                'transplanting': 'June-July', 
-                'fertilizer_application': 'July, August, September',
-                'pest_monitoring': 'August-October',
-                'harvesting': 'October-November'
-            },
-            'WHEAT': {
-                'land_preparation': 'October-November',
-                'sowing': 'November-December',
-                'fertilizer_application': 'December, January, February',
-                'irrigation': 'December-March',
-                'harvesting': 'March-April'
-            },
-            'COTTON': {
-                'land_preparation': 'April-May',
-                'sowing': 'May-June',
-                'fertilizer_application': 'June, July, August',
-                'pest_monitoring': 'July-September',
-                'harvesting': 'October-December'
-            },
-            'GRAM': {
-                'land_preparation': 'September-October',
-                'sowing': 'October-November',
-                'fertilizer_application': 'November, December',
-                'pest_monitoring': 'December-February',
-                'harvesting': 'February-March'
-            },
-            'MUSTARD': {
-                'land_preparation': 'September-October',
-                'sowing': 'October-November',
-                'fertilizer_application': 'November, December',
-                'pest_monitoring': 'December-February',
-                'harvesting': 'March-April'
-            }
-        }
-        
-        calendar = base_calendar.get(crop_key, {})
-        calendar['district'] = self.district_mapping.get(district_code, f"District_{district_code}")
-        calendar['crop'] = crop_name
-        
-        return calendar
+        district_name = self.district_mapping.get(district_code, f"District_{district_code}")
+        return build_crop_calendar(district_name, crop_name)
     
-    def search_similar_districts(self, district_code: int, crop_name: str, metric: str = 'area') -> List[Dict]:
+    def search_similar_districts(self, district_code: int, crop_name: str, metric: str = 'area',
+                                 k: int = 5, distance: str = 'relative') -> List[Dict]:
         """Find districts with similar crop patterns"""
         if self.dataset is None:
             return []
         
+        if distance not in SIMILARITY_DISTANCES:
+            raise ValueError(f"Unknown distance '{distance}', expected one of {', '.join(SIMILARITY_DISTANCES)}")
+        
         # Find relevant columns
         crop_cols = [col for col in self.crop_columns 
                     if crop_name.upper() in col.upper() and metric.upper() in col.upper()]
         
         if not crop_cols:
-            # Return sample similar districts if no data
+            # Return sample similar districts if no data; seeded by the query so
+            # the same request always gets the same (cacheable) answer
             similar_codes = [code for code in self.district_mapping.keys() if code != district_code][:3]
+            seed = hashlib.sha256(f"{district_code}|{crop_name.upper()}|{metric.upper()}".encode()).digest()
+            rng = np.random.default_rng(int.from_bytes(seed[:8], 'big'))
             return [
                 {
                     'district_code': int(code),
                     'district_name': self.district_mapping.get(code, f"District_{code}"),
-                    'average_value': float(np.random.uniform(20000, 40000)),
-                    'similarity_score': float(np.random.uniform(0.7, 0.95))
+                    'average_value': float(rng.uniform(20000, 40000)),
+                    'similarity_score': float(rng.uniform(0.7, 0.95))
                 }
                 for code in similar_codes
             ]
         
-        target_col = crop_cols[0]
-        
-        # Get target district's recent average
-        target_data = self.dataset[self.dataset['Dist Code'] == district_code]
-        if target_data.empty:
+        store = self.district_store
+        if store is None or district_code not in store.row_index or k <= 0:
             return []
         
-        target_avg = target_data[target_col].tail(3).mean()
+        target_row = store.row_index[district_code]
+        target_col = store.column_index[crop_cols[0]]
+        averages = store.trailing_means[:, target_col]
         
-        # Find similar districts
-        similar_districts = []
-        for dist_code in self.dataset['Dist Code'].unique():
-            if dist_code == district_code:
-                continue
-            
-            dist_data = self.dataset[self.dataset['Dist Code'] == dist_code]
-            if not dist_data.empty:
-                dist_avg = dist_data[target_col].tail(3).mean()
-                
-                # Check similarity (within 20% range)
-                if not pd.isna(dist_avg) and not pd.isna(target_avg) and target_avg != 0:
-                    similarity = abs(dist_avg - target_avg) / target_avg
-                    if similarity < 0.2:
-                        similar_districts.append({
-                            'district_code': int(dist_code),
-                            'district_name': self.district_mapping.get(dist_code, f"District_{dist_code}"),
-                            'average_value': float(dist_avg),
-                            'similarity_score': 1 - similarity
-                        })
-        
-        # Sort by similarity
-        similar_districts.sort(key=lambda x: x['similarity_score'], reverse=True)
-        return similar_districts[:5]
-
-# Initialize the agricultural knowledge system
-agri_system = GramSathiAgriKnowledge()
+        if distance == 'relative':
+            scores = self._relative_similarity(averages, target_row)
+        else:
+            # Compare on every metric recorded for the crop (area, production, yield...)
+            feature_cols = [store.column_index[col] for col in self.crop_columns
+                            if crop_name.upper() in col.upper()]
+            features = store.trailing_means[:, feature_cols]
+            if distance == 'zscore':
+                scores = self._zscore_similarity(features, store.column_mean[feature_cols],
+                                                 store.column_std[feature_cols], target_row)
+            else:
+                scores = self._cosine_similarity(features, store.column_mean[feature_cols],
+                                                 store.column_std[feature_cols], target_row)
+        
+        scores[target_row] = np.nan
+        candidates = np.flatnonzero(~np.isnan(scores))
+        if len(candidates) > k:
+            top = np.argpartition(-scores[candidates], k - 1)[:k]
+            candidates = candidates[top]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        
+        codes = store.district_codes
+        return [
+            {
+                'district_code': int(codes[i]),
+                'district_name': self.district_mapping.get(codes[i].item(), f"District_{codes[i]}"),
+                'average_value': float(averages[i]),
+                'similarity_score': float(scores[i])
+            }
+            for i in candidates
+        ]
+    
+    @staticmethod
+    def _relative_similarity(averages: np.ndarray, target_row: int) -> np.ndarray:
+        """1 - relative difference to the target, for districts within 20% of it"""
+        target_avg = averages[target_row]
+        if np.isnan(target_avg) or target_avg == 0:
+            return np.full(len(averages), np.nan)
+        
+        difference = np.abs(averages - target_avg) / target_avg
+        return np.where(difference < 0.2, 1 - difference, np.nan)
+    
+    @staticmethod
+    def _zscore_similarity(features: np.ndarray, mean: np.ndarray, std: np.ndarray,
+                           target_row: int) -> np.ndarray:
+        """1 / (1 + Euclidean distance) between z-scored metric vectors"""
+        scaled = (features - mean) / np.where(std > 0, std, 1.0)
+        distances = np.sqrt(np.sum((scaled - scaled[target_row]) ** 2, axis=1))
+        return 1 / (1 + distances)
+    
+    @staticmethod
+    def _cosine_similarity(features: np.ndarray, mean: np.ndarray, std: np.ndarray,
+                           target_row: int) -> np.ndarray:
+        """
+        Cosine similarity between z-scored metric vectors
+        Centering matters: raw averages are all positive, so every pair of
+        districts would point the same way and score close to 1
+        """
+        scaled = (features - mean) / np.where(std > 0, std, 1.0)
+        norms = np.linalg.norm(scaled, axis=1)
+        target_norm = norms[target_row]
+        if np.isnan(target_norm) or target_norm == 0:
+            return np.full(len(features), np.nan)
+        
+        return scaled @ scaled[target_row] / np.where(norms > 0, norms * target_norm, np.nan)
+
+# The agricultural knowledge system is created on first use (see INIT_MODE)
+# GSAK_DATASET_PATH points at the ICRISAT CSV; its snapshot is used when present
+DATASET_PATH = os.environ.get('GSAK_DATASET_PATH')
+_agri_system = None
+_agri_system_lock = threading.Lock()
+_static_district_names = None
+
+# Cold-start bookkeeping reported by /api/startup
+startup_timings = {
+    'init_mode': INIT_MODE,
+    'module_import_ms': None,
+    'agri_system_init_ms': None,
+    'first_request_ms': {}
+}
+
+response_cache = ResponseCache()
+
+def get_agri_system() -> GramSathiAgriKnowledge:
+    """Return the shared knowledge system, loading pandas/numpy and the dataset on first call"""
+    global _agri_system
+    if _agri_system is None:
+        with _agri_system_lock:
+            if _agri_system is None:
+                started = time.perf_counter()
+                system = GramSathiAgriKnowledge(DATASET_PATH)
+                system.dataset_listeners.append(response_cache.clear)
+                _agri_system = system
+                startup_timings['agri_system_init_ms'] = round((time.perf_counter() - started) * 1000, 2)
+                print(f"Agricultural knowledge system initialized in {startup_timings['agri_system_init_ms']} ms")
+    return _agri_system
+
+def agri_system_loaded() -> bool:
+    """Whether the data-backed system exists, without triggering its creation"""
+    return _agri_system is not None
+
+def start_warmup():
+    """Build the knowledge system on a background thread"""
+    thread = threading.Thread(target=get_agri_system, name='gsak-warmup', daemon=True)
+    thread.start()
+    return thread
+
+def lookup_district_name(district_code: int) -> str:
+    """
+    Resolve a district name without forcing a dataset load where possible:
+    from the loaded system, else the snapshot manifest or the demo districts
+    """
+    global _static_district_names
+    if _agri_system is None and _static_district_names is None:
+        if not DATASET_PATH:
+            _static_district_names = SAMPLE_DISTRICTS
+        else:
+            manifest_file = os.path.join(snapshot_path(DATASET_PATH), 'manifest.json')
+            if os.path.exists(manifest_file):
+                with open(manifest_file) as f:
+                    manifest = json.load(f)
+                if snapshot_matches_source(manifest, DATASET_PATH):
+                    _static_district_names = {code: name for code, name in manifest['district_mapping']}
+    
+    names = _static_district_names if _agri_system is None and _static_district_names is not None \
+        else get_agri_system().district_mapping
+    return names.get(district_code, f"District_{district_code}")
+
+def cached_json_response(endpoint: str, params: Dict, compute, static: bool = False):
+    """
+    Serve a deterministic JSON response from the response cache
+    Honours If-None-Match with 304 Not Modified; `compute` builds the payload on a miss.
+    Cached bodies are replayed byte for byte, so a time field in the payload (such as
+    advice's `timestamp`) is when it was generated, not when it was served.
+    Static responses do not force the dataset to load just to learn its version
+    """
+    if static and not agri_system_loaded():
+        dataset_version = 'static'
+    else:
+        dataset_version = get_agri_system().dataset_version
+    key = ResponseCache.make_key(endpoint, params, dataset_version)
+    
+    cached = response_cache.get(key)
+    if cached is None:
+        body = app.json.response(compute()).get_data()
+        etag = response_cache.put(key, body)
+        cache_status = 'MISS'
+    else:
+        body, etag = cached
+        cache_status = 'HIT'
+    
+    if request.if_none_match.contains(etag):
+        response_cache.record_not_modified()
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Cache'] = cache_status
+    return response
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_cold_start(response):
+    """Record how long the first hit on each endpoint took"""
+    started = getattr(g, 'request_started', None)
+    first_requests = startup_timings['first_request_ms']
+    if started is not None and request.endpoint and request.endpoint not in first_requests:
+        first_requests[request.endpoint] = round((time.perf_counter() - started) * 1000, 2)
+    return response
 
 # API Routes
 @app.route('/', methods=['GET'])
@@ -426,8 +1241,8 @@ def index():
     return jsonify({
         'message': 'GramSathi Agricultural Knowledge API is running',
         'timestamp': datetime.now().isoformat(),
-        'dataset_loaded': agri_system.dataset is not None,
-        'total_records': len(agri_system.dataset) if agri_system.dataset is not None else 0,
+        'dataset_loaded': agri_system_loaded() and _agri_system.dataset is not None,
+        'total_records': _agri_system.total_records() if agri_system_loaded() else 0,
         'status': 'active',
         'version': '1.0.0'
     })
@@ -438,14 +1253,23 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'dataset_loaded': agri_system.dataset is not None,
-        'total_records': len(agri_system.dataset) if agri_system.dataset is not None else 0
+        'dataset_loaded': agri_system_loaded() and _agri_system.dataset is not None,
+        'total_records': _agri_system.total_records() if agri_system_loaded() else 0
+    })
+
+@app.route('/api/startup', methods=['GET'])
+def get_startup_info():
+    """Report cold-start timings and whether the data stack has been loaded"""
+    return jsonify({
+        **startup_timings,
+        'agri_system_loaded': agri_system_loaded(),
+        'pandas_imported': 'pandas' in sys.modules
     })
 
 @app.route('/api/crops', methods=['GET'])
 def get_supported_crops():
     """Get list of supported crops"""
-    crops = list(agri_system.crop_recommendations.keys())
+    crops = list(CROP_RECOMMENDATIONS.keys())
     return jsonify({
         'supported_crops': crops,
         'total_count': len(crops)
@@ -456,7 +1280,7 @@ def get_districts():
     """Get list of available districts"""
     districts = [
         {'code': int(code), 'name': name} 
-        for code, name in agri_system.district_mapping.items()
+        for code, name in get_agri_system().district_mapping.items()
     ]
     return jsonify({
         'districts': districts,
@@ -465,7 +1289,7 @@ def get_districts():
 
 @app.route('/api/advice', methods=['POST'])
 def get_agricultural_advice():
-    """Get comprehensive agricultural advice"""
+    """Get comprehensive agricultural advice; `timestamp` is when the cached advice was generated"""
     try:
         data = request.get_json()
         
@@ -480,9 +1304,67 @@ def get_agricultural_advice():
         season = data.get('season', 'current')
         
         # Get advice
-        advice = agri_system.get_agricultural_advice(district_code, crop_name, season)
+        params = {'district_code': district_code, 'crop_name': crop_name, 'season': season}
+        return cached_json_response('advice', params, lambda: get_agri_system().get_agricultural_advice(
+            district_code, crop_name, season))
         
-        return jsonify(advice)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid parameter format: {str(e)}'}), 400
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+@app.route('/api/advice/batch', methods=['POST'])
+def get_agricultural_advice_batch():
+    """
+    Get agricultural advice for many (district_code, crop_name, season) requests
+    Accepts {"requests": [...]} where each item is an object or a
+    [district_code, crop_name, season] list. Batches above BATCH_STREAM_THRESHOLD
+    (or with ?stream=1) are streamed as NDJSON, one result per line
+    """
+    try:
+        data = request.get_json()
+        raw_items = data.get('requests') if isinstance(data, dict) else data
+        
+        if not isinstance(raw_items, list) or not raw_items:
+            return jsonify({'error': 'Missing required parameter: requests'}), 400
+        if len(raw_items) > MAX_BATCH_SIZE:
+            return jsonify({'error': f'Batch too large: at most {MAX_BATCH_SIZE} requests allowed'}), 400
+        
+        # Validate items up front; invalid ones are reported in place
+        items = []
+        positions = []
+        errors = {}
+        for position, item in enumerate(raw_items):
+            try:
+                if isinstance(item, dict):
+                    district_code, crop_name = item['district_code'], item['crop_name']
+                    season = item.get('season', 'current')
+                else:
+                    district_code, crop_name = item[0], item[1]
+                    season = item[2] if len(item) > 2 else 'current'
+                items.append((int(district_code), str(crop_name).upper(), season))
+                positions.append(position)
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                errors[position] = f'Invalid request item: {str(e)}'
+        
+        def results():
+            for position, error in errors.items():
+                yield {'index': position, 'error': error}
+            for item_position, advice in get_agri_system().get_agricultural_advice_batch(items):
+                yield {'index': positions[item_position], 'advice': advice}
+        
+        stream = request.args.get('stream') == '1' or len(raw_items) > BATCH_STREAM_THRESHOLD
+        if stream:
+            def generate():
+                for result in results():
+                    yield json.dumps(result) + '\n'
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
+        ordered = sorted(results(), key=lambda result: result['index'])
+        return jsonify({
+            'results': ordered,
+            'total_count': len(ordered)
+        })
         
     except ValueError as e:
         return jsonify({'error': f'Invalid parameter format: {str(e)}'}), 400
@@ -504,15 +1386,39 @@ def get_crop_trends():
         crop_name = data['crop_name'].upper()
         years = int(data.get('years', 5))
         
-        trends = agri_system.get_crop_trends(district_code, crop_name, years)
-        
-        return jsonify(trends)
+        params = {'district_code': district_code, 'crop_name': crop_name, 'years': years}
+        return cached_json_response('trends', params, lambda: get_agri_system().get_crop_trends(
+            district_code, crop_name, years))
         
     except ValueError as e:
         return jsonify({'error': f'Invalid parameter format: {str(e)}'}), 400
     except Exception as e:
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
+@app.route('/api/ingest', methods=['POST'])
+def ingest_records():
+    """Append new yearly district rows and update trend statistics incrementally"""
+    try:
+        ingest_token = os.environ.get('GSAK_INGEST_TOKEN')
+        if not ingest_token:
+            return jsonify({'error': 'Ingest is disabled, set GSAK_INGEST_TOKEN to enable it'}), 403
+        if request.headers.get('X-Ingest-Token') != ingest_token:
+            return jsonify({'error': 'Invalid ingest token'}), 403
+        
+        data = request.get_json()
+        records = data.get('records') if isinstance(data, dict) else data
+        if not isinstance(records, list) or not records:
+            return jsonify({'error': 'Missing required parameter: records'}), 400
+        
+        result = get_agri_system().ingest_records(records)
+        
+        return jsonify(result)
+        
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': f'Invalid parameter format: {str(e)}'}), 400
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
 @app.route('/api/calendar', methods=['POST'])
 def get_crop_calendar():
     """Get crop calendar for farming activities"""
@@ -527,9 +1433,9 @@ def get_crop_calendar():
         district_code = int(data['district_code'])
         crop_name = data['crop_name'].upper()
         
-        calendar = agri_system.get_crop_calendar(district_code, crop_name)
-        
-        return jsonify(calendar)
+        params = {'district_code': district_code, 'crop_name': crop_name}
+        return cached_json_response('calendar', params, lambda: build_crop_calendar(
+            lookup_district_name(district_code), crop_name), static=True)
         
     except ValueError as e:
         return jsonify({'error': f'Invalid parameter format: {str(e)}'}), 400
@@ -550,13 +1456,19 @@ def get_similar_districts():
         district_code = int(data['district_code'])
         crop_name = data['crop_name'].upper()
         metric = data.get('metric', 'area')
+        k = int(data.get('k', 5))
+        distance = data.get('distance', 'relative')
         
-        similar_districts = agri_system.search_similar_districts(district_code, crop_name, metric)
+        def compute():
+            similar_districts = get_agri_system().search_similar_districts(district_code, crop_name, metric, k, distance)
+            return {
+                'similar_districts': similar_districts,
+                'distance': distance,
+                'total_count': len(similar_districts)
+            }
         
-        return jsonify({
-            'similar_districts': similar_districts,
-            'total_count': len(similar_districts)
-        })
+        params = {'district_code': district_code, 'crop_name': crop_name, 'metric': metric, 'k': k, 'distance': distance}
+        return cached_json_response('similar-districts', params, compute)
         
     except ValueError as e:
         return jsonify({'error': f'Invalid parameter format: {str(e)}'}), 400
@@ -568,10 +1480,10 @@ def get_best_practices(crop_name):
     """Get best practices for a specific crop"""
     crop_key = crop_name.upper()
     
-    if crop_key not in agri_system.crop_recommendations:
+    if crop_key not in CROP_RECOMMENDATIONS:
         return jsonify({'error': f'Crop {crop_name} not found in database'}), 404
     
-    crop_info = agri_system.crop_recommendations[crop_key]
+    crop_info = CROP_RECOMMENDATIONS[crop_key]
     
     return jsonify({
         'crop': crop_name,
@@ -585,10 +1497,10 @@ def get_pest_control(crop_name):
     """Get pest control recommendations for a specific crop"""
     crop_key = crop_name.upper()
     
-    if crop_key not in agri_system.crop_recommendations:
+    if crop_key not in CROP_RECOMMENDATIONS:
         return jsonify({'error': f'Crop {crop_name} not found in database'}), 404
     
-    crop_info = agri_system.crop_recommendations[crop_key]
+    crop_info = CROP_RECOMMENDATIONS[crop_key]
     
     return jsonify({
         'crop': crop_name,
@@ -596,17 +1508,29 @@ def get_pest_control(crop_name):
         'recommended_rotation': crop_info['rotation_crops']
     })
 
+@app.route('/api/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """Get response cache hit/miss counters"""
+    return jsonify({
+        **response_cache.stats(),
+        'dataset_version': _agri_system.dataset_version if agri_system_loaded() else None
+    })
+
 @app.route('/api/dataset-info', methods=['GET'])
 def get_dataset_info():
     """Get information about the loaded dataset"""
+    agri_system = get_agri_system()
+    store = agri_system.district_store
+    has_years = (store is not None and len(store) > 0
+                 and agri_system.dataset is not None and 'Year' in agri_system.dataset.columns)
     return jsonify({
-        'total_records': len(agri_system.dataset) if agri_system.dataset is not None else 0,
+        'total_records': agri_system.total_records(),
         'total_districts': len(agri_system.district_mapping),
         'crop_columns': agri_system.crop_columns,
         'dataset_columns': list(agri_system.dataset.columns) if agri_system.dataset is not None else [],
         'year_range': {
-            'min': int(agri_system.dataset['Year'].min()) if agri_system.dataset is not None and 'Year' in agri_system.dataset.columns else 2015,
-            'max': int(agri_system.dataset['Year'].max()) if agri_system.dataset is not None and 'Year' in agri_system.columns else 2024
+            'min': int(store.years.min()) if has_years else 2015,
+            'max': int(store.years.max()) if has_years else 2024
         }
     })
 
@@ -623,25 +1547,57 @@ def method_not_allowed(error):
 def internal_error(error):
     return jsonify({'error': 'Internal server error'}), 500
 
-# For Vercel deployment
-if __name__ == '__main__':
+startup_timings['module_import_ms'] = round((time.perf_counter() - _MODULE_IMPORT_STARTED) * 1000, 2)
+if INIT_MODE == 'eager':
+    get_agri_system()
+elif INIT_MODE == 'warmup':
+    start_warmup()
+
+def run_server():
+    """Run the development server"""
+    agri_system = get_agri_system()
     print("=== GramSathi Agricultural Knowledge API Server ===")
     print("Server starting...")
     print(f"Dataset loaded: {agri_system.dataset is not None}")
     if agri_system.dataset is not None:
-        print(f"Total records: {len(agri_system.dataset)}")
+        print(f"Total records: {agri_system.total_records()}")
         print(f"Total districts: {len(agri_system.district_mapping)}")
     print("Available endpoints:")
     print("  GET  / - API Status")
     print("  GET  /api/health - Health check")
+    print("  GET  /api/startup - Cold-start timings")
     print("  GET  /api/crops - List supported crops")
     print("  GET  /api/districts - List available districts")
     print("  POST /api/advice - Get agricultural advice")
+    print("  POST /api/advice/batch - Get advice for many district/crop pairs")
     print("  POST /api/trends - Get crop trends")
+    print("  POST /api/ingest - Append new yearly district data (needs GSAK_INGEST_TOKEN)")
     print("  POST /api/calendar - Get crop calendar")
     print("  POST /api/similar-districts - Find similar districts")
     print("  GET  /api/best-practices/<crop> - Get best practices")
     print("  GET  /api/pest-control/<crop> - Get pest control info")
     print("  GET  /api/dataset-info - Get dataset information")
+    print("  GET  /api/cache-stats - Response cache counters")
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(debug=True, host='0.0.0.0', port=5000)
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point: serve the API or build a dataset snapshot"""
+    parser = argparse.ArgumentParser(description="GramSathi Agricultural Knowledge API")
+    subcommands = parser.add_subparsers(dest='command')
+    subcommands.add_parser('serve', help='Run the development server (default)')
+    snapshot_parser = subcommands.add_parser('snapshot', help='Convert the dataset CSV into a binary snapshot')
+    snapshot_parser.add_argument('csv_path', help='Path to the ICRISAT district CSV')
+    snapshot_parser.add_argument('--output', help=f'Snapshot directory (default: <csv>{SNAPSHOT_SUFFIX})')
+    args = parser.parse_args(argv)
+    
+    if args.command == 'snapshot':
+        output_dir = build_snapshot(args.csv_path, args.output)
+        print(f"Snapshot written to {output_dir}")
+        return
+    
+    run_server()
+
+# For Vercel deployment
+if __name__ == '__main__':
+    main()
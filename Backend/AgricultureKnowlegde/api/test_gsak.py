@@ -0,0 +1,227 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+os.environ.pop('GSAK_DATASET_PATH', None)
+os.environ['GSAK_INIT_MODE'] = 'lazy'
+import gsak
+
+
+CSV_HEADER = "Year,Dist Code,Dist Name,RICE AREA (1000 ha),RICE PRODUCTION (1000 tonnes)\n"
+
+
+def write_csv(path, rows):
+    with open(path, 'w') as f:
+        f.write(CSV_HEADER)
+        for row in rows:
+            f.write(",".join(str(value) for value in row) + "\n")
+
+
+@pytest.fixture
+def client():
+    gsak.response_cache.clear()
+    return gsak.app.test_client()
+
+
+def test_district_store_groups_rows_by_district_in_year_order():
+    dataset = gsak.pd.DataFrame({
+        'Year': [2016, 2015, 2015, 2017, 2016, 2014],
+        'Dist Code': [2, 1, 2, 1, 1, 2],
+        'RICE AREA (1000 ha)': [20.0, 11.0, 21.0, 13.0, np.nan, 19.0],
+    })
+
+    store = gsak.DistrictStore(dataset, ['RICE AREA (1000 ha)'], window=2)
+
+    assert store.district_codes.tolist() == [1, 2]
+    start, stop = store.offsets[1]
+    assert store.years[start:stop].tolist() == [2015, 2016, 2017]
+    start, stop = store.offsets[2]
+    assert store.years[start:stop].tolist() == [2014, 2015, 2016]
+    assert store.columns['RICE AREA (1000 ha)'][start:stop].tolist() == [19.0, 21.0, 20.0]
+    # Trailing means skip missing values inside the window
+    assert store.trailing_means[:, 0].tolist() == [13.0, 20.5]
+
+
+def test_trend_slopes_match_polyfit_after_out_of_order_ingests():
+    table = gsak.TrendTable(['AREA'])
+    table.set_district(1, np.array([2012, 2013, 2014]), np.array([[10.0], [np.nan], [14.0]]))
+    table.append_rows(1, np.array([2015, 2016]), np.array([[13.0], [18.0]]))
+    # An older year and a corrected year arrive after the newer ones
+    table.append_rows(1, np.array([2010, 2013]), np.array([[7.0], [11.5]]))
+    table.append_rows(1, np.array([2017]), np.array([[np.nan]]))
+
+    by_year = {2010: 7.0, 2012: 10.0, 2013: 11.5, 2014: 14.0, 2015: 13.0, 2016: 18.0, 2017: np.nan}
+    values = np.array([by_year[year] for year in sorted(by_year)])
+    assert table.blocks[1]['years'].tolist() == sorted(by_year)
+
+    for years in (3, 5, 7, 20):
+        window = values[-years:]
+        window = window[~np.isnan(window)]
+        summary = table.summary(1, 'AREA', years)
+
+        assert summary['count'] == len(window)
+        assert summary['mean'] == pytest.approx(window.mean())
+        assert summary['latest'] == 18.0
+        assert summary['slope'] == pytest.approx(np.polyfit(np.arange(len(window)), window, 1)[0])
+
+
+def test_ingest_reindexes_only_the_ingested_districts(monkeypatch):
+    system = gsak.GramSathiAgriKnowledge()
+    area = 'RICE AREA (1000 ha)'
+    expected = gsak.pd.concat([system.dataset, gsak.pd.DataFrame([
+        {'Year': 2025, 'Dist Code': 101, area: 1.0},
+        {'Year': 2018, 'Dist Code': 102, area: 2.0},
+        {'Year': 2024, 'Dist Code': 999, area: 3.0},
+    ])], ignore_index=True).drop_duplicates(['Dist Code', 'Year'], keep='last')
+    expected_store = gsak.DistrictStore(expected, system.crop_columns)
+    untouched = system.district_store.trailing_means[system.district_store.row_index[205]].copy()
+
+    def full_rebuild(*args, **kwargs):
+        raise AssertionError("ingest rebuilt the whole district store")
+
+    monkeypatch.setattr(gsak.DistrictStore, '__init__', full_rebuild)
+    result = system.ingest_records([
+        {'Year': 2025, 'Dist Code': 101, area: 1.0},
+        {'Year': 2018, 'Dist Code': 102, area: 2.0},
+        {'Year': 2024, 'Dist Code': 999, area: 3.0},
+    ])
+
+    store = system.district_store
+    assert result['total_records'] == len(expected) == len(store)
+    assert store.district_codes.tolist() == expected_store.district_codes.tolist()
+    assert store.offsets == expected_store.offsets
+    assert store.years.tolist() == expected_store.years.tolist()
+    for col in system.crop_columns:
+        np.testing.assert_allclose(store.columns[col], expected_store.columns[col], equal_nan=True)
+    np.testing.assert_allclose(store.trailing_means, expected_store.trailing_means, equal_nan=True)
+    np.testing.assert_allclose(store.trailing_means[store.row_index[205]], untouched)
+    assert system.trend_table.summary(102, area, 20)['count'] == 10
+    assert system.district_mapping[999] == 'District_999'
+
+
+def test_batch_advice_reports_errors_per_item(client):
+    requests = [
+        {'district_code': 101, 'crop_name': 'rice'},
+        {'district_code': 'not-a-code', 'crop_name': 'rice'},
+        {'district_code': 102},
+        [103, 'wheat', 'rabi']
+    ]
+
+    response = client.post('/api/advice/batch', json={'requests': requests})
+    assert response.status_code == 200
+    results = response.get_json()['results']
+
+    assert [result['index'] for result in results] == [0, 1, 2, 3]
+    assert results[0]['advice']['crop'] == 'RICE'
+    assert 'Invalid request item' in results[1]['error']
+    assert 'Invalid request item' in results[2]['error']
+    assert results[3]['advice']['season'] == 'rabi'
+
+
+def test_streamed_batch_advice_reports_errors_per_item(client):
+    requests = [{'district_code': 101, 'crop_name': 'cotton'}, {'crop_name': 'rice'}]
+
+    response = client.post('/api/advice/batch?stream=1', json={'requests': requests})
+    assert response.mimetype == 'application/x-ndjson'
+    results = {result['index']: result for result in map(json.loads, response.get_data(as_text=True).splitlines())}
+
+    assert set(results) == {0, 1}
+    assert results[0]['advice']['district'] == 'Adilabad'
+    assert 'error' in results[1]
+
+
+def test_cosine_similarity_compares_profiles_around_the_mean():
+    features = np.array([[120.0, 300.0], [110.0, 280.0], [80.0, 200.0], [90.0, 220.0]])
+    mean, std = features.mean(axis=0), features.std(axis=0)
+
+    scores = gsak.GramSathiAgriKnowledge._cosine_similarity(features, mean, std, 0)
+
+    assert scores[0] == pytest.approx(1.0)
+    assert scores[1] > 0.9
+    assert scores[2] < -0.9
+    assert scores[3] < 0
+
+
+def test_snapshot_goes_stale_when_the_csv_changes(tmp_path):
+    csv_path = str(tmp_path / "districts.csv")
+    write_csv(csv_path, [(2015, 1, 'Adilabad', 10.5, 30.0), (2016, 1, 'Adilabad', 12.0, 33.0),
+                         (2015, 2, 'Guntur', 5.0, 12.5)])
+    snapshot_dir = gsak.build_snapshot(csv_path)
+
+    dataset, crop_columns, district_mapping = gsak.read_snapshot(snapshot_dir, csv_path)
+    assert len(dataset) == 3
+    assert crop_columns == ['RICE AREA (1000 ha)', 'RICE PRODUCTION (1000 tonnes)']
+    assert district_mapping == {1: 'Adilabad', 2: 'Guntur'}
+    assert gsak.is_memory_mapped(dataset, 'RICE AREA (1000 ha)')
+
+    write_csv(csv_path, [(2015, 1, 'Adilabad', 10.5, 30.0), (2016, 1, 'Adilabad', 12.0, 33.0),
+                         (2015, 2, 'Guntur', 5.0, 12.5), (2016, 2, 'Guntur', 6.0, 14.0)])
+    with open(os.path.join(snapshot_dir, 'manifest.json')) as f:
+        manifest = json.load(f)
+
+    assert not gsak.snapshot_matches_source(manifest, csv_path)
+    assert gsak.read_snapshot(snapshot_dir, csv_path) is None
+
+
+def test_static_endpoints_are_served_without_importing_pandas():
+    script = """
+import sys
+import gsak
+client = gsak.app.test_client()
+assert client.get('/api/crops').status_code == 200
+assert client.get('/api/best-practices/rice').status_code == 200
+startup = client.get('/api/startup').get_json()
+assert not startup['agri_system_loaded'] and not startup['pandas_imported'], startup
+assert 'pandas' not in sys.modules and 'numpy' not in sys.modules
+"""
+    env = {key: value for key, value in os.environ.items() if key != 'GSAK_DATASET_PATH'}
+    env['GSAK_INIT_MODE'] = 'lazy'
+    result = subprocess.run([sys.executable, '-c', script], cwd=os.path.dirname(os.path.abspath(gsak.__file__)),
+                            env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+def test_trends_response_has_etag_and_revalidates_with_304(client):
+    params = {'district_code': 101, 'crop_name': 'rice', 'years': 5}
+
+    first = client.post('/api/trends', json=params)
+    assert first.status_code == 200
+    assert first.headers['X-Cache'] == 'MISS'
+    etag = first.headers['ETag']
+    assert etag
+
+    repeat = client.post('/api/trends', json=params, headers={'If-None-Match': etag})
+    assert repeat.status_code == 304
+    assert repeat.headers['ETag'] == etag
+    assert repeat.get_data() == b''
+
+    changed = client.post('/api/trends', json=params, headers={'If-None-Match': '"other"'})
+    assert changed.status_code == 200
+    assert changed.headers['X-Cache'] == 'HIT'
+    assert changed.get_data() == first.get_data()
+
+
+def test_cached_advice_keeps_its_generation_timestamp(client):
+    params = {'district_code': 102, 'crop_name': 'wheat'}
+
+    first = client.post('/api/advice', json=params)
+    repeat = client.post('/api/advice', json=params)
+
+    assert repeat.headers['X-Cache'] == 'HIT'
+    assert repeat.headers['ETag'] == first.headers['ETag']
+    assert repeat.get_json()['timestamp'] == first.get_json()['timestamp']
+
+
+def test_sample_similar_districts_are_deterministic():
+    system = gsak.GramSathiAgriKnowledge()
+    params = (101, 'GRAM', 'area', 5, 'relative')
+
+    first = system.search_similar_districts(*params)
+    assert len(first) == 3
+    assert system.search_similar_districts(*params) == first
+    assert gsak.GramSathiAgriKnowledge().search_similar_districts(*params) == first
+    assert system.search_similar_districts(102, 'GRAM', 'area', 5, 'relative') != first
@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import json
 import time
@@ -11,8 +11,121 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import time
 import hashlib
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraper_common.jobs import JobQueue, JobQueueFull, job_response, register_job_routes
+from scraper_common.waits import LatencyTracker, PostbackWatcher, StepTimer
+from scraper_common.metrics import ScraperMetrics
+from scraper_common.resource_blocking import (PageWeightMeter, blocked_url_patterns,
+                                              configure_chrome_options, enable_resource_blocking)
+from ncs_http import LOCATION_SERVICE_URL, LocationSuggestions, NcsHttpClient, parse_jobs
+from job_index import JobHarvester, JobIndex, load_harvest_watchlist
 
-def script(location, experience):
+# Prometheus metrics served at /metrics
+metrics = ScraperMetrics('ncs')
+
+# Per-step browser timings; they also drive the adaptive wait timeouts
+scrape_latency = LatencyTracker(on_record=metrics.observe_phase)
+page_weight = PageWeightMeter()
+
+# Scrape engine: 'http' (location lookup and search postback only), 'selenium',
+# or 'auto' (HTTP first, falling back to Selenium if the postback flow fails)
+SCRAPER_ENGINE = os.environ.get('SCRAPER_ENGINE', 'auto').lower()
+
+http_client = NcsHttpClient(
+    location_url=os.environ.get('NCS_LOCATION_URL', LOCATION_SERVICE_URL),
+    pool_size=int(os.environ.get('HTTP_POOL_SIZE', 10)),
+    timeout=float(os.environ.get('HTTP_TIMEOUT', 20)),
+    locations=LocationSuggestions(ttl=float(os.environ.get('LOCATION_CACHE_TTL', 24 * 3600)))
+)
+
+# Results pages a paginated search walks at most, and the default cap on streamed jobs
+MAX_JOB_PAGES = int(os.environ.get('MAX_JOB_PAGES', 20))
+MAX_STREAM_JOBS = int(os.environ.get('MAX_STREAM_JOBS', 500))
+
+def iter_job_pages(location, experience, page=1, max_pages=1, outcome=None):
+    """
+    Yield (page number, results URL, jobs) with the configured engine, from
+    results page `page` on; the Selenium engine only reads the first page
+    If an `outcome` dict is given it gets the 'engine' that ran and whether
+    the HTTP pager ran out ('exhausted') before `max_pages` pages
+    """
+    outcome = {} if outcome is None else outcome
+    outcome.update(engine=None, exhausted=False)
+    timer = StepTimer(scrape_latency, 'NCS search')
+    if SCRAPER_ENGINE in ('http', 'auto'):
+        pages = http_client.iter_pages(location, experience, page, max_pages)
+        try:
+            with timer.step('http_search'):
+                result = next(pages, None)
+            metrics.scrape('http', 'ok')
+        except Exception as e:
+            metrics.scrape('http', 'error')
+            if SCRAPER_ENGINE == 'http':
+                raise
+            print(f"HTTP engine failed ({e}), falling back to Selenium")
+        else:
+            outcome['engine'] = 'http'
+            read = 0
+            while result is not None:
+                read += 1
+                yield result
+                with timer.step('http_page'):
+                    result = next(pages, None)
+            outcome['exhausted'] = 0 < read < max_pages
+            print(timer.summary())
+            return
+
+    outcome['engine'] = 'selenium'
+    if page > 1:
+        print("The Selenium engine only reads the first results page")
+        return
+    try:
+        url, page_source = selenium_page(location, experience)
+        metrics.scrape('selenium', 'ok')
+    except Exception:
+        metrics.scrape('selenium', 'error')
+        raise
+    with timer.step('parse'):
+        jobs = parse_jobs(page_source)
+    yield 1, url, jobs
+
+def script(location, experience, limit=None, page=1):
+    """
+    Search NCS jobs with the configured engine: (results URL, jobs)
+    Without a limit only results page `page` is read; with one, pages are
+    followed until `limit` jobs are collected
+    """
+    url, jobs = None, []
+    for _, page_url, page_jobs in iter_job_pages(location, experience, page,
+                                                 1 if limit is None else MAX_JOB_PAGES):
+        url = url or page_url
+        jobs.extend(page_jobs)
+        if limit is not None and len(jobs) >= limit:
+            jobs = jobs[:limit]
+            break
+    print(f"Extracted {len(jobs)} jobs")
+    if job_index is not None:
+        try:
+            job_index.record_harvest(location, experience, jobs, complete=False)
+        except Exception as e:
+            print(f"Could not index jobs: {e}")
+    return url, jobs
+
+def harvest_jobs(location, experience):
+    """
+    Every listing of a search for the job index: (jobs, whether every results page was read)
+    Only an HTTP crawl whose pager ran out counts as complete; a Selenium
+    fallback reads just the first page
+    """
+    jobs, outcome = [], {}
+    for _, _, page_jobs in iter_job_pages(location, experience, 1, MAX_JOB_PAGES, outcome):
+        jobs.extend(page_jobs)
+    return jobs, outcome['engine'] == 'http' and outcome['exhausted']
+
+def selenium_page(location, experience):
+    """Drive the search form in Chrome: (results URL, results page source)"""
     initial_url = "https://www.ncs.gov.in/pages/default.aspx#searcharea"
 
     from selenium.webdriver.chrome.options import Options
@@ -22,18 +135,22 @@ def script(location, experience):
     chrome_options.add_argument("--disable-dev-shm-usage")
     chrome_options.add_argument("--disable-gpu")
     chrome_options.add_argument("--disable-extensions")
-    chrome_options.add_argument("--disable-images")
     chrome_options.page_load_strategy = 'eager'
+    configure_chrome_options(chrome_options)
     
-    driver = webdriver.Chrome(options=chrome_options)
+    timer = StepTimer(scrape_latency, 'NCS scrape')
+    with timer.step('start_browser'):
+        driver = webdriver.Chrome(options=chrome_options)
     driver.set_page_load_timeout(15)
+    # Only the search form, its postback scripts and the results are needed
+    enable_resource_blocking(driver, blocked_url_patterns())
     
     try:
-        driver.get(initial_url)
+        with timer.step('load_form'):
+            driver.get(initial_url)
         print("Page loaded successfully")
         try:
-            WebDriverWait(driver, 5).until(
-            EC.element_to_be_clickable((By.ID, "btnClosePopup")))
+            timer.wait(driver, 'popup', EC.element_to_be_clickable((By.ID, "btnClosePopup")), 5)
 
             close_btn = driver.find_element("id", "btnClosePopup")
             close_btn.click()
@@ -55,9 +172,8 @@ def script(location, experience):
         # suggestion.click()
         # print(f"Location '{location}' selected")
         first_suggestion_xpath = "/html/body/ul[4]/li[1]"
-        WebDriverWait(driver, 10).until(
-            EC.visibility_of_element_located((By.XPATH, first_suggestion_xpath))
-        )
+        timer.wait(driver, 'location_suggestions',
+                   EC.visibility_of_element_located((By.XPATH, first_suggestion_xpath)), 10)
         first_suggestion = driver.find_element(By.XPATH, first_suggestion_xpath)
         first_suggestion.click()
         print("First location suggestion selected")
@@ -73,58 +189,33 @@ def script(location, experience):
         print("Full Stack radio clicked")
 
         print("Clicking Search button")
+        postback = PostbackWatcher(driver)
+        postback.arm()
         search_button = driver.find_element("id", "ctl00_SPWebPartManager1_g_de4e63a9_db8a_4b11_b989_4b13991e94ee_ctl00_btnSearch")
         driver.execute_script("arguments[0].click();", search_button)
 
-        # Wait for job results to load
-        WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "div.col-xs-6.col-sm-6.paddingLeft0"))
-        )
-
-        # Parse the page source with BeautifulSoup
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-
-        jobs = []
-        for i in range(10):
-            idx = str(i).zfill(2)
-            job_id = f"ctl00_SPWebPartManager1_g_30b9fe7b_bf4d_46f4_a746_0091ffc9e482_ctl00_rptSearchJobs_ctl{idx}_lblJobTitle"
-            org_id = f"ctl00_SPWebPartManager1_g_30b9fe7b_bf4d_46f4_a746_0091ffc9e482_ctl00_rptSearchJobs_ctl{idx}_lblOrganization"
-            loc_id = f"ctl00_SPWebPartManager1_g_30b9fe7b_bf4d_46f4_a746_0091ffc9e482_ctl00_rptSearchJobs_ctl{idx}_lblStateName"
-            salary_id = f"ctl00_SPWebPartManager1_g_30b9fe7b_bf4d_46f4_a746_0091ffc9e482_ctl00_rptSearchJobs_ctl{idx}_Label1"
-            skill_id = f"ctl00_SPWebPartManager1_g_30b9fe7b_bf4d_46f4_a746_0091ffc9e482_ctl00_rptSearchJobs_ctl{idx}_lblKeywords"
-
-            job_span = soup.find("span", id=job_id)
-            org_span = soup.find("span", id=org_id)
-            loc_span = soup.find("span", id=loc_id)
-            salary_span = soup.find("span", id=salary_id)
-            skill_span = soup.find("span", id=skill_id)
-
-            if job_span and org_span:
-                jobs.append({
-                    "JobTitle": job_span.get_text(strip=True),
-                    "Organization": org_span.get_text(strip=True),
-                    "Location": loc_span.get_text(strip=True) if loc_span else "",
-                    "SalaryRange": salary_span.get_text(strip=True) if salary_span else "",
-                    "SkillRequired": skill_span.get_text(strip=True) if skill_span else ""
-                })
-
-        print("Extracted jobs:", jobs)
-
-        # Wait for the popup close button to be clickable and click it
+        # Wait for the search postback, then for job results to render
+        postback.wait(timer, 'search_postback', 20)
+        timer.wait(driver, 'job_results',
+                   EC.presence_of_element_located((By.CSS_SELECTOR, "div.col-xs-6.col-sm-6.paddingLeft0")), 15)
+
+        page_source = driver.page_source
+
+        # Close the popup if it is showing; the results are already captured, so do not wait for one
         try:
-            WebDriverWait(driver, 5).until(
-                EC.element_to_be_clickable((By.ID, "btnClosePopup"))
-            )
-            close_btn = driver.find_element("id", "btnClosePopup")
-            close_btn.click()
-            print("Popup closed")
+            close_buttons = [button for button in driver.find_elements(By.ID, "btnClosePopup") if button.is_displayed()]
+            if close_buttons:
+                close_buttons[0].click()
+                print("Popup closed")
         except Exception:
-            print("No popup appeared")
+            print("Could not close popup")
 
         current_url = driver.current_url
+        page_weight.finish(driver)
 
         driver.quit()
-        return current_url, jobs
+        print(timer.summary())
+        return current_url, page_source
 
     except Exception as e:
         print(f"Error in script: {str(e)}")
@@ -139,29 +230,147 @@ app = Flask(__name__)
 # Enable CORS for all domains on all routes
 CORS(app, origins=['http://localhost:3000', 'http://127.0.0.1:3000'])
 
-# Simple in-memory cache
-cache = {}
 CACHE_DURATION = 300  # 5 minutes
 
+# Harvested listings for /search; set JOB_INDEX_PATH='' to disable
+JOB_INDEX_PATH = os.environ.get('JOB_INDEX_PATH', 'job_index.db')
+job_index = JobIndex(JOB_INDEX_PATH) if JOB_INDEX_PATH else None
+job_harvester = JobHarvester(
+    job_index,
+    harvest_jobs,
+    watchlist=load_harvest_watchlist(os.environ.get('HARVEST_WATCHLIST')),
+    top_n=int(os.environ.get('HARVEST_TOP_N', 20)),
+    interval=float(os.environ.get('HARVEST_INTERVAL', 3600)),
+    min_request_interval=float(os.environ.get('HARVEST_MIN_REQUEST_INTERVAL', 5)),
+    max_age=float(os.environ.get('JOB_MAX_AGE', 7 * 24 * 3600))
+) if job_index is not None else None
+
 @app.route('/', methods=['GET'])
 def homePage():
     dataSet = {"Page": "Home Page navigate to request page", "Time Stamp": time.time()}
     return jsonify(dataSet)
 
-@app.route('/request', methods=['GET', 'OPTIONS'])
+# Scrapes requested with POST /request run here instead of on the request worker;
+# finished jobs are reused for CACHE_DURATION
+job_queue = JobQueue(
+    max_workers=int(os.environ.get('JOB_WORKERS', 2)),
+    max_pending=int(os.environ.get('JOB_MAX_PENDING', 50)),
+    result_ttl=CACHE_DURATION
+)
+register_job_routes(app, job_queue)
+
+metrics.registry.callback('scraper_jobs_total', 'Background scrape jobs by outcome', ['scraper', 'outcome'],
+                          lambda: {('ncs', outcome): job_queue.stats()[outcome]
+                                   for outcome in ('submitted', 'merged', 'completed', 'failed')})
+metrics.register_routes(app)
+
+@app.route('/request', methods=['GET', 'POST', 'OPTIONS'])
 def requestPage():
-    location = request.args.get('location')
-    experience = request.args.get('experience')
+    # POST takes the same parameters as a JSON body or form/query values
+    params = (request.get_json(silent=True) or {}) if request.method == 'POST' else {}
+    location = params.get('location') or request.values.get('location')
+    experience = params.get('experience') or request.values.get('experience')
     if not location or not experience:
         return jsonify({"error": "Missing query parameters"}), 400
+    try:
+        limit = params.get('limit') or request.values.get('limit')
+        limit = int(limit) if limit else None
+        page = int(params.get('page') or request.values.get('page') or 1)
+        if (limit is not None and limit < 1) or page < 1:
+            raise ValueError
+    except (TypeError, ValueError):
+        return jsonify({"error": "limit and page must be positive integers"}), 400
+    if job_harvester is not None:
+        job_harvester.record_request(location, experience)
+
+    if request.method == 'POST':
+        key = hashlib.md5(f"{location}_{experience}_{limit}_{page}".encode()).hexdigest()
+        try:
+            job = job_queue.submit(key, lambda: script(location, experience, limit, page))
+        except JobQueueFull as e:
+            return jsonify({"error": str(e)}), 503
+        return job_response(job)
+
+    # stream=1 (or Accept: application/x-ndjson) sends one NDJSON line per job as
+    # each results page arrives, following the pager up to `limit` jobs
+    if request.args.get('stream') == '1' or 'application/x-ndjson' in request.headers.get('Accept', ''):
+        def generate():
+            started = time.monotonic()
+            sent = pages = 0
+            wanted = limit or MAX_STREAM_JOBS
+            try:
+                for number, url, jobs in iter_job_pages(location, experience, page, MAX_JOB_PAGES):
+                    pages += 1
+                    for job in jobs[:wanted - sent]:
+                        sent += 1
+                        yield json.dumps({"page": number, "url": url, "job": job}) + '\n'
+                    if sent >= wanted:
+                        break
+            except Exception as e:
+                print(f"Streamed search failed: {e}")
+                yield json.dumps({"error": str(e)}) + '\n'
+            yield json.dumps({"summary": {
+                "jobs": sent,
+                "pages": pages,
+                "seconds": round(time.monotonic() - started, 2)
+            }}) + '\n'
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
     try:
-        jobs = script(location, experience)
+        jobs = script(location, experience, limit, page)
         return jsonify(jobs)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/search', methods=['GET'])
+def searchPage():
+    if job_index is None:
+        return jsonify({"error": "Job index is disabled"}), 404
+    try:
+        salary_min = request.args.get('salary_min')
+        salary_max = request.args.get('salary_max')
+        salary_min = float(salary_min) if salary_min else None
+        salary_max = float(salary_max) if salary_max else None
+        limit = min(int(request.args.get('limit', 20)), 100)
+        offset = int(request.args.get('offset', 0))
+        if limit < 1 or offset < 0:
+            raise ValueError
+    except ValueError:
+        return jsonify({"error": "salary_min/salary_max must be numbers, limit and offset non-negative integers"}), 400
+
+    return jsonify(job_index.search(
+        keywords=request.args.get('q'),
+        location=request.args.get('location'),
+        experience=request.args.get('experience'),
+        salary_min=salary_min,
+        salary_max=salary_max,
+        skills=request.args.get('skills'),
+        limit=limit,
+        offset=offset
+    ))
+
+@app.route('/harvest-stats', methods=['GET'])
+def harvestStatsPage():
+    if job_harvester is None:
+        return jsonify({"error": "Job index is disabled"}), 404
+    return jsonify(job_harvester.stats())
+
+@app.route('/scrape-timings', methods=['GET'])
+def scrapeTimingsPage():
+    return jsonify(scrape_latency.stats())
+
+@app.route('/resource-stats', methods=['GET'])
+def resourceStatsPage():
+    return jsonify(page_weight.stats())
+
+@app.route('/location-stats', methods=['GET'])
+def locationStatsPage():
+    return jsonify(http_client.locations.stats())
+
+if job_harvester is not None and os.environ.get('HARVEST_ENABLED', '').lower() in ('1', 'true', 'yes'):
+    job_harvester.start()
+
 if __name__ == '__main__':
-    import os
     port = int(os.environ.get('PORT', 5003))
     app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+Time JobIndex.search on synthetic listings, fed in through record_harvest
+
+    python benchmark_job_index.py [jobs ...]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from job_index import JobIndex
+
+DEFAULT_SIZES = [1000, 10000, 50000]
+JOBS_PER_SEARCH = 100
+
+TITLES = ['Farm Supervisor', 'Tractor Operator', 'Dairy Assistant', 'Poultry Farm Worker', 'Field Officer',
+          'Accountant', 'Electrician', 'Plumber', 'Delivery Driver', 'Sales Executive', 'Data Entry Operator',
+          'Welder', 'Warehouse Helper', 'Security Guard', 'Agriculture Extension Worker']
+SKILLS = ['Irrigation', 'Tractor Driving', 'Animal Husbandry', 'Accounting', 'Wiring', 'MS Excel', 'Driving',
+          'Sales', 'Welding', 'Crop Management', 'Poultry Care', 'Communication', 'Tally', 'Soil Testing']
+LOCATIONS = ['Karnataka', 'Maharashtra', 'Tamil Nadu', 'Kerala', 'Punjab', 'Bihar', 'Uttar Pradesh', 'Gujarat']
+EXPERIENCES = ['0', '1', '2', '5', '10']
+
+QUERIES = [
+    ('keyword', dict(keywords='tractor')),
+    ('keyword prefix', dict(keywords='dri')),
+    ('keyword + location', dict(keywords='farm supervisor', location='Karnataka')),
+    ('experience + salary', dict(experience='2', salary_min=20000, salary_max=25000)),
+    ('all facets', dict(keywords='irrigation', location='punjab', experience='1', salary_min=15000)),
+    ('skill ranking', dict(skills='Irrigation, Tractor Driving, MS Excel')),
+    ('everything', dict()),
+]
+
+
+def build_index(path: str, jobs: int) -> JobIndex:
+    random.seed(7)
+    index = JobIndex(path)
+    for search in range(max(1, jobs // JOBS_PER_SEARCH)):
+        listings = []
+        for _ in range(JOBS_PER_SEARCH):
+            salary = random.randint(6, 45) * 1000
+            listings.append({
+                'JobTitle': random.choice(TITLES),
+                'Organization': f"Employer {random.randint(1, 2000)}",
+                'Location': random.choice(LOCATIONS),
+                'SalaryRange': f"{salary} - {salary + random.randint(1, 10) * 1000}",
+                'SkillRequired': ', '.join(random.sample(SKILLS, 3))
+            })
+        # Unique title suffixes keep every listing distinct after deduplication
+        for position, listing in enumerate(listings):
+            listing['JobTitle'] += f" {search * JOBS_PER_SEARCH + position}"
+        index.record_harvest(random.choice(LOCATIONS), random.choice(EXPERIENCES), listings, complete=False)
+    return index
+
+
+def main(sizes):
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'jobs':>7} {'query':<22} {'matches':>8} {'p50':>8} {'max':>8}")
+        for jobs in sizes:
+            index = build_index(os.path.join(directory, f"jobs_{jobs}.db"), jobs)
+            started = time.perf_counter()
+            index.view()
+            print(f"{jobs:>7} {'(build view)':<22} {'':>8} {(time.perf_counter() - started) * 1000:>6.0f}ms")
+            for name, query in QUERIES:
+                timings = []
+                for _ in range(30):
+                    result = index.search(**query)
+                    timings.append(result['took_ms'])
+                timings.sort()
+                print(f"{jobs:>7} {name:<22} {result['total']:>8} {timings[len(timings) // 2]:>6.2f}ms "
+                      f"{timings[-1]:>6.2f}ms")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
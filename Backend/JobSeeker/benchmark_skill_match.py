@@ -0,0 +1,91 @@
+"""
+Compare ways of ranking listings by how many of a farmer's skills they need:
+a Python set intersection per listing, precomputed integer bitsets with
+popcount, and the SkillIndex inverted index used by /search
+
+    python benchmark_skill_match.py [listings ...]
+"""
+import random
+import sys
+import time
+
+from job_fields import SkillIndex, skill_set
+
+DEFAULT_SIZES = [10000, 50000, 100000]
+
+SKILLS = ['Irrigation', 'Tractor Driving', 'Animal Husbandry', 'Accounting', 'Wiring', 'MS Excel', 'Driving Licence',
+          'Sales', 'Welding', 'Crop Management', 'Poultry Care', 'Communication Skills', 'Tally ERP 9',
+          'Soil Testing', 'Organic Farming', 'Dairy Management', 'Book Keeping', 'Plumbing', 'Masonry',
+          'Carpentry', 'Food Processing', 'Warehouse Management', 'Basic Computer', 'Customer Service']
+FARMER_SKILLS = 'Irrigation, Tractor Driving, Crop Management, Driving Licence'
+TOP = 20
+
+
+def build_listings(count):
+    random.seed(11)
+    return [skill_set(', '.join(random.sample(SKILLS, random.randint(1, 5)))) for _ in range(count)]
+
+
+def rank_sets(listings, wanted):
+    wanted = set(wanted)
+    scored = []
+    for position, skills in enumerate(listings):
+        shared = len(wanted.intersection(skills))
+        if shared:
+            scored.append((-shared, -shared / (len(wanted) + len(skills) - shared), position))
+    scored.sort()
+    return [position for _, _, position in scored[:TOP]]
+
+
+class BitsetRanker:
+    """One Python int per listing, a bit per canonical skill"""
+
+    def __init__(self, listings):
+        self.bits = {}
+        for skills in listings:
+            for skill in skills:
+                self.bits.setdefault(skill, 1 << len(self.bits))
+        self.masks = [sum(self.bits[skill] for skill in skills) for skills in listings]
+        self.sizes = [len(skills) for skills in listings]
+
+    def rank(self, wanted):
+        query = sum(self.bits.get(skill, 0) for skill in set(wanted))
+        size = bin(query).count('1')
+        scored = []
+        for position, mask in enumerate(self.masks):
+            shared = (mask & query).bit_count()
+            if shared:
+                scored.append((-shared, -shared / (size + self.sizes[position] - shared), position))
+        scored.sort()
+        return [position for _, _, position in scored[:TOP]]
+
+
+def best_of(func, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main(sizes):
+    wanted = skill_set(FARMER_SKILLS)
+    print(f"{'listings':>9} {'set scan':>10} {'bitsets':>10} {'SkillIndex':>11} {'index KB':>9}")
+    for count in sizes:
+        listings = build_listings(count)
+        bitsets = BitsetRanker(listings)
+        index = SkillIndex(listings)
+
+        sets_time, expected = best_of(lambda: rank_sets(listings, wanted))
+        bits_time, from_bits = best_of(lambda: bitsets.rank(wanted))
+        index_time, (positions, _) = best_of(lambda: index.rank(wanted))
+        assert from_bits == expected and list(positions[:TOP]) == expected
+
+        index_kb = (sum(postings.nbytes for postings in index.postings) + index.sizes.nbytes) / 1024
+        print(f"{count:>9} {sets_time * 1000:>8.1f}ms {bits_time * 1000:>8.1f}ms {index_time * 1000:>9.2f}ms "
+              f"{index_kb:>9.0f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
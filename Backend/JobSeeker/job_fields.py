@@ -0,0 +1,152 @@
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Rupee multipliers of the amount units NCS listings use
+AMOUNT_UNITS = {
+    'crore': 1e7, 'crores': 1e7, 'cr': 1e7,
+    'lakh': 1e5, 'lakhs': 1e5, 'lac': 1e5, 'lacs': 1e5, 'lpa': 1e5, 'l': 1e5,
+    'thousand': 1e3, 'k': 1e3,
+}
+AMOUNT = re.compile(
+    r"(\d[\d,]*(?:\.\d+)?)\s*(crores?|cr|lakhs?|lacs?|lpa|l|thousand|k)?\b",
+    re.IGNORECASE
+)
+
+# Months per period, to bring every salary to rupees per month
+PERIODS = [
+    (re.compile(r"\b(per\s+annum|annum|annual(?:ly)?|per\s+year|yearly|year|p\.?\s?a\.?|lpa|ctc)\b", re.I), 1 / 12),
+    (re.compile(r"\b(per\s+month|month(?:ly)?|p\.?\s?m\.?)\b", re.I), 1.0),
+    (re.compile(r"\b(per\s+week|week(?:ly)?)\b", re.I), 52 / 12),
+    (re.compile(r"\b(per\s+day|daily|day|per\s+diem)\b", re.I), 26.0),
+    (re.compile(r"\b(per\s+hour|hourly|hour|hr)\b", re.I), 8 * 26.0),
+]
+
+CURRENCY = re.compile(r"₹|\b(rs\.?|inr|rupees?)(?=[\s\d.]|$)", re.IGNORECASE)
+
+# Experience next to a salary ('2 years', '1-3 yrs', '5+ years'); its number
+# is not an amount and its 'years' is not a pay period
+EXPERIENCE = re.compile(
+    r"\b\d{1,2}(?:\.\d+)?(?:\s*(?:-|to)\s*\d{1,2}(?:\.\d+)?)?\s*\+?\s*(?:years?|yrs?)\b(?:\s+(?:of\s+)?exp\w*)?",
+    re.IGNORECASE
+)
+
+# Bare amounts below this, with no currency, unit or period, are not rupees ('1-2 years')
+MIN_BARE_SALARY = 1000
+
+SKILL_SEPARATORS = re.compile(r"[,;/|\n•]+|\s+and\s+|\s*&\s*", re.IGNORECASE)
+SKILL_NOISE = re.compile(r"[^a-z0-9+#. ]+")
+
+# Spellings of the same skill seen across listings
+SKILL_ALIASES = {
+    'ms excel': 'excel', 'microsoft excel': 'excel', 'advanced excel': 'excel',
+    'ms word': 'word', 'microsoft word': 'word',
+    'microsoft office': 'ms office',
+    'basic computer': 'computer basics', 'basic computers': 'computer basics',
+    'computer knowledge': 'computer basics', 'basic computer knowledge': 'computer basics',
+    'driving licence': 'driving', 'driving license': 'driving', 'vehicle driving': 'driving',
+    'tally erp': 'tally', 'tally erp 9': 'tally', 'tally erp9': 'tally',
+    'book keeping': 'bookkeeping',
+    'communication skills': 'communication', 'good communication': 'communication',
+    'animal husbandary': 'animal husbandry',
+    'crop production': 'crop management',
+}
+
+
+def parse_salary(text: str) -> Tuple[Optional[float], Optional[float]]:
+    """
+    (min, max) rupees per month of a salary range, (None, None) without amounts
+    Handles lakh/crore/thousand units ('2 - 3 Lakh' applies the unit to both
+    ends) and per annum/month/week/day/hour periods; without a period,
+    amounts from one lakh up are taken as yearly and smaller ones as monthly.
+    All-zero ranges and small bare numbers are not salaries, and experience
+    such as '2 years' is ignored ('Experience 2 years, 15,000 per month')
+    """
+    text = EXPERIENCE.sub(' ', text or '')
+    has_currency = bool(CURRENCY.search(text))
+    text = text.replace('₹', ' ')
+    amounts = [(float(number.replace(',', '')), (unit or '').lower()) for number, unit in AMOUNT.findall(text)]
+    if not amounts or not any(number for number, _ in amounts):
+        return None, None
+
+    # A unit written once after a range applies to every bare amount before it
+    trailing_unit = ''
+    values = []
+    for number, unit in reversed(amounts):
+        trailing_unit = unit or trailing_unit
+        values.append(number * AMOUNT_UNITS.get(trailing_unit, 1.0))
+
+    months = None
+    for pattern, factor in PERIODS:
+        if pattern.search(text):
+            months = factor
+            break
+    if months is None:
+        if not has_currency and not any(unit for _, unit in amounts) and max(values) < MIN_BARE_SALARY:
+            return None, None
+        months = 1 / 12 if max(values) >= 1e5 else 1.0
+
+    return round(min(values) * months), round(max(values) * months)
+
+
+def canonical_skill(skill: str) -> str:
+    skill = ' '.join(SKILL_NOISE.sub(' ', skill.lower()).split()).strip(' .')
+    return SKILL_ALIASES.get(skill, skill)
+
+
+def skill_set(text: str) -> List[str]:
+    """Sorted canonical skills of a SkillRequired string such as 'MS Excel, Tally & Book Keeping'"""
+    skills = {canonical_skill(part) for part in SKILL_SEPARATORS.split(text or '')}
+    skills.discard('')
+    return sorted(skills)
+
+
+def normalize_job(job: Dict) -> Dict:
+    """Add SalaryMin/SalaryMax (rupees per month) and Skills to a scraped listing"""
+    job['SalaryMin'], job['SalaryMax'] = parse_salary(job.get('SalaryRange', ''))
+    job['Skills'] = skill_set(job.get('SkillRequired', ''))
+    return job
+
+
+class SkillIndex:
+    """
+    Inverted index from canonical skill to the listings requiring it
+    Skills are interned to ids and each posting list is an int32 array, so
+    the overlap of a skill set with every listing is one bincount
+    """
+
+    def __init__(self, skill_sets: Sequence[Iterable[str]]):
+        self.size = len(skill_sets)
+        self.ids: Dict[str, int] = {}
+        postings: List[List[int]] = []
+        sizes = np.zeros(self.size, dtype=np.int32)
+        for position, skills in enumerate(skill_sets):
+            for skill in skills:
+                skill_id = self.ids.setdefault(skill, len(postings))
+                if skill_id == len(postings):
+                    postings.append([])
+                postings[skill_id].append(position)
+                sizes[position] += 1
+        self.postings = [np.array(positions, dtype=np.int32) for positions in postings]
+        self.sizes = sizes
+
+    def overlap(self, skills: Iterable[str]) -> np.ndarray:
+        """Number of the given skills each listing requires"""
+        lists = [self.postings[self.ids[skill]] for skill in set(skills) if skill in self.ids]
+        if not lists:
+            return np.zeros(self.size, dtype=np.int32)
+        return np.bincount(np.concatenate(lists), minlength=self.size).astype(np.int32)
+
+    def rank(self, skills: Iterable[str], mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Listings sharing at least one skill, most shared skills first, then by
+        Jaccard similarity, then by position; returns (positions, overlaps)
+        """
+        wanted = set(skills)
+        overlap = self.overlap(wanted)
+        candidates = np.flatnonzero(overlap if mask is None else overlap * mask)
+        shared = overlap[candidates]
+        jaccard = shared / (len(wanted) + self.sizes[candidates] - shared)
+        order = np.lexsort((candidates, -jaccard, -shared))
+        return candidates[order], shared[order]
@@ -0,0 +1,501 @@
+import bisect
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from job_fields import SkillIndex, parse_salary, skill_set
+
+Query = Tuple[str, str]  # (location, experience)
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS jobs ("
+    "id INTEGER PRIMARY KEY, fingerprint TEXT NOT NULL UNIQUE, "
+    "title TEXT NOT NULL, organization TEXT NOT NULL, location TEXT NOT NULL, "
+    "salary_range TEXT NOT NULL, skills TEXT NOT NULL, skill_set TEXT, salary_min REAL, salary_max REAL, "
+    "first_seen REAL NOT NULL, last_seen REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS jobs_last_seen ON jobs (last_seen)",
+    "CREATE INDEX IF NOT EXISTS jobs_salary ON jobs (salary_min, salary_max)",
+    # The searches a listing was harvested from; NCS only exposes experience as a search field
+    "CREATE TABLE IF NOT EXISTS job_queries ("
+    "job_id INTEGER NOT NULL REFERENCES jobs (id) ON DELETE CASCADE, "
+    "query_location TEXT NOT NULL, experience TEXT NOT NULL, last_seen REAL NOT NULL, "
+    "PRIMARY KEY (job_id, query_location, experience))",
+    "CREATE INDEX IF NOT EXISTS job_queries_search ON job_queries (query_location, experience)",
+    # Bumped by every write that changes what a search returns, so each worker
+    # knows when to rebuild its search view
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0)",
+]
+
+# Columns added to the jobs table after its first release, for older index files
+MIGRATIONS = {
+    # JSON list of canonical skills; NULL in rows written before it existed
+    'skill_set': "ALTER TABLE jobs ADD COLUMN skill_set TEXT",
+}
+
+SEARCH_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Facet values returned per facet
+MAX_FACET_VALUES = 20
+
+
+def job_fingerprint(job: Dict) -> str:
+    """Identity of a listing across harvests: its fields, case and spacing ignored"""
+    parts = [' '.join(str(job.get(field, '')).lower().split())
+             for field in ('JobTitle', 'Organization', 'Location', 'SalaryRange', 'SkillRequired')]
+    return hashlib.sha1('\x1f'.join(parts).encode()).hexdigest()
+
+
+def tokens(text: str) -> List[str]:
+    return SEARCH_TOKEN.findall((text or '').lower())
+
+
+class SearchView:
+    """
+    Read-only snapshot of the index for queries, held in memory
+    Each word maps to the positions of the listings containing it, and every
+    facet (listing location, searched location, experience) to a boolean mask,
+    so a query is a few numpy mask operations over all listings. Canonical
+    skills go into a SkillIndex for ranking by skill overlap
+    """
+
+    def __init__(self, rows: List[Tuple], queries: List[Tuple[int, str, str]], generation: int):
+        self.generation = generation
+        # Most recently seen first, so matches come out in recency order
+        rows = sorted(rows, key=lambda row: row[-1], reverse=True)
+        skill_sets: Dict[str, List[str]] = {}
+
+        def skills_of(text: str, stored: Optional[str]) -> List[str]:
+            # Listings often repeat the same skills; decode or canonicalize each text once
+            if text not in skill_sets:
+                skill_sets[text] = json.loads(stored) if stored is not None else skill_set(text)
+            return skill_sets[text]
+
+        self.jobs = [{
+            'JobTitle': title,
+            'Organization': organization,
+            'Location': location,
+            'SalaryRange': salary_range,
+            'SkillRequired': skills,
+            'SalaryMin': salary_min,
+            'SalaryMax': salary_max,
+            'Skills': skills_of(skills, stored_skills),
+            'FirstSeen': first_seen,
+            'LastSeen': last_seen
+        } for (_, title, organization, location, salary_range, skills, stored_skills,
+               salary_min, salary_max, first_seen, last_seen) in rows]
+        size = len(rows)
+        self.skills = SkillIndex([job['Skills'] for job in self.jobs])
+        position_of = {row[0]: position for position, row in enumerate(rows)}
+
+        postings: Dict[str, List[int]] = {}
+        title_postings: Dict[str, List[int]] = {}
+        for position, job in enumerate(self.jobs):
+            for word in set(tokens(job['JobTitle'])):
+                title_postings.setdefault(word, []).append(position)
+            text = ' '.join((job['JobTitle'], job['Organization'], job['Location'], job['SkillRequired']))
+            for word in set(tokens(text)):
+                postings.setdefault(word, []).append(position)
+        self.vocabulary = sorted(postings)
+        self.postings = {word: np.array(positions, dtype=np.int32) for word, positions in postings.items()}
+        self.title_postings = {word: np.array(positions, dtype=np.int32)
+                               for word, positions in title_postings.items()}
+
+        self.location_codes, self.locations = self._codes([job['Location'] for job in self.jobs])
+        self.searched_locations: Dict[str, np.ndarray] = {}
+        self.experiences: Dict[str, np.ndarray] = {}
+        for job_id, query_location, experience in queries:
+            position = position_of.get(job_id)
+            if position is None:
+                continue
+            for masks, key in ((self.searched_locations, query_location), (self.experiences, experience)):
+                if key not in masks:
+                    masks[key] = np.zeros(size, dtype=bool)
+                masks[key][position] = True
+
+        self.salary_min = np.array([np.nan if job['SalaryMin'] is None else job['SalaryMin'] for job in self.jobs],
+                                   dtype=float)
+        self.salary_max = np.array([np.nan if job['SalaryMax'] is None else job['SalaryMax'] for job in self.jobs],
+                                   dtype=float)
+
+    @staticmethod
+    def _codes(values: List[str]) -> Tuple[np.ndarray, List[str]]:
+        names = sorted(set(values))
+        code_of = {name: code for code, name in enumerate(names)}
+        return np.array([code_of[value] for value in values], dtype=np.int32), names
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def prefixed_words(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        return self.vocabulary[start:bisect.bisect_left(self.vocabulary, prefix + '\U0010ffff', start)]
+
+    def word_positions(self, word: str) -> np.ndarray:
+        """Listings containing a word that starts with `word`"""
+        matches = [self.postings[vocabulary_word] for vocabulary_word in self.prefixed_words(word)]
+        if not matches:
+            return np.empty(0, dtype=np.int32)
+        return matches[0] if len(matches) == 1 else np.unique(np.concatenate(matches))
+
+    def search(self, keywords: Optional[str] = None, location: Optional[str] = None, experience=None,
+               salary_min: Optional[float] = None, salary_max: Optional[float] = None,
+               skills: Optional[List[str]] = None, limit: int = 20, offset: int = 0) -> Dict:
+        size = len(self.jobs)
+        mask = np.ones(size, dtype=bool)
+        words = tokens(keywords)
+        for word in words:
+            word_mask = np.zeros(size, dtype=bool)
+            word_mask[self.word_positions(word)] = True
+            mask &= word_mask
+
+        if location:
+            wanted = location.strip().lower()
+            location_mask = np.isin(self.location_codes, [code for code, name in enumerate(self.locations)
+                                                          if wanted in name.lower()])
+            for searched, searched_mask in self.searched_locations.items():
+                if searched.startswith(wanted):
+                    location_mask |= searched_mask
+            mask &= location_mask
+        if experience not in (None, ''):
+            experience_mask = self.experiences.get(str(experience).strip())
+            mask &= experience_mask if experience_mask is not None else False
+        # Overlap with the requested range; NaN compares False, so listings without a salary drop out
+        if salary_min is not None:
+            mask &= self.salary_max >= salary_min
+        if salary_max is not None:
+            mask &= self.salary_min <= salary_max
+
+        overlaps = None
+        if skills:
+            # Only listings sharing a skill, ranked by how many they share
+            matched, overlaps = self.skills.rank(skills, mask)
+            mask = np.zeros(size, dtype=bool)
+            mask[matched] = True
+        else:
+            matched = np.flatnonzero(mask)
+        if words and not skills:
+            # Listings with the words in their title first, most recent first within a score
+            score = np.zeros(size, dtype=np.int32)
+            for word in words:
+                for vocabulary_word in self.prefixed_words(word):
+                    title_positions = self.title_postings.get(vocabulary_word)
+                    if title_positions is not None:
+                        score[title_positions] += 1
+            matched = matched[np.argsort(-score[matched], kind='stable')]
+        page = matched[offset:offset + limit]
+        jobs = [self.jobs[position] for position in page]
+        if overlaps is not None:
+            jobs = [dict(job, SkillOverlap=int(overlap)) for job, overlap in zip(jobs, overlaps[offset:offset + limit])]
+
+        location_counts = np.bincount(self.location_codes[matched], minlength=len(self.locations))
+        top_locations = np.argsort(-location_counts, kind='stable')[:MAX_FACET_VALUES]
+        experience_counts = {value: int(np.count_nonzero(value_mask & mask))
+                             for value, value_mask in self.experiences.items()}
+        return {
+            'total': int(len(matched)),
+            'jobs': jobs,
+            'facets': {
+                'location': {self.locations[code]: int(location_counts[code])
+                             for code in top_locations if location_counts[code]},
+                'experience': {value: count for value, count in
+                               sorted(experience_counts.items(), key=lambda item: -item[1]) if count}
+            }
+        }
+
+
+class JobIndex:
+    """
+    Harvested NCS listings in a SQLite file shared by every worker
+    Listings are deduplicated by fingerprint; a complete harvest of a search
+    drops the listings that search no longer returns. Queries run on an
+    in-memory SearchView that is rebuilt when the file has changed
+    """
+
+    def __init__(self, path: str, timeout: float = 30):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._view: Optional[SearchView] = None
+        self._view_lock = threading.Lock()
+
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        for statement in SCHEMA:
+            connection.execute(statement)
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(jobs)")}
+        for column, statement in MIGRATIONS.items():
+            if column not in columns:
+                connection.execute(statement)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA foreign_keys=ON")
+            self._local.connection = connection
+        return connection
+
+    def record_harvest(self, location: str, experience, jobs: List[Dict], complete: bool = True,
+                       harvested_at: Optional[float] = None) -> Dict:
+        """
+        Upsert the jobs a search returned; with `complete` (every results page
+        was read) listings the search returned before but not now are dropped
+        Jobs normalized by normalize_job keep their parsed salary and skills;
+        raw listings are parsed here. A live upsert that only sees known listings again refreshes their
+        `last_seen` without invalidating the search views, so repeated /request
+        calls do not rebuild them; the next complete harvest or a new listing does
+        """
+        harvested_at = time.time() if harvested_at is None else harvested_at
+        query_location, experience = location.strip().lower(), str(experience).strip()
+        added = updated = expired = linked = 0
+
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            for job in jobs:
+                fingerprint = job_fingerprint(job)
+                row = connection.execute("SELECT id FROM jobs WHERE fingerprint = ?", (fingerprint,)).fetchone()
+                if row is None:
+                    if 'SalaryMin' in job and 'SalaryMax' in job:
+                        salary_min, salary_max = job['SalaryMin'], job['SalaryMax']
+                    else:
+                        salary_min, salary_max = parse_salary(job.get('SalaryRange', ''))
+                    skills = job['Skills'] if 'Skills' in job else skill_set(job.get('SkillRequired', ''))
+                    job_id = connection.execute(
+                        "INSERT INTO jobs (fingerprint, title, organization, location, salary_range, skills, "
+                        "skill_set, salary_min, salary_max, first_seen, last_seen) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (fingerprint, job.get('JobTitle', ''), job.get('Organization', ''), job.get('Location', ''),
+                         job.get('SalaryRange', ''), job.get('SkillRequired', ''), json.dumps(skills),
+                         salary_min, salary_max, harvested_at, harvested_at)
+                    ).lastrowid
+                    added += 1
+                else:
+                    job_id = row[0]
+                    connection.execute("UPDATE jobs SET last_seen = ? WHERE id = ?", (harvested_at, job_id))
+                    updated += 1
+                if connection.execute(
+                    "INSERT OR IGNORE INTO job_queries (job_id, query_location, experience, last_seen) "
+                    "VALUES (?, ?, ?, ?)", (job_id, query_location, experience, harvested_at)
+                ).rowcount > 0:
+                    linked += 1
+                else:
+                    connection.execute(
+                        "UPDATE job_queries SET last_seen = ? WHERE job_id = ? AND query_location = ? "
+                        "AND experience = ?", (harvested_at, job_id, query_location, experience)
+                    )
+
+            if complete:
+                connection.execute(
+                    "DELETE FROM job_queries WHERE query_location = ? AND experience = ? AND last_seen < ?",
+                    (query_location, experience, harvested_at)
+                )
+                expired = connection.execute(
+                    "DELETE FROM jobs WHERE NOT EXISTS (SELECT 1 FROM job_queries WHERE job_id = jobs.id)"
+                ).rowcount
+            if complete or added or linked:
+                connection.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation'")
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return {'added': added, 'updated': updated, 'expired': max(expired, 0)}
+
+    def expire(self, max_age: float) -> int:
+        """Drop listings no harvest has seen for `max_age` seconds"""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            expired = connection.execute("DELETE FROM jobs WHERE last_seen < ?", (time.time() - max_age,)).rowcount
+            if expired > 0:
+                connection.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation'")
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return max(expired, 0)
+
+    def generation(self) -> int:
+        return self._connection().execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]
+
+    def view(self) -> SearchView:
+        """The search view of the current index, rebuilt after any worker wrote to it"""
+        generation = self.generation()
+        view = self._view
+        if view is not None and view.generation == generation:
+            return view
+        with self._view_lock:
+            if self._view is None or self._view.generation != generation:
+                started = time.perf_counter()
+                connection = self._connection()
+                rows = connection.execute(
+                    "SELECT id, title, organization, location, salary_range, skills, skill_set, salary_min, "
+                    "salary_max, first_seen, last_seen FROM jobs").fetchall()
+                queries = connection.execute("SELECT job_id, query_location, experience FROM job_queries").fetchall()
+                self._view = SearchView(rows, queries, generation)
+                print(f"Built job search view of {len(rows)} jobs in {time.perf_counter() - started:.2f}s")
+            return self._view
+
+    def search(self, keywords: Optional[str] = None, location: Optional[str] = None, experience=None,
+               salary_min: Optional[float] = None, salary_max: Optional[float] = None,
+               skills: Optional[str] = None, limit: int = 20, offset: int = 0) -> Dict:
+        """
+        Listings matching every given filter, title matches first, then most
+        recently seen, with location and experience facet counts over all matches
+        Keywords match as word prefixes anywhere in the title, organization,
+        location or skills; location matches the listing's location or the
+        searched location; a salary filter (rupees per month) keeps listings
+        whose range overlaps it. With `skills` (e.g. 'Irrigation, Tractor
+        Driving') only listings sharing a skill are returned, most shared first
+        """
+        started = time.perf_counter()
+        result = self.view().search(keywords, location, experience, salary_min, salary_max,
+                                    skill_set(skills) if skills else None, limit, offset)
+        result['took_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        return result
+
+    def stats(self) -> Dict:
+        connection = self._connection()
+        jobs, oldest, newest = connection.execute(
+            "SELECT COUNT(*), MIN(last_seen), MAX(last_seen) FROM jobs").fetchone()
+        searches = connection.execute(
+            "SELECT COUNT(*) FROM (SELECT DISTINCT query_location, experience FROM job_queries)").fetchone()[0]
+        return {'jobs': jobs, 'searches': searches, 'oldest_seen': oldest, 'newest_seen': newest}
+
+
+def load_harvest_watchlist(path: Optional[str]) -> List[Query]:
+    """
+    Watchlist JSON: a list of {"location", "experience"} objects, or of
+    {"location", "experiences": [...]} to cover several experience values
+    """
+    if not path:
+        return []
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+
+    queries = []
+    for entry in entries:
+        for experience in entry.get('experiences') or [entry['experience']]:
+            queries.append((entry['location'], str(experience)))
+    return queries
+
+
+class JobHarvester:
+    """
+    Background harvester that keeps the job index current
+    Each cycle runs the watchlist plus the most requested searches one after
+    another, at most one search per `min_request_interval` seconds, then
+    expires listings not seen for `max_age` seconds. `harvest` returns
+    (jobs, complete), complete when every results page was read
+    """
+
+    def __init__(self, index: JobIndex, harvest: Callable[[str, str], Tuple[List[Dict], bool]],
+                 watchlist: Optional[List[Query]] = None, top_n: int = 20, interval: float = 3600,
+                 min_request_interval: float = 5.0, max_age: float = 7 * 24 * 3600):
+        self.index = index
+        self.harvest = harvest
+        self.watchlist = list(watchlist or [])
+        self.top_n = top_n
+        self.interval = interval
+        self.min_request_interval = min_request_interval
+        self.max_age = max_age
+
+        self._requested: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        # Counters for /harvest-stats
+        self.cycles = 0
+        self.harvested = 0
+        self.failed = 0
+        self.last_cycle: Dict = {}
+
+    def record_request(self, location: str, experience):
+        with self._lock:
+            self._requested[(location.strip(), str(experience).strip())] += 1
+
+    def queries(self) -> List[Query]:
+        queries = list(dict.fromkeys(self.watchlist))
+        with self._lock:
+            requested = [query for query, _ in self._requested.most_common(self.top_n)] if self.top_n > 0 else []
+        for query in requested:
+            if query not in queries:
+                queries.append(query)
+        return queries
+
+    def harvest_once(self) -> Dict:
+        """Run one harvest cycle and return its summary"""
+        started = time.monotonic()
+        totals = Counter()
+        for position, (location, experience) in enumerate(self.queries()):
+            if self._stop.is_set():
+                break
+            if position:
+                self._stop.wait(self.min_request_interval)
+            try:
+                jobs, complete = self.harvest(location, experience)
+                totals.update(self.index.record_harvest(location, experience, jobs, complete))
+                totals['searches'] += 1
+            except Exception as e:
+                print(f"Harvest of {location}/{experience} failed: {e}")
+                totals['failed'] += 1
+
+        totals['expired'] += self.index.expire(self.max_age)
+        summary = {
+            'searches': totals['searches'],
+            'failed': totals['failed'],
+            'added': totals['added'],
+            'updated': totals['updated'],
+            'expired': totals['expired'],
+            'seconds': round(time.monotonic() - started, 2),
+            'finished_at': time.time()
+        }
+        with self._lock:
+            self.cycles += 1
+            self.harvested += totals['searches']
+            self.failed += totals['failed']
+            self.last_cycle = summary
+        print(f"Harvest cycle: {summary['searches']} searches, {summary['added']} new jobs, "
+              f"{summary['expired']} expired in {summary['seconds']:.1f}s")
+        return summary
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.harvest_once()
+            except Exception as e:
+                print(f"Harvest cycle failed: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> Dict:
+        queries = len(self.queries())
+        with self._lock:
+            return {
+                'running': self._thread is not None and self._thread.is_alive(),
+                'interval_seconds': self.interval,
+                'queries': queries,
+                'cycles': self.cycles,
+                'harvested': self.harvested,
+                'failed': self.failed,
+                'last_cycle': self.last_cycle,
+                'index': self.index.stats()
+            }
@@ -0,0 +1,360 @@
+import json
+import re
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urljoin
+
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from job_fields import normalize_job
+
+NCS_URL = "https://www.ncs.gov.in/pages/default.aspx"
+
+# Web method behind the location box's autocomplete list
+LOCATION_SERVICE_URL = "https://www.ncs.gov.in/_layouts/15/NCSP/Services/NCSPService.asmx/GetLocations"
+
+# Controls of the job search web part
+SEARCH_PART = "ctl00$SPWebPartManager1$g_de4e63a9_db8a_4b11_b989_4b13991e94ee$ctl00$"
+LOCATION_FIELD = SEARCH_PART + "ucSALocations$txtLocation"
+EXPERIENCE_FIELD = SEARCH_PART + "ddlJSExperience"
+JOB_NATURE_FIELD = SEARCH_PART + "rdbJobNature"
+SEARCH_BUTTON = SEARCH_PART + "btnSearch"
+
+# Spans of the search results repeater, one set per listing: <prefix><row>_<field>
+RESULTS_PREFIX = "ctl00_SPWebPartManager1_g_30b9fe7b_bf4d_46f4_a746_0091ffc9e482_ctl00_rptSearchJobs_ctl"
+RESULT_SPAN = re.compile(re.escape(RESULTS_PREFIX) + r"(\d+)_(\w+)$")
+RESULT_FIELDS = {
+    "lblJobTitle": "JobTitle",
+    "lblOrganization": "Organization",
+    "lblStateName": "Location",
+    "Label1": "SalaryRange",
+    "lblKeywords": "SkillRequired",
+}
+
+# Pager links post back through javascript:__doPostBack('target','argument')
+POSTBACK_LINK = re.compile(r"__doPostBack\('([^']*)','([^']*)'\)")
+NEXT_LINK_TEXTS = ('next', 'next >', '>', '>>', '\u203a', '\u00bb')
+
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/119.0 Safari/537.36")
+
+
+class NcsSearchError(Exception):
+    """Raised when the NCS search form or its services do not answer as expected"""
+
+
+class NcsSearchForm:
+    """Field state of the NCS search page, ready to be posted back"""
+
+    def __init__(self, html: Union[str, BeautifulSoup], base_url: str):
+        soup = html if isinstance(html, BeautifulSoup) else BeautifulSoup(html, 'html.parser')
+        form = soup.find('form')
+        if form is None:
+            raise NcsSearchError("No form found on NCS page")
+
+        self.action = urljoin(base_url, form.get('action') or base_url)
+        self.fields: Dict[str, str] = {}
+        self.submits: Dict[str, str] = {}
+        self.options: Dict[str, List[Tuple[str, str]]] = {}
+        self.radios: Dict[str, List[str]] = {}
+
+        for field in form.find_all('input'):
+            name = field.get('name')
+            if not name:
+                continue
+            field_type = (field.get('type') or 'text').lower()
+            if field_type in ('submit', 'button', 'image'):
+                self.submits[name] = field.get('value', '')
+            elif field_type == 'radio':
+                self.radios.setdefault(name, []).append(field.get('value', 'on'))
+                if field.has_attr('checked'):
+                    self.fields[name] = field.get('value', 'on')
+            elif field_type == 'checkbox':
+                if field.has_attr('checked'):
+                    self.fields[name] = field.get('value', 'on')
+            else:
+                self.fields[name] = field.get('value', '')
+
+        for select in form.find_all('select'):
+            name = select.get('name')
+            if not name:
+                continue
+            options = [
+                (option.get('value', option.get_text(strip=True)), option.get_text(strip=True))
+                for option in select.find_all('option')
+            ]
+            self.options[name] = options
+            selected = select.find('option', selected=True)
+            if selected is not None:
+                self.fields[name] = selected.get('value', selected.get_text(strip=True))
+            elif options:
+                self.fields[name] = options[0][0]
+
+        if '__VIEWSTATE' not in self.fields:
+            raise NcsSearchError("Search form has no __VIEWSTATE field")
+
+    def select_text(self, name: str, text: str):
+        """Select a dropdown option by its visible text, like Select.select_by_visible_text"""
+        options = self.options.get(name, [])
+        for value, option_text in options:
+            if option_text == text:
+                self.fields[name] = value
+                return
+        for value, option_text in options:
+            if option_text.lower() == text.strip().lower():
+                self.fields[name] = value
+                return
+        raise NcsSearchError(f"'{text}' is not an option of {name}")
+
+    def check_radio(self, name: str, index: int):
+        """Check the index-th radio button of a group"""
+        values = self.radios.get(name, [])
+        if index >= len(values):
+            raise NcsSearchError(f"Search form has no radio button {index} in {name}")
+        self.fields[name] = values[index]
+
+    def payload(self, submit: Optional[str] = None) -> Dict[str, str]:
+        """Form data for a postback triggered by the given submit button, or by __EVENTTARGET"""
+        data = dict(self.fields)
+        if submit is not None:
+            if submit not in self.submits:
+                raise NcsSearchError(f"Search form has no {submit} button")
+            data[submit] = self.submits[submit]
+        return data
+
+
+def suggestion_texts(payload) -> List[str]:
+    """
+    Location names from a web method answer: {"d": [...]} with plain strings or
+    the {"First": text, "Second": value} pairs of AutoCompleteExtender items
+    """
+    items = payload.get('d', []) if isinstance(payload, dict) else payload
+    texts = []
+    for item in items or []:
+        if isinstance(item, str) and item.startswith('{'):
+            try:
+                item = json.loads(item)
+            except ValueError:
+                pass
+        if isinstance(item, dict):
+            item = item.get('First') or item.get('label') or item.get('value') or ''
+        text = str(item).strip()
+        if text:
+            texts.append(text)
+    return texts
+
+
+def choose_location(suggestions: List[str], location: str) -> Optional[str]:
+    """
+    The suggestion to search with: an exact match (ignoring a ", State" suffix),
+    else one starting with the requested location, else the first, which is
+    what the Selenium flow clicks
+    """
+    if not suggestions:
+        return None
+    wanted = location.strip().lower()
+    for suggestion in suggestions:
+        if suggestion.lower() == wanted or suggestion.split(',')[0].strip().lower() == wanted:
+            return suggestion
+    for suggestion in suggestions:
+        if suggestion.lower().startswith(wanted):
+            return suggestion
+    return suggestions[0]
+
+
+def parse_jobs(page: Union[str, BeautifulSoup]) -> List[Dict]:
+    """
+    Every listing of a search results page, with normalized salary and skills
+    The repeater's spans are collected in one walk of the document and grouped
+    by row; rows without a title or organization are skipped
+    """
+    if isinstance(page, BeautifulSoup):
+        spans = page.find_all('span', id=RESULT_SPAN)
+    else:
+        spans = BeautifulSoup(page, 'html.parser', parse_only=SoupStrainer('span', id=RESULT_SPAN)).find_all('span')
+
+    rows: Dict[str, Dict[str, str]] = {}
+    for span in spans:
+        row, field = RESULT_SPAN.match(span['id']).groups()
+        if field in RESULT_FIELDS:
+            rows.setdefault(row, {})[RESULT_FIELDS[field]] = span.get_text(strip=True)
+
+    return [
+        normalize_job({key: row.get(key, "") for key in RESULT_FIELDS.values()})
+        for row in rows.values()
+        if row.get("JobTitle") and row.get("Organization")
+    ]
+
+
+def next_page_postback(soup: BeautifulSoup, page_number: int) -> Optional[Tuple[str, str]]:
+    """(__EVENTTARGET, __EVENTARGUMENT) of the pager link after `page_number`, None on the last page"""
+    wanted = str(page_number + 1)
+    next_link = None
+    for link in soup.find_all('a', href=POSTBACK_LINK):
+        if 'aspNetDisabled' in (link.get('class') or []):
+            continue
+        text = link.get_text(strip=True).lower()
+        if text == wanted:
+            return POSTBACK_LINK.search(link['href']).groups()
+        if text in NEXT_LINK_TEXTS and next_link is None:
+            next_link = POSTBACK_LINK.search(link['href']).groups()
+    return next_link
+
+
+class LocationSuggestions:
+    """
+    Autocomplete answers per typed prefix, kept for `ttl` seconds
+    The list for a prefix rarely changes, so one lookup serves every search
+    for the locations starting with it
+    """
+
+    def __init__(self, ttl: float = 24 * 3600, max_entries: int = 2000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, List[str]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, prefix: str) -> Optional[List[str]]:
+        key = prefix.lower()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] < self.ttl:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, prefix: str, suggestions: List[str]):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                oldest = min(self._entries, key=lambda key: self._entries[key][0])
+                del self._entries[oldest]
+            self._entries[prefix.lower()] = (time.time(), suggestions)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'prefixes': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+class NcsHttpClient:
+    """
+    Browserless NCS job search: asks the location web method for suggestions
+    and posts the search form back, like the Selenium flow but without Chrome
+    Connections are pooled across requests through a shared HTTPAdapter while
+    every search gets its own cookie jar, so concurrent SharePoint sessions do not mix
+    """
+
+    def __init__(self, url: str = NCS_URL, location_url: str = LOCATION_SERVICE_URL,
+                 pool_size: int = 10, timeout: float = 20, retries: int = 2,
+                 locations: Optional[LocationSuggestions] = None, prefix_length: int = 3):
+        self.url = url
+        self.location_url = location_url
+        self.timeout = timeout
+        self.prefix_length = prefix_length
+        self.locations = locations or LocationSuggestions()
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=retries, backoff_factor=0.5,
+                              status_forcelist=(502, 503, 504), allowed_methods=frozenset(['GET']))
+        )
+
+    def new_session(self) -> requests.Session:
+        session = requests.Session()
+        session.mount('http://', self.adapter)
+        session.mount('https://', self.adapter)
+        session.headers['User-Agent'] = USER_AGENT
+        return session
+
+    def suggest_locations(self, session: requests.Session, location: str) -> List[str]:
+        """Autocomplete entries for the first letters of `location`, cached per prefix"""
+        prefix = location.strip()[:self.prefix_length]
+        suggestions = self.locations.get(prefix)
+        if suggestions is not None:
+            return suggestions
+
+        print(f"HTTP engine: looking up locations for '{prefix}'")
+        response = session.post(self.location_url, json={'prefixText': prefix, 'count': 20},
+                                timeout=self.timeout, headers={'Referer': self.url})
+        response.raise_for_status()
+        try:
+            suggestions = suggestion_texts(response.json())
+        except ValueError:
+            raise NcsSearchError("Location service did not answer with JSON")
+        if suggestions:
+            self.locations.put(prefix, suggestions)
+        return suggestions
+
+    def search(self, session: requests.Session, location: str, experience) -> Tuple[Dict[str, str], requests.Response]:
+        """Post the search form; returns the search criteria fields and the first results page"""
+        print("HTTP engine: loading search form")
+        response = session.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        form = NcsSearchForm(response.text, response.url)
+
+        chosen = choose_location(self.suggest_locations(session, location), location)
+        if chosen is None:
+            raise NcsSearchError(f"No location suggestions for '{location}'")
+
+        form.fields[LOCATION_FIELD] = chosen
+        form.select_text(EXPERIENCE_FIELD, str(experience))
+        form.check_radio(JOB_NATURE_FIELD, 1)
+        criteria = {name: form.fields[name] for name in (LOCATION_FIELD, EXPERIENCE_FIELD, JOB_NATURE_FIELD)}
+
+        print(f"HTTP engine: searching '{chosen}' with experience '{experience}'")
+        response = session.post(form.action, data=form.payload(SEARCH_BUTTON), timeout=self.timeout,
+                                headers={'Referer': self.url})
+        response.raise_for_status()
+        return criteria, response
+
+    def fetch_page(self, location: str, experience) -> Tuple[str, str]:
+        """Run the search postback and return (results URL, first results page HTML)"""
+        _, response = self.search(self.new_session(), location, experience)
+        return response.url, response.text
+
+    def iter_pages(self, location: str, experience, page: int = 1,
+                   max_pages: Optional[int] = None) -> Iterator[Tuple[int, str, List[Dict]]]:
+        """
+        Yield (page number, URL, jobs) from results page `page` onwards
+        Each following page is requested only once the previous one has been
+        consumed; the crawl stops after `max_pages` pages or on the last page
+        """
+        session = self.new_session()
+        criteria, response = self.search(session, location, experience)
+        number = 1
+        while True:
+            soup = BeautifulSoup(response.text, 'html.parser')
+            if number >= page:
+                yield number, response.url, parse_jobs(soup)
+                if max_pages is not None and number - page + 1 >= max_pages:
+                    return
+
+            postback = next_page_postback(soup, number)
+            if postback is None:
+                return
+            form = NcsSearchForm(soup, response.url)
+            form.fields.update(criteria)
+            form.fields['__EVENTTARGET'], form.fields['__EVENTARGUMENT'] = postback
+
+            number += 1
+            print(f"HTTP engine: loading results page {number}")
+            response = session.post(form.action, data=form.payload(), timeout=self.timeout,
+                                    headers={'Referer': response.url})
+            response.raise_for_status()
+
+    def fetch_jobs(self, location: str, experience) -> Tuple[str, List[Dict]]:
+        """Same (url, jobs) as the Selenium script(), without starting a browser"""
+        url, page = self.fetch_page(location, experience)
+        return url, parse_jobs(page)
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+os.environ['JOB_INDEX_PATH'] = ''
+import APIwebScraping
+from test_ncs_http import StubNcsServer, load_fixture
+
+
+class FailingHttpClient:
+    def iter_pages(self, *args):
+        raise ConnectionError("ncs.gov.in unreachable")
+        yield
+
+
+@pytest.fixture
+def selenium_searches(monkeypatch):
+    searches = []
+
+    def selenium_page(location, experience):
+        searches.append((location, experience))
+        return "https://www.ncs.gov.in/results", load_fixture("search_results.html")
+
+    monkeypatch.setattr(APIwebScraping, 'selenium_page', selenium_page)
+    monkeypatch.setattr(APIwebScraping, 'SCRAPER_ENGINE', 'auto')
+    return searches
+
+
+def test_harvest_after_selenium_fallback_is_not_complete(monkeypatch, selenium_searches):
+    monkeypatch.setattr(APIwebScraping, 'http_client', FailingHttpClient())
+
+    jobs, complete = APIwebScraping.harvest_jobs("Bangalore", 2)
+
+    assert selenium_searches == [("Bangalore", 2)]
+    assert len(jobs) == 3
+    assert not complete
+
+
+def test_harvest_is_complete_when_the_pager_runs_out(monkeypatch, selenium_searches):
+    with StubNcsServer() as stub:
+        monkeypatch.setattr(APIwebScraping, 'http_client', stub.client())
+        jobs, complete = APIwebScraping.harvest_jobs("Bangalore", 2)
+
+    assert selenium_searches == []
+    assert len(jobs) == 5
+    assert complete
+
+
+def test_harvest_stopped_by_the_page_limit_is_not_complete(monkeypatch, selenium_searches):
+    monkeypatch.setattr(APIwebScraping, 'MAX_JOB_PAGES', 1)
+    with StubNcsServer() as stub:
+        monkeypatch.setattr(APIwebScraping, 'http_client', stub.client())
+        jobs, complete = APIwebScraping.harvest_jobs("Bangalore", 2)
+
+    assert len(jobs) == 3
+    assert not complete
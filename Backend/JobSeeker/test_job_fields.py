@@ -0,0 +1,31 @@
+import pytest
+
+from job_fields import parse_salary
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2 - 3 Lakh Per Annum", (16667, 25000)),
+    ("15,000 - 20,000 Per Month", (15000, 20000)),
+    ("Rs. 18000 - 22000", (18000, 22000)),
+    ("₹ 500 per day", (13000, 13000)),
+    ("3.6 LPA", (30000, 30000)),
+    ("250000 - 300000", (20833, 25000)),
+    ("Experience 2 years, 15,000 per month", (15000, 15000)),
+    ("Rs. 2.5 Lakh per year, 1-3 yrs experience", (20833, 20833)),
+    ("50000 yearly", (4167, 4167)),
+])
+def test_parse_salary(text, expected):
+    assert parse_salary(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "Not Disclosed",
+    "0 - 0",
+    "0 - 0 Per Month",
+    "₹ 0",
+    "1-2 years",
+    "3 - 5",
+])
+def test_parse_salary_without_a_salary(text):
+    assert parse_salary(text) == (None, None)
@@ -0,0 +1,88 @@
+import sqlite3
+
+import job_index
+from job_fields import normalize_job
+from job_index import JobIndex
+
+
+def listing(title, skills='Tractor Driving'):
+    return {'JobTitle': title, 'Organization': 'Krishi Farms', 'Location': 'Mysore',
+            'SalaryRange': 'Rs. 15,000 per month', 'SkillRequired': skills}
+
+
+def test_live_upsert_of_known_listings_keeps_the_search_view(tmp_path):
+    index = JobIndex(str(tmp_path / "jobs.db"))
+    index.record_harvest("Mysore", 2, [listing("Tractor Driver"), listing("Farm Helper")],
+                         complete=False, harvested_at=100)
+    view = index.view()
+
+    summary = index.record_harvest("Mysore", 2, [listing("Farm Helper")], complete=False, harvested_at=200)
+
+    assert summary == {'added': 0, 'updated': 1, 'expired': 0}
+    assert index.view() is view
+    assert index.stats()['newest_seen'] == 200
+
+    # The same listing found by another search is new to that search's facets
+    index.record_harvest("Hassan", 2, [listing("Farm Helper")], complete=False, harvested_at=300)
+    rebuilt = index.view()
+    assert rebuilt is not view
+    assert rebuilt.search(location="hassan")['total'] == 1
+
+    index.record_harvest("Mysore", 2, [listing("Dairy Worker")], complete=False, harvested_at=400)
+    assert index.view() is not rebuilt
+    assert index.search(keywords="dairy")['total'] == 1
+
+
+def test_complete_harvest_rebuilds_the_search_view(tmp_path):
+    index = JobIndex(str(tmp_path / "jobs.db"))
+    index.record_harvest("Mysore", 2, [listing("Tractor Driver"), listing("Farm Helper")], harvested_at=100)
+    view = index.view()
+
+    summary = index.record_harvest("Mysore", 2, [listing("Farm Helper")], harvested_at=200)
+
+    assert summary == {'added': 0, 'updated': 1, 'expired': 1}
+    assert index.view() is not view
+    assert [job['JobTitle'] for job in index.search()['jobs']] == ["Farm Helper"]
+
+
+def test_normalized_salary_and_skills_are_stored_and_reused(tmp_path, monkeypatch):
+    index = JobIndex(str(tmp_path / "jobs.db"))
+    job = normalize_job(listing("Accountant", skills="MS Excel, Tally ERP 9 & Book Keeping"))
+    job['SalaryMin'], job['SalaryMax'] = 14000, 16000
+
+    def parse_again(*args):
+        raise AssertionError("normalized listing was parsed again")
+
+    monkeypatch.setattr(job_index, 'parse_salary', parse_again)
+    monkeypatch.setattr(job_index, 'skill_set', parse_again)
+    index.record_harvest("Mysore", 2, [job])
+
+    stored = index._connection().execute("SELECT skill_set, salary_min, salary_max FROM jobs").fetchone()
+    assert stored == ('["bookkeeping", "excel", "tally"]', 14000, 16000)
+    found = index.view().search(skills=["tally"])['jobs']
+    assert [(job['Skills'], job['SkillOverlap']) for job in found] == [(["bookkeeping", "excel", "tally"], 1)]
+
+
+def test_index_files_without_stored_skills_are_migrated(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE jobs (id INTEGER PRIMARY KEY, fingerprint TEXT NOT NULL UNIQUE, "
+        "title TEXT NOT NULL, organization TEXT NOT NULL, location TEXT NOT NULL, "
+        "salary_range TEXT NOT NULL, skills TEXT NOT NULL, salary_min REAL, salary_max REAL, "
+        "first_seen REAL NOT NULL, last_seen REAL NOT NULL)")
+    connection.execute("INSERT INTO jobs VALUES (1, 'old', 'Milker', 'Dairy Co', 'Hassan', '', "
+                       "'Animal Husbandary', NULL, NULL, 100, 100)")
+    connection.execute("CREATE TABLE job_queries (job_id INTEGER NOT NULL, query_location TEXT NOT NULL, "
+                       "experience TEXT NOT NULL, last_seen REAL NOT NULL, "
+                       "PRIMARY KEY (job_id, query_location, experience))")
+    connection.execute("INSERT INTO job_queries VALUES (1, 'hassan', '2', 100)")
+    connection.commit()
+    connection.close()
+
+    index = JobIndex(path)
+    index.record_harvest("Mysore", 2, [normalize_job(listing("Tractor Driver"))], complete=False)
+
+    found = index.search(skills="animal husbandry")['jobs']
+    assert [(job['JobTitle'], job['Skills']) for job in found] == [("Milker", ["animal husbandry"])]
+    assert index.search(skills="tractor driving")['total'] == 1
@@ -0,0 +1,215 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from bs4 import BeautifulSoup
+
+from ncs_http import (EXPERIENCE_FIELD, JOB_NATURE_FIELD, LOCATION_FIELD, SEARCH_BUTTON, LocationSuggestions,
+                      NcsHttpClient, NcsSearchError, NcsSearchForm, choose_location, next_page_postback, parse_jobs,
+                      suggestion_texts)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class StubNcsServer:
+    """Local stand-in for the NCS search page and its location web method"""
+
+    def __init__(self):
+        self.searches = []
+        self.location_lookups = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.respond(200, "search_form.html", "text/html")
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length).decode()
+
+                if self.path.startswith("/locations"):
+                    stub.location_lookups.append(json.loads(body))
+                    self.respond(200, "locations.json", "application/json")
+                    return
+
+                form = {key: values[0] for key, values in parse_qs(body).items()}
+                stub.searches.append(form)
+                if form.get("__VIEWSTATE") == "VS-INITIAL" and form.get(SEARCH_BUTTON) == "Search":
+                    self.respond(200, "search_results.html", "text/html")
+                elif form.get("__VIEWSTATE") == "VS-RESULTS" and form.get("__EVENTTARGET", "").endswith("$ctl01$lnkPage"):
+                    self.respond(200, "search_results_page2.html", "text/html")
+                else:
+                    self.respond(500, None, "text/html")
+
+            def respond(self, status, fixture, content_type):
+                body = load_fixture(fixture).encode() if fixture else b"Invalid postback"
+                self.send_response(status)
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        base = f"http://127.0.0.1:{self.server.server_port}"
+        self.url = f"{base}/pages/default.aspx"
+        self.location_url = f"{base}/locations/GetLocations"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def client(self, **kwargs):
+        return NcsHttpClient(url=self.url, location_url=self.location_url, **kwargs)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def test_parse_form_state():
+    form = NcsSearchForm(load_fixture("search_form.html"), "https://www.ncs.gov.in/pages/default.aspx")
+    assert form.fields["__VIEWSTATE"] == "VS-INITIAL"
+    assert form.fields["__REQUESTDIGEST"].startswith("0x4F2A")
+    assert form.fields[EXPERIENCE_FIELD] == "-1"
+    assert form.fields[JOB_NATURE_FIELD] == "P"
+    assert form.radios[JOB_NATURE_FIELD] == ["P", "F"]
+    assert form.action == "https://www.ncs.gov.in/pages/default.aspx"
+
+    form.select_text(EXPERIENCE_FIELD, "10+")
+    form.check_radio(JOB_NATURE_FIELD, 1)
+    payload = form.payload(SEARCH_BUTTON)
+    assert (payload[EXPERIENCE_FIELD], payload[JOB_NATURE_FIELD]) == ("10", "F")
+    assert not any(name.endswith("btnAdvanceSearch") for name in payload)
+
+
+def test_location_suggestions():
+    assert suggestion_texts({"d": ["Pune", '{"First":"Mysore, Karnataka","Second":"512"}', " "]}) == \
+        ["Pune", "Mysore, Karnataka"]
+
+    suggestions = ["Bangalore Rural, Karnataka", "Bangalore, Karnataka"]
+    assert choose_location(suggestions, "bangalore") == "Bangalore, Karnataka"
+    assert choose_location(suggestions, "Bangalore R") == "Bangalore Rural, Karnataka"
+    assert choose_location(suggestions, "Bengaluru") == "Bangalore Rural, Karnataka"
+    assert choose_location([], "Bangalore") is None
+
+
+def test_parse_jobs():
+    jobs = parse_jobs(load_fixture("search_results.html"))
+    assert [job["JobTitle"] for job in jobs] == ["Farm Supervisor", "Tractor Operator", "Dairy Assistant"]
+    assert jobs[1] == {
+        "JobTitle": "Tractor Operator",
+        "Organization": "Kisan Mechanisation Co-op",
+        "Location": "Karnataka",
+        "SalaryRange": "2 - 3 Lakh Per Annum",
+        "SkillRequired": "Tractor Driving, Equipment Maintenance",
+        "SalaryMin": 16667,
+        "SalaryMax": 25000,
+        "Skills": ["equipment maintenance", "tractor driving"]
+    }
+    assert (jobs[0]["SalaryMin"], jobs[0]["SalaryMax"]) == (15000, 20000)
+    assert jobs[2]["SalaryRange"] == ""
+    assert (jobs[2]["SalaryMin"], jobs[2]["SalaryMax"]) == (None, None)
+    assert parse_jobs(load_fixture("search_form.html")) == []
+    assert parse_jobs(BeautifulSoup(load_fixture("search_results.html"), "html.parser")) == jobs
+
+
+def test_next_page_postback():
+    first = BeautifulSoup(load_fixture("search_results.html"), "html.parser")
+    target, argument = next_page_postback(first, 1)
+    assert target.endswith("$rptPager$ctl01$lnkPage") and argument == ""
+
+    # The last page only links back and its Next link is disabled
+    last = BeautifulSoup(load_fixture("search_results_page2.html"), "html.parser")
+    assert next_page_postback(last, 2) is None
+
+
+def test_fetch_jobs_posts_search_form():
+    with StubNcsServer() as stub:
+        url, jobs = stub.client().fetch_jobs("Bangalore", 2)
+
+    assert url == stub.url
+    assert len(jobs) == 3
+
+    assert stub.location_lookups == [{"prefixText": "Ban", "count": 20}]
+    search, = stub.searches
+    assert search["__EVENTVALIDATION"] == "EV-INITIAL"
+    assert search[LOCATION_FIELD] == "Bangalore, Karnataka"
+    assert search[EXPERIENCE_FIELD] == "2"
+    assert search[JOB_NATURE_FIELD] == "F"
+
+
+def test_iter_pages_follows_the_pager():
+    with StubNcsServer() as stub:
+        pages = stub.client().iter_pages("Bangalore", 2)
+        number, url, jobs = next(pages)
+        # The next page is only requested once the first has been consumed
+        assert (number, len(jobs), len(stub.searches)) == (1, 3, 1)
+
+        rest = list(pages)
+
+    assert [(number, [job["JobTitle"] for job in jobs]) for number, _, jobs in rest] == \
+        [(2, ["Poultry Farm Worker", "Agriculture Field Officer"])]
+    pager_post = stub.searches[1]
+    assert pager_post["__VIEWSTATE"] == "VS-RESULTS"
+    assert SEARCH_BUTTON not in pager_post
+    assert (pager_post[LOCATION_FIELD], pager_post[EXPERIENCE_FIELD]) == ("Bangalore, Karnataka", "2")
+
+
+def test_iter_pages_start_page_and_page_limit():
+    with StubNcsServer() as stub:
+        client = stub.client()
+        assert [number for number, _, _ in client.iter_pages("Bangalore", 2, page=2)] == [2]
+        assert [number for number, _, _ in client.iter_pages("Bangalore", 2, max_pages=1)] == [1]
+
+    # page=2 needs the search and one pager postback, max_pages=1 only the search
+    assert len(stub.searches) == 3
+
+
+def test_location_list_is_reused_across_searches():
+    with StubNcsServer() as stub:
+        client = stub.client()
+        client.fetch_jobs("Bangalore", 1)
+        client.fetch_jobs("Bangalore Rural", 5)
+
+    assert len(stub.location_lookups) == 1
+    assert [search[LOCATION_FIELD] for search in stub.searches] == \
+        ["Bangalore, Karnataka", "Bangalore Rural, Karnataka"]
+    assert client.locations.stats()["hits"] == 1
+
+
+def test_expired_location_list_is_fetched_again():
+    with StubNcsServer() as stub:
+        client = stub.client(locations=LocationSuggestions(ttl=0))
+        client.fetch_jobs("Bangalore", 1)
+        client.fetch_jobs("Bangalore", 1)
+
+    assert len(stub.location_lookups) == 2
+
+
+def test_unknown_experience_raises():
+    with StubNcsServer() as stub:
+        try:
+            stub.client().fetch_jobs("Bangalore", 3)
+        except NcsSearchError as e:
+            assert "'3'" in str(e)
+        else:
+            raise AssertionError("Expected NcsSearchError")
+        assert stub.searches == []
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"{name}: ok")
@@ -1,21 +1,38 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import json
 import time
 import requests
-from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.support.ui import Select
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from datetime import datetime, timedelta
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 import time
 import hashlib
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraper_common.jobs import JobQueue, JobQueueFull, job_response, register_job_routes
+from scraper_common.waits import LatencyTracker, PostbackWatcher, StepTimer
+from scraper_common.metrics import ScraperMetrics
+from scraper_common.resource_blocking import (PageWeightMeter, blocked_url_patterns,
+                                              configure_chrome_options, enable_resource_blocking)
+from browser_pool import BrowserPool, session_broken
+from price_grid import build_price_response, parse_price_grid
+from agmarknet_http import AgmarknetHttpClient
+from state_grid import StateGrid
+from price_history import CorruptSeriesError, PriceHistoryStore
+from price_cache import MemoryBackend, PriceCache, cache_from_env
+from prewarm import PrewarmCrawler, RequestLog, load_watchlist
+from price_batch import MAX_BATCH_QUERIES, batch_queries, plan_scrapes
 
-def script(state, commodity, district):
-    initial_url = "https://agmarknet.gov.in/SearchCmmMkt.aspx"
-
+def create_chrome_driver():
+    """Start a headless Chrome session configured for agmarknet scraping"""
     from selenium.webdriver.chrome.options import Options
     chrome_options = Options()
     chrome_options.add_argument("--headless")
@@ -23,20 +40,130 @@ def script(state, commodity, district):
     chrome_options.add_argument("--disable-dev-shm-usage")
     chrome_options.add_argument("--disable-gpu")
     chrome_options.add_argument("--disable-extensions")
-    chrome_options.add_argument("--disable-images")
     chrome_options.page_load_strategy = 'eager'
+    configure_chrome_options(chrome_options)
     
     driver = webdriver.Chrome(options=chrome_options)
     driver.set_page_load_timeout(15)
-    
+    # Only the form, its postback scripts and the grid are needed
+    enable_resource_blocking(driver, blocked_url_patterns())
+    return driver
+
+page_weight = PageWeightMeter()
+
+# Prometheus metrics served at /metrics
+metrics = ScraperMetrics('agmarknet')
+
+# Per-step scrape timings; they also drive the adaptive wait timeouts
+scrape_latency = LatencyTracker(on_record=metrics.observe_phase)
+
+# Warm Chrome sessions shared by concurrent /request calls
+browser_pool = BrowserPool(
+    create_chrome_driver,
+    size=int(os.environ.get('BROWSER_POOL_SIZE', 2)),
+    max_uses=int(os.environ.get('BROWSER_MAX_USES', 50)),
+    checkout_timeout=float(os.environ.get('BROWSER_CHECKOUT_TIMEOUT', 60)),
+    on_session_started=lambda seconds: scrape_latency.record('browser_launch', seconds)
+)
+
+# Scrape engine: 'http' (form postbacks only), 'selenium', or 'auto'
+# (HTTP first, falling back to Selenium if the postback flow fails)
+SCRAPER_ENGINE = os.environ.get('SCRAPER_ENGINE', 'auto').lower()
+
+http_client = AgmarknetHttpClient(
+    pool_size=int(os.environ.get('HTTP_POOL_SIZE', 10)),
+    timeout=float(os.environ.get('HTTP_TIMEOUT', 20))
+)
+
+# Serve every district of a state from one state-wide grid scrape
+STATE_FANOUT = os.environ.get('STATE_FANOUT', '').lower() in ('1', 'true', 'yes')
+
+# Every scraped row is kept here for /history; set PRICE_HISTORY_DIR='' to disable
+PRICE_HISTORY_DIR = os.environ.get('PRICE_HISTORY_DIR', 'price_history')
+price_history = PriceHistoryStore(PRICE_HISTORY_DIR) if PRICE_HISTORY_DIR else None
+
+def fetch_grid(state, commodity, district):
+    """Scrape the price grid with the configured engine: (records, district_found, desired_date)"""
+    desired_date = datetime.now() - timedelta(days=7)
+    timer = StepTimer(scrape_latency, 'Agmarknet grid')
+    page = None
+    if SCRAPER_ENGINE in ('http', 'auto'):
+        try:
+            with timer.step('http_postbacks'):
+                page, district_found = http_client.fetch_page(state, commodity, district, desired_date)
+            metrics.scrape('http', 'ok')
+        except Exception as e:
+            metrics.scrape('http', 'error')
+            if SCRAPER_ENGINE == 'http':
+                raise
+            print(f"HTTP engine failed ({e}), falling back to Selenium")
+    if page is None:
+        try:
+            page, district_found = selenium_page(state, commodity, district, desired_date)
+            metrics.scrape('selenium', 'ok')
+        except Exception:
+            metrics.scrape('selenium', 'error')
+            raise
+
+    with timer.step('parse'):
+        records = parse_price_grid(page)
+    if price_history is not None:
+        try:
+            with timer.step('store_history'):
+                stored = price_history.record_scrape(records, commodity, state, desired_date)
+            print(f"Stored {stored} new rows in price history")
+        except Exception as e:
+            print(f"Could not store price history: {e}")
+    return records, district_found, desired_date
+
+def script(state, commodity, district):
+    """Fetch agmarknet prices with the configured engine"""
+    if STATE_FANOUT:
+        jsonList = state_grid(state, commodity).response(district)
+    else:
+        records, district_found, desired_date = fetch_grid(state, commodity, district)
+        print(f"Found {len(records)} rows of data")
+        jsonList = build_price_response(records, state, commodity, district, district_found, desired_date)
+        print(f"Returning {len(jsonList)} results")
+    if not any(row.get("District_Found") for row in jsonList):
+        metrics.fallback()
+    return jsonList
+
+# State-wide grids by (commodity, state, date); concurrent district queries share one scrape
+state_grids = PriceCache(MemoryBackend(int(os.environ.get('STATE_GRID_CACHE_SIZE', 200))),
+                         ttl=int(os.environ.get('CACHE_DURATION', 300)))
+
+def state_grid(state, commodity):
+    desired_date = datetime.now() - timedelta(days=7)
+    key = f"{commodity}|{state}|{desired_date.date().isoformat()}"
+
+    def build():
+        # No district selected: agmarknet lists every market in the state
+        records, _, grid_date = fetch_grid(state, commodity, "")
+        grid = StateGrid(records, state, commodity, grid_date)
+        print(f"Indexed {len(grid)} rows across {len(grid.rows_by_district)} districts of {state}")
+        return grid
+
+    grid, _, _ = state_grids.get_or_compute(key, build)
+    return grid
+
+def selenium_page(state, commodity, district, desired_date):
+    """Drive the search form in a pooled Chrome session: (page_source, district_found)"""
+    initial_url = "https://agmarknet.gov.in/SearchCmmMkt.aspx"
+
+    timer = StepTimer(scrape_latency, 'Agmarknet scrape')
+    with timer.step('browser_checkout'):
+        driver = browser_pool.checkout()
+    broken = False
+    page_weight.start(driver)
+
     try:
-        driver.get(initial_url)
+        with timer.step('load_form'):
+            driver.get(initial_url)
         print("Page loaded successfully")
 
         print("Selecting Commodity")
-        WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.ID, 'ddlCommodity'))
-        )
+        timer.wait(driver, 'commodity_ready', EC.element_to_be_clickable((By.ID, 'ddlCommodity')), 10)
         commodity_dropdown = Select(driver.find_element("id", 'ddlCommodity'))
         commodity_dropdown.select_by_visible_text(commodity)
         print(f"Commodity '{commodity}' selected")
@@ -47,79 +174,46 @@ def script(state, commodity, district):
         print(f"State '{state}' selected")
 
         print("Setting Date")
-        today = datetime.now()
-        desired_date = today - timedelta(days=7)
         date_input = driver.find_element(By.ID, "txtDate")
         date_input.clear()
         date_input.send_keys(desired_date.strftime('%d-%b-%Y'))
         print(f"Date set to: {desired_date.strftime('%d-%b-%Y')}")
 
         print("Clicking Go button")
+        postback = PostbackWatcher(driver, 'ddlDistrict')
+        postback.arm()
         button = driver.find_element("id", 'btnGo')
         driver.execute_script("arguments[0].click();", button)  # Use JavaScript click
         print("Go button clicked")
 
-        # Wait for district dropdown to be populated - with multiple fallbacks
+        # Wait for the postback that fills the district dropdown
         print("Waiting for district dropdown to populate...")
-        
         try:
-            # First, wait for the district dropdown element to be present
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.ID, 'ddlDistrict'))
-            )
-            print("District dropdown element found")
-            
-            # Then wait for it to have options (try multiple approaches)
-            district_populated = False
-            for attempt in range(3):
-                try:
-                    WebDriverWait(driver, 10).until(
-                        lambda driver: len(Select(driver.find_element("id", 'ddlDistrict')).options) > 1
-                    )
-                    district_populated = True
-                    break
-                except:
-                    print(f"Attempt {attempt + 1}: District dropdown not populated yet, retrying...")
-                    time.sleep(2)
-            
-            if not district_populated:
-                print("District dropdown still not populated, checking manually...")
-                district_dropdown = Select(driver.find_element("id", 'ddlDistrict'))
-                options = district_dropdown.options
-                print(f"District dropdown has {len(options)} options")
-                
-                # If we have at least one option, proceed
-                if len(options) >= 1:
-                    district_populated = True
-                    print("Proceeding with available options")
-            
-            if not district_populated:
-                raise Exception("District dropdown never populated properly")
-                
-        except Exception as e:
-            print(f"Error waiting for district dropdown: {e}")
+            postback.wait(timer, 'state_postback', 25)
+            timer.wait(driver, 'district_options', district_options_loaded, 10)
+            print("District dropdown populated")
+        except TimeoutException:
             # Try to continue anyway - maybe we can still get state-level data
-            print("Attempting to continue without district selection...")
-
-        print("District dropdown populated")
+            options = driver.find_elements(By.CSS_SELECTOR, '#ddlDistrict option')
+            print(f"District dropdown has {len(options)} options, continuing without waiting further")
 
         print("Processing District selection")
         district_dropdown = Select(driver.find_element("id", 'ddlDistrict'))
-        
+
         # Get all available options
         available_options = [option.text.strip() for option in district_dropdown.options if option.text.strip()]
         print(f"Available districts: {available_options}")
-        
+
         # Try to find the specific district first
         district_found = False
         if available_options:  # Only try if we have options
             for option in district_dropdown.options:
-                if option.text.strip().lower() == district.lower():
+                if district and option.text.strip().lower() == district.lower():
                     district_dropdown.select_by_visible_text(option.text.strip())
                     district_found = True
                     print(f"Found and selected specific district: {district}")
                     break
-            
+
             # If district not found, select "All" or first option
             if not district_found:
                 print(f"District '{district}' not found. Selecting fallback option...")
@@ -128,14 +222,14 @@ def script(state, commodity, district):
                 for option in district_dropdown.options:
                     option_text = option.text.strip().lower()
                     option_value = option.get_attribute('value') or ""
-                    
-                    if (option_text in ['all', 'all districts', '--select--'] or 
+
+                    if (option_text in ['all', 'all districts', '--select--'] or
                         option_value == '0' or option_value == ''):
                         district_dropdown.select_by_visible_text(option.text.strip())
                         print(f"Selected fallback option: {option.text.strip()}")
                         selected = True
                         break
-                
+
                 # If still no selection, select first non-empty option
                 if not selected:
                     for option in district_dropdown.options:
@@ -145,18 +239,23 @@ def script(state, commodity, district):
                             break
 
             print("Clicking final Go button")
+            postback = PostbackWatcher(driver, 'cphBody_GridPriceData')
+            postback.arm()
             button = driver.find_element("id", 'btnGo')
             driver.execute_script("arguments[0].click();", button)  # Use JavaScript click
             print("Final Go button clicked")
+            try:
+                postback.wait(timer, 'district_postback', 25)
+            except TimeoutException:
+                # The grid check below decides whether there is data to read
+                print("District postback not detected, checking for the data table anyway")
 
         # Wait for the table to be present with better error handling
         print("Waiting for data table...")
         try:
-            table = WebDriverWait(driver, 20).until(
-                EC.presence_of_element_located((By.ID, 'cphBody_GridPriceData'))
-            )
+            timer.wait(driver, 'price_table', EC.presence_of_element_located((By.ID, 'cphBody_GridPriceData')), 20)
             print("Data table found")
-        except:
+        except TimeoutException:
             print("Primary table not found, checking for alternative table structures...")
             # Try to find any table with price data
             tables = driver.find_elements(By.TAG_NAME, "table")
@@ -164,111 +263,112 @@ def script(state, commodity, district):
             if not tables:
                 raise Exception("No data tables found on page")
 
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-
-        data_list = []
-        for row in soup.find_all("tr"):
-            row_data = row.text.replace("\n", "_").replace("  ", "").split("__")
-            if len(row_data) > 5:  # Only include rows with substantial data
-                data_list.append(row_data)
-
-        print(f"Found {len(data_list)} rows of data")
-
-        jsonList = []
-        for i in data_list[2:]:  # Start from row 2 to avoid headers
-            if len(i) >= 8:  # Ensure we have enough data
-                try:
-                    d = {}
-                    d["S.No"] = i[1] if len(i) > 1 else ""
-                    d["City"] = i[2] if len(i) > 2 else ""
-                    d["Commodity"] = i[4] if len(i) > 4 else commodity
-                    d["Min Prize"] = i[7] if len(i) > 7 else ""
-                    d["Max Prize"] = i[8] if len(i) > 8 else ""
-                    d["Model Prize"] = i[9] if len(i) > 9 else ""
-                    d["Date"] = i[10] if len(i) > 10 else desired_date.strftime('%d-%b-%Y')
-                    d["District_Found"] = district_found
-                    d["Requested_District"] = district
-                    
-                    # Only add if we have meaningful data
-                    if d["City"] and (d["Min Prize"] or d["Max Prize"] or d["Model Prize"]):
-                        jsonList.append(d)
-                except Exception as e:
-                    print(f"Error processing row: {e}")
-                    continue
-
-        print(f"Processed {len(jsonList)} data entries")
-
-        # Calculate averages if district wasn't found and we have multiple entries
-        if not district_found and len(jsonList) > 1:
-            try:
-                min_prices = []
-                max_prices = []
-                model_prices = []
-                
-                for item in jsonList:
-                    try:
-                        # Better price parsing
-                        min_price_str = item["Min Prize"].replace(',', '').replace(' ', '').replace('Rs.', '')
-                        max_price_str = item["Max Prize"].replace(',', '').replace(' ', '').replace('Rs.', '')
-                        model_price_str = item["Model Prize"].replace(',', '').replace(' ', '').replace('Rs.', '')
-                        
-                        if min_price_str.replace('.', '').isdigit():
-                            min_prices.append(float(min_price_str))
-                        if max_price_str.replace('.', '').isdigit():
-                            max_prices.append(float(max_price_str))
-                        if model_price_str.replace('.', '').isdigit():
-                            model_prices.append(float(model_price_str))
-                    except (ValueError, AttributeError) as e:
-                        print(f"Error parsing price for item: {e}")
-                        continue
-                
-                # Add summary statistics
-                if min_prices or max_prices or model_prices:
-                    summary = {
-                        "S.No": "SUMMARY",
-                        "City": f"Average for {state}",
-                        "Commodity": commodity,
-                        "Min Prize": f"{sum(min_prices)/len(min_prices):.2f}" if min_prices else "N/A",
-                        "Max Prize": f"{sum(max_prices)/len(max_prices):.2f}" if max_prices else "N/A",
-                        "Model Prize": f"{sum(model_prices)/len(model_prices):.2f}" if model_prices else "N/A",
-                        "Date": desired_date.strftime('%d-%b-%Y'),
-                        "District_Found": False,
-                        "Requested_District": district,
-                        "Type": "STATE_AVERAGE"
-                    }
-                    jsonList.insert(0, summary)
-                    print("Added summary with averages")
-                
-            except Exception as e:
-                print(f"Error calculating averages: {e}")
-
-        driver.quit()
-        print(f"Returning {len(jsonList)} results")
-        return jsonList
+        with timer.step('read_page'):
+            page_source = driver.page_source
+        print(timer.summary())
+        page_weight.finish(driver)
+        return page_source, district_found
 
     except Exception as e:
         print(f"Error in script: {str(e)}")
-        try:
-            driver.quit()
-        except:
-            pass
+        # Bad input or missing data keeps the warm session; a broken browser is recycled
+        broken = session_broken(e)
         raise e
+    finally:
+        browser_pool.checkin(driver, discard=broken)
+
+def district_options_loaded(driver):
+    return len(Select(driver.find_element("id", 'ddlDistrict')).options) > 1
 
 app = Flask(__name__)
 
 # Enable CORS for all domains on all routes
 CORS(app, origins=['http://localhost:3000', 'http://127.0.0.1:3000'])
 
-# Simple in-memory cache
-cache = {}
-CACHE_DURATION = 300  # 5 minutes
+# Bounded price cache, shared across workers when PRICE_CACHE_PATH is set
+CACHE_DURATION = int(os.environ.get('CACHE_DURATION', 300))  # 5 minutes
+# Expired entries are still served (and refreshed in the background) up to this age
+CACHE_MAX_STALE = int(os.environ.get('CACHE_MAX_STALE', 24 * 3600))
+cache = cache_from_env(CACHE_DURATION, CACHE_MAX_STALE)
+
+def price_cache_key(commodity, state, district):
+    return hashlib.md5(f"{commodity}_{state}_{district}".encode()).hexdigest()
+
+# Hot combinations are scraped ahead of time by the prewarm crawler
+request_log = RequestLog(os.environ.get('PREWARM_REQUEST_LOG'))
+prewarm_crawler = PrewarmCrawler(
+    cache,
+    script,
+    price_cache_key,
+    request_log,
+    watchlist=load_watchlist(os.environ.get('PREWARM_WATCHLIST')),
+    top_n=int(os.environ.get('PREWARM_TOP_N', 20)),
+    interval=float(os.environ.get('PREWARM_INTERVAL', 600)),
+    concurrency=int(os.environ.get('PREWARM_CONCURRENCY', 2)),
+    min_request_interval=float(os.environ.get('PREWARM_MIN_REQUEST_INTERVAL', 2))
+)
 
 @app.route('/', methods=['GET'])
 def homePage():
     dataSet = {"Page": "Home Page navigate to request page", "Time Stamp": time.time()}
     return jsonify(dataSet)
 
-@app.route('/request', methods=['GET', 'OPTIONS'])
+# Scrapes requested with POST /request run here instead of on the request worker
+job_queue = JobQueue(
+    max_workers=int(os.environ.get('JOB_WORKERS', 2)),
+    max_pending=int(os.environ.get('JOB_MAX_PENDING', 50)),
+    result_ttl=CACHE_DURATION
+)
+register_job_routes(app, job_queue)
+
+def cache_lookup_counts():
+    counts = {}
+    for name, price_cache in (('price', cache), ('state_grid', state_grids)):
+        stats = price_cache.stats()
+        for status in ('hits', 'stale', 'misses', 'coalesced', 'errors'):
+            counts[('agmarknet', name, status)] = stats[status]
+    return counts
+
+metrics.registry.callback('scraper_cache_lookups_total', 'Cache lookups by cache and outcome',
+                          ['scraper', 'cache', 'outcome'], cache_lookup_counts)
+metrics.registry.callback('scraper_jobs_total', 'Background scrape jobs by outcome', ['scraper', 'outcome'],
+                          lambda: {('agmarknet', outcome): job_queue.stats()[outcome]
+                                   for outcome in ('submitted', 'merged', 'completed', 'failed')})
+metrics.registry.callback('scraper_browser_sessions', 'Open pooled browser sessions', ['scraper'],
+                          lambda: {('agmarknet',): browser_pool.stats()['sessions_open']}, kind='gauge')
+metrics.register_routes(app)
+
+def record_request(commodity, state, district, rows):
+    """Feed the prewarm crawler only combinations that returned prices"""
+    if rows:
+        request_log.record(commodity, state, district)
+
+def queue_scrape(cache_key, compute, on_result=lambda rows: None):
+    """Cached data right away, otherwise 202 and a job that fills the cache"""
+    answer = cache.lookup(cache_key, compute)
+    if answer is not None:
+        result, cache_status, age = answer
+        on_result(result)
+        response = jsonify(result)
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        response.headers['X-Cache'] = cache_status
+        response.headers['Age'] = str(int(age))
+        return response
+
+    try:
+        def run():
+            rows = cache.get_or_compute(cache_key, compute)[0]
+            on_result(rows)
+            return rows
+
+        job = job_queue.submit(cache_key, run)
+    except JobQueueFull as e:
+        response = jsonify({"error": str(e)})
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        return response, 503
+    return job_response(job)
+
+@app.route('/request', methods=['GET', 'POST', 'OPTIONS'])
 def requestPage():
     # Handle preflight requests
     if request.method == 'OPTIONS':
@@ -278,41 +378,211 @@ def requestPage():
         response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
         return response
     
-    commodityQuery = request.args.get('commodity')
-    stateQuery = request.args.get('state')
-    districtQuery = request.args.get('district')
+    # POST takes the same parameters as a JSON body or form/query values
+    params = (request.get_json(silent=True) or {}) if request.method == 'POST' else {}
+    commodityQuery = params.get('commodity') or request.values.get('commodity')
+    stateQuery = params.get('state') or request.values.get('state')
+    districtQuery = params.get('district') or request.values.get('district')
 
     if not commodityQuery or not stateQuery or not districtQuery:
         response = jsonify({"error": "Missing query parameters"})
         response.headers.add('Access-Control-Allow-Origin', '*')
-        return response
+        return response, 400
 
-    # Create cache key
-    cache_key = hashlib.md5(f"{commodityQuery}_{stateQuery}_{districtQuery}".encode()).hexdigest()
-    
-    # Check cache
-    if cache_key in cache:
-        cached_data, timestamp = cache[cache_key]
-        if time.time() - timestamp < CACHE_DURATION:
-            response = jsonify(cached_data)
-            response.headers.add('Access-Control-Allow-Origin', '*')
-            return response
+    cache_key = price_cache_key(commodityQuery, stateQuery, districtQuery)
+
+    if request.method == 'POST':
+        return queue_scrape(cache_key, lambda: script(stateQuery, commodityQuery, districtQuery),
+                            lambda rows: record_request(commodityQuery, stateQuery, districtQuery, rows))
 
     try:
-        result = script(stateQuery, commodityQuery, districtQuery)
-        
-        # Store in cache
-        cache[cache_key] = (result, time.time())
-        
+        # Identical concurrent queries share one scrape; expired entries are
+        # answered right away and refreshed in the background
+        result, cache_status, age = cache.get_or_compute(
+            cache_key, lambda: script(stateQuery, commodityQuery, districtQuery)
+        )
+        record_request(commodityQuery, stateQuery, districtQuery, result)
+
         response = jsonify(result)
         response.headers.add('Access-Control-Allow-Origin', '*')
+        response.headers['X-Cache'] = cache_status
+        response.headers['Age'] = str(int(age))
         return response
     except Exception as e:
         response = jsonify({"error": str(e)})
         response.headers.add('Access-Control-Allow-Origin', '*')
+        # agmarknet or the browser failed, not the client
+        return response, 502
+
+# Scrapes of /request/batch calls share this pool, so batches cannot flood agmarknet
+batch_executor = ThreadPoolExecutor(max_workers=int(os.environ.get('BATCH_CONCURRENCY', 3)),
+                                    thread_name_prefix='batch-scrape')
+
+def run_scrape_plan(plan):
+    """Run one planned scrape and cache the rows of each district it covers"""
+    if not plan.state_grid:
+        district = plan.districts[0]
+        key = price_cache_key(plan.commodity, plan.state, district)
+        rows, cache_status, _ = cache.get_or_compute(key, lambda: script(plan.state, plan.commodity, district))
+        return [(district, rows, cache_status)]
+
+    grid = state_grid(plan.state, plan.commodity)
+    results = []
+    for district in plan.districts:
+        rows = grid.response(district)
+        cache.put(price_cache_key(plan.commodity, plan.state, district), rows)
+        results.append((district, rows, 'STATE_GRID'))
+    return results
+
+@app.route('/request/batch', methods=['POST', 'OPTIONS'])
+def requestBatchPage():
+    """
+    Prices for every commodity x district pair of one state
+    Accepts {"state", "commodities": [...], "districts": [...]} and streams
+    NDJSON, one line per pair as soon as it is available, then a summary line
+    """
+    if request.method == 'OPTIONS':
+        response = jsonify({'message': 'CORS preflight'})
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
+        response.headers.add('Access-Control-Allow-Methods', 'POST,OPTIONS')
+        return response
+
+    data = request.get_json(silent=True) or {}
+    stateQuery = data.get('state')
+    commodities = data.get('commodities') or ([data['commodity']] if data.get('commodity') else [])
+    districts = data.get('districts') or ([data['district']] if data.get('district') else [])
+
+    if (not isinstance(stateQuery, str) or not stateQuery.strip()
+            or not all(isinstance(value, str) and value.strip() for value in commodities + districts)
+            or not commodities or not districts):
+        response = jsonify({"error": "Expected state, commodities and districts"})
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        return response, 400
+
+    stateQuery = stateQuery.strip()
+    queries = batch_queries(commodities, districts)
+    if len(queries) > MAX_BATCH_QUERIES:
+        response = jsonify({"error": f"Batch too large: at most {MAX_BATCH_QUERIES} commodity/district pairs"})
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        return response, 400
+
+    def line(commodity, district, **fields):
+        return json.dumps({"commodity": commodity, "state": stateQuery, "district": district, **fields}) + '\n'
+
+    def generate():
+        started = time.monotonic()
+        pending = []
+        for commodity, district in queries:
+            answer = cache.lookup(price_cache_key(commodity, stateQuery, district),
+                                  lambda commodity=commodity, district=district: script(stateQuery, commodity, district))
+            if answer is None:
+                pending.append((commodity, district))
+                continue
+            rows, cache_status, age = answer
+            record_request(commodity, stateQuery, district, rows)
+            yield line(commodity, district, cache=cache_status, age=int(age), data=rows)
+
+        plans = plan_scrapes(stateQuery, pending, always_state_grid=STATE_FANOUT)
+        futures = {batch_executor.submit(run_scrape_plan, plan): plan for plan in plans}
+        failed = 0
+        for future in as_completed(futures):
+            plan = futures[future]
+            try:
+                for district, rows, cache_status in future.result():
+                    record_request(plan.commodity, stateQuery, district, rows)
+                    yield line(plan.commodity, district, cache=cache_status, age=0, data=rows)
+            except Exception as e:
+                print(f"Batch scrape of {plan} failed: {e}")
+                for district in plan.districts:
+                    failed += 1
+                    yield line(plan.commodity, district, error=str(e))
+
+        yield json.dumps({"summary": {
+            "queries": len(queries),
+            "from_cache": len(queries) - len(pending),
+            "scrapes": len(plans),
+            "failed": failed,
+            "seconds": round(time.monotonic() - started, 2)
+        }}) + '\n'
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
+@app.route('/history', methods=['GET'])
+def historyPage():
+    commodityQuery = request.args.get('commodity')
+    stateQuery = request.args.get('state')
+
+    if not commodityQuery or not stateQuery:
+        response = jsonify({"error": "Missing query parameters"})
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        return response
+
+    if price_history is None:
+        response = jsonify({"error": "Price history is disabled"})
+        response.headers.add('Access-Control-Allow-Origin', '*')
         return response
 
+    try:
+        start = datetime.strptime(request.args['from'], '%Y-%m-%d').date() if request.args.get('from') else None
+        end = datetime.strptime(request.args['to'], '%Y-%m-%d').date() if request.args.get('to') else None
+        window = max(1, int(request.args.get('window', 7)))
+    except ValueError:
+        response = jsonify({"error": "from/to must be YYYY-MM-DD and window an integer"})
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        return response
+
+    try:
+        series = price_history.history(commodityQuery, stateQuery, start, end,
+                                       district=request.args.get('district'),
+                                       market=request.args.get('market'), window=window)
+    except CorruptSeriesError as e:
+        response = jsonify({"error": f"Price history is corrupt: {e}"})
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        return response, 500
+    response = jsonify({
+        "commodity": commodityQuery,
+        "state": stateQuery,
+        "from": start.isoformat() if start else None,
+        "to": end.isoformat() if end else None,
+        "window": window,
+        "series": series
+    })
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
+@app.route('/pool-stats', methods=['GET'])
+def poolStatsPage():
+    return jsonify(browser_pool.stats())
+
+@app.route('/scrape-timings', methods=['GET'])
+def scrapeTimingsPage():
+    return jsonify(scrape_latency.stats())
+
+@app.route('/resource-stats', methods=['GET'])
+def resourceStatsPage():
+    return jsonify(page_weight.stats())
+
+@app.route('/cache-stats', methods=['GET'])
+def cacheStatsPage():
+    stats = cache.stats()
+    if STATE_FANOUT:
+        stats['state_grids'] = state_grids.stats()
+    return jsonify(stats)
+
+@app.route('/prewarm-stats', methods=['GET'])
+def prewarmStatsPage():
+    return jsonify(prewarm_crawler.stats())
+
+# Optionally start browser sessions before the first request
+if int(os.environ.get('BROWSER_POOL_WARM', 0)) > 0:
+    threading.Thread(target=browser_pool.warm, args=(int(os.environ['BROWSER_POOL_WARM']),), daemon=True).start()
+
+if os.environ.get('PREWARM_ENABLED', '').lower() in ('1', 'true', 'yes'):
+    prewarm_crawler.start()
+
 if __name__ == '__main__':
-    import os
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file
@@ -10,6 +10,12 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraper_common.waits import LatencyTracker, PostbackWatcher, StepTimer
+
+scrape_latency = LatencyTracker()
 
 def close_popup(driver):
     try:
@@ -28,8 +34,10 @@ def script(state, commodity, district):
     # URL of the website with the dropdown fields
     initial_url = "https://agmarknet.gov.in/SearchCmmMkt.aspx"
 
+    timer = StepTimer(scrape_latency, 'Agmarknet scrape')
     driver = webdriver.Chrome()
-    driver.get(initial_url)
+    with timer.step('load_form'):
+        driver.get(initial_url)
 
     # Close the popup if it exists
     close_popup(driver)
@@ -50,26 +58,30 @@ def script(state, commodity, district):
     date_input.send_keys(desired_date.strftime('%d-%b-%Y'))
 
     print("Click")
+    postback = PostbackWatcher(driver, 'ddlDistrict')
+    postback.arm()
     button = driver.find_element("id", 'btnGo')
     button.click()
 
-    time.sleep(3)
+    # Wait for the postback to fill the district dropdown instead of sleeping
+    postback.wait(timer, 'state_postback', 25)
+    timer.wait(driver, 'district_options',
+               lambda driver: len(Select(driver.find_element("id", 'ddlDistrict')).options) > 1, 10)
 
     print("District")
     dropdown = Select(driver.find_element("id", 'ddlDistrict'))
     dropdown.select_by_visible_text(district)
 
     print("Click")
+    postback = PostbackWatcher(driver, 'cphBody_GridPriceData')
+    postback.arm()
     button = driver.find_element("id", 'btnGo')
     button.click()
 
-    time.sleep(1)
-
-    driver.implicitly_wait(10)
+    postback.wait(timer, 'district_postback', 25)
     # Wait for the table to be present
-    table = WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located((By.ID, 'cphBody_GridPriceData'))
-    )
+    table = timer.wait(driver, 'price_table', EC.presence_of_element_located((By.ID, 'cphBody_GridPriceData')), 10)
+    print(timer.summary())
     soup = BeautifulSoup(driver.page_source, 'html.parser')
 
     data_list = []
@@ -0,0 +1,182 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from price_grid import build_price_response, parse_price_grid
+
+AGMARKNET_URL = "https://agmarknet.gov.in/SearchCmmMkt.aspx"
+
+# Option texts/values the Selenium flow treats as the state-wide fallback
+FALLBACK_DISTRICT_TEXTS = ['all', 'all districts', '--select--']
+
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/119.0 Safari/537.36")
+
+
+class AgmarknetFormError(Exception):
+    """Raised when a page does not contain the expected ASP.NET search form"""
+
+
+class AspNetForm:
+    """Field state of an ASP.NET WebForms page, ready to be posted back"""
+
+    def __init__(self, html: str, base_url: str):
+        soup = BeautifulSoup(html, 'html.parser')
+        form = soup.find('form')
+        if form is None:
+            raise AgmarknetFormError("No form found on agmarknet page")
+
+        self.action = urljoin(base_url, form.get('action') or base_url)
+        self.fields: Dict[str, str] = {}
+        self.submits: Dict[str, str] = {}
+        self.options: Dict[str, List[Tuple[str, str]]] = {}
+
+        for field in form.find_all('input'):
+            name = field.get('name')
+            if not name:
+                continue
+            field_type = (field.get('type') or 'text').lower()
+            if field_type in ('submit', 'button', 'image'):
+                self.submits[name] = field.get('value', '')
+            elif field_type in ('checkbox', 'radio'):
+                if field.has_attr('checked'):
+                    self.fields[name] = field.get('value', 'on')
+            else:
+                self.fields[name] = field.get('value', '')
+
+        for select in form.find_all('select'):
+            name = select.get('name')
+            if not name:
+                continue
+            options = [
+                (option.get('value', option.get_text(strip=True)), option.get_text(strip=True))
+                for option in select.find_all('option')
+            ]
+            self.options[name] = options
+            selected = select.find('option', selected=True)
+            if selected is not None:
+                self.fields[name] = selected.get('value', selected.get_text(strip=True))
+            elif options:
+                self.fields[name] = options[0][0]
+
+        if '__VIEWSTATE' not in self.fields:
+            raise AgmarknetFormError("Search form has no __VIEWSTATE field")
+
+    def select_text(self, name: str, text: str):
+        """Select a dropdown option by its visible text, like Select.select_by_visible_text"""
+        options = self.options.get(name, [])
+        for value, option_text in options:
+            if option_text == text:
+                self.fields[name] = value
+                return
+        for value, option_text in options:
+            if option_text.lower() == text.strip().lower():
+                self.fields[name] = value
+                return
+        raise AgmarknetFormError(f"'{text}' is not an option of {name}")
+
+    def payload(self, submit: Optional[str] = None) -> Dict[str, str]:
+        """Form data for a postback triggered by the given submit button"""
+        data = dict(self.fields)
+        if submit is not None:
+            if submit not in self.submits:
+                raise AgmarknetFormError(f"Search form has no {submit} button")
+            data[submit] = self.submits[submit]
+        return data
+
+
+def choose_district(options: List[Tuple[str, str]], district: str) -> Tuple[bool, Optional[str]]:
+    """
+    Pick the ddlDistrict value for a request, mirroring the Selenium flow:
+    the exact district, else the "All"/--Select-- option, else the first option
+    Returns (district_found, value) and value None when the dropdown is empty
+    """
+    named_options = [(value, text) for value, text in options if text]
+    if not named_options:
+        return False, None
+
+    for value, text in named_options:
+        if text.lower() == district.lower():
+            return True, value
+
+    for value, text in named_options:
+        if text.lower() in FALLBACK_DISTRICT_TEXTS or value in ('0', ''):
+            return False, value
+
+    return False, named_options[0][0]
+
+
+class AgmarknetHttpClient:
+    """
+    Browserless agmarknet engine that replays the search form postbacks
+    Connections are pooled across requests through a shared HTTPAdapter while
+    every query gets its own cookie jar, so concurrent ASP.NET sessions do not mix
+    """
+
+    def __init__(self, url: str = AGMARKNET_URL, pool_size: int = 10, timeout: float = 20,
+                 retries: int = 2):
+        self.url = url
+        self.timeout = timeout
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=retries, backoff_factor=0.5,
+                              status_forcelist=(502, 503, 504), allowed_methods=frozenset(['GET']))
+        )
+
+    def new_session(self) -> requests.Session:
+        session = requests.Session()
+        session.mount('http://', self.adapter)
+        session.mount('https://', self.adapter)
+        session.headers['User-Agent'] = USER_AGENT
+        return session
+
+    def fetch_page(self, state: str, commodity: str, district: str,
+                   desired_date: datetime) -> Tuple[str, bool]:
+        """Run the search postbacks and return (results page HTML, district_found)"""
+        session = self.new_session()
+
+        print("HTTP engine: loading search form")
+        form = AspNetForm(self._get(session), self.url)
+
+        print(f"HTTP engine: posting commodity '{commodity}' and state '{state}'")
+        form.select_text('ddlCommodity', commodity)
+        form.select_text('ddlState', state)
+        form.fields['txtDate'] = desired_date.strftime('%d-%b-%Y')
+        page = self._post(session, form.action, form.payload('btnGo'))
+
+        form = AspNetForm(page, self.url)
+        district_found, district_value = choose_district(form.options.get('ddlDistrict', []), district)
+        if district_value is None:
+            print("HTTP engine: district dropdown is empty, using state-level results")
+            return page, False
+
+        print(f"HTTP engine: posting district (found={district_found})")
+        form.fields['ddlDistrict'] = district_value
+        form.fields['txtDate'] = desired_date.strftime('%d-%b-%Y')
+        page = self._post(session, form.action, form.payload('btnGo'))
+        return page, district_found
+
+    def fetch_prices(self, state: str, commodity: str, district: str,
+                     desired_date: Optional[datetime] = None) -> List[Dict]:
+        """Same rows as the Selenium script(), without starting a browser"""
+        desired_date = desired_date or datetime.now() - timedelta(days=7)
+        page, district_found = self.fetch_page(state, commodity, district, desired_date)
+
+        records = parse_price_grid(page)
+        return build_price_response(records, state, commodity, district, district_found, desired_date)
+
+    def _get(self, session: requests.Session) -> str:
+        response = session.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.text
+
+    def _post(self, session: requests.Session, url: str, data: Dict[str, str]) -> str:
+        response = session.post(url, data=data, timeout=self.timeout, headers={'Referer': self.url})
+        response.raise_for_status()
+        return response.text
@@ -0,0 +1,74 @@
+"""
+Compare the old BeautifulSoup row splitting with price_grid.parse_price_grid
+on result pages of different sizes, built from fixtures/state_results.html
+
+    python benchmark_price_grid.py [rows ...]
+"""
+import os
+import re
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+import price_grid
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "state_results.html")
+DEFAULT_SIZES = [10, 100, 1000, 5000]
+
+
+def build_page(template: str, rows: int) -> str:
+    """Saved results page with its grid data rows repeated up to `rows`"""
+    start = template.index('id="cphBody_GridPriceData"')
+    end = template.index('</table>', start)
+    grid_rows = re.findall(r'<tr>.*?</tr>', template[start:end], re.S)
+    header, data = grid_rows[0], grid_rows[1:]
+    body = [data[i % len(data)] for i in range(rows)]
+    grid_start = template.index('>', start) + 1
+    return template[:grid_start] + '\n' + header + '\n' + '\n'.join(body) + '\n' + template[end:]
+
+
+def legacy_parse(page_source: str):
+    soup = BeautifulSoup(page_source, 'html.parser')
+    data_list = []
+    for row in soup.find_all("tr"):
+        row_data = row.text.replace("\n", "_").replace("  ", "").split("__")
+        if len(row_data) > 5:
+            data_list.append(row_data)
+    return [(i[2], i[7], i[8], i[9], i[10]) for i in data_list[2:] if len(i) >= 11]
+
+
+def best_of(func, page, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(page)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(sizes):
+    with open(FIXTURE, encoding="utf-8") as f:
+        template = f.read()
+
+    lxml_module = price_grid.lxml
+    print(f"{'rows':>6} {'page KB':>8} {'bs4 split':>11} {'lxml':>9} {'stdlib':>9}")
+    for rows in sizes:
+        page = build_page(template, rows)
+        assert len(price_grid.parse_price_grid(page)) == rows
+        repeat = 20 if rows <= 100 else 3
+
+        legacy = best_of(legacy_parse, page, repeat)
+        fast = best_of(price_grid.parse_price_grid, page, repeat) if lxml_module else None
+        price_grid.lxml = None
+        try:
+            fallback = best_of(price_grid.parse_price_grid, page, repeat)
+        finally:
+            price_grid.lxml = lxml_module
+
+        fast_text = f"{fast * 1000:7.1f}ms" if fast is not None else "      n/a"
+        print(f"{rows:>6} {len(page) / 1024:>8.0f} {legacy * 1000:>9.1f}ms {fast_text} {fallback * 1000:7.1f}ms")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
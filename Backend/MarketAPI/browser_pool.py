@@ -0,0 +1,192 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException
+
+
+class BrowserPoolTimeout(Exception):
+    """Raised when no browser session becomes available in time"""
+
+
+def session_broken(error: BaseException) -> bool:
+    """
+    Whether a scrape error means the browser itself is unusable
+    Missing elements and timeouts come from bad input or missing data, so the
+    session is kept; other WebDriver errors (crashed or invalid sessions) are not
+    """
+    if isinstance(error, (NoSuchElementException, TimeoutException)):
+        return False
+    return isinstance(error, WebDriverException)
+
+
+class BrowserPool:
+    """
+    Bounded pool of warm, reusable browser sessions
+    Sessions are created on demand up to `size`, health-checked on checkout
+    and recycled after `max_uses` checkouts or once the browser itself fails
+    """
+
+    def __init__(self, driver_factory: Callable, size: int = 2, max_uses: int = 50,
+                 checkout_timeout: float = 60, on_session_started: Optional[Callable[[float], None]] = None):
+        self.driver_factory = driver_factory
+        self.on_session_started = on_session_started
+        self.size = max(1, size)
+        self.max_uses = max(1, max_uses)
+        self.checkout_timeout = checkout_timeout
+
+        self._idle: List = []
+        self._uses: Dict[int, int] = {}
+        self._created = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+        # Counters for /pool-stats
+        self.sessions_started = 0
+        self.sessions_recycled = 0
+        self.checkouts = 0
+        self.reused = 0
+        self.wait_time_total = 0.0
+
+    def checkout(self, timeout: Optional[float] = None):
+        """Borrow a healthy session, starting one if the pool has room"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        started_waiting = time.monotonic()
+
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Browser pool is closed")
+
+                if self._idle:
+                    driver = self._idle.pop()
+                    break
+
+                if self._created < self.size:
+                    # Reserve the slot, then start the browser outside the lock
+                    self._created += 1
+                    driver = None
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise BrowserPoolTimeout(f"No browser session available after {timeout}s")
+                self._condition.wait(remaining)
+
+            self.checkouts += 1
+            self.wait_time_total += time.monotonic() - started_waiting
+
+        if driver is not None:
+            if self._is_healthy(driver):
+                with self._condition:
+                    self.reused += 1
+                return driver
+            print("Pooled browser session failed health check, replacing it")
+            self._quit(driver)
+
+        try:
+            return self._start_session()
+        except Exception:
+            with self._condition:
+                self._created -= 1
+                self._condition.notify()
+            raise
+
+    def checkin(self, driver, discard: bool = False):
+        """Return a session; it is recycled if it failed or reached max_uses"""
+        uses = self._uses.get(id(driver), 0) + 1
+        self._uses[id(driver)] = uses
+
+        if not discard and uses < self.max_uses and not self._closed:
+            try:
+                # Do not leak ASP.NET session state into the next scrape
+                driver.delete_all_cookies()
+            except Exception:
+                discard = True
+
+        if discard or uses >= self.max_uses or self._closed:
+            self._quit(driver)
+            with self._condition:
+                self._created -= 1
+                self.sessions_recycled += 1
+                self._condition.notify()
+            return
+
+        with self._condition:
+            self._idle.append(driver)
+            self._condition.notify()
+
+    @contextmanager
+    def session(self, timeout: Optional[float] = None):
+        """Context manager that discards the session if the body breaks the browser"""
+        driver = self.checkout(timeout)
+        broken = False
+        try:
+            yield driver
+        except BaseException as e:
+            broken = session_broken(e)
+            raise
+        finally:
+            self.checkin(driver, discard=broken)
+
+    def warm(self, count: int = 1):
+        """Start up to `count` idle sessions ahead of the first request"""
+        drivers = []
+        try:
+            for _ in range(min(count, self.size)):
+                drivers.append(self.checkout())
+        finally:
+            for driver in drivers:
+                self.checkin(driver)
+
+    def close(self):
+        """Quit every idle session and refuse further checkouts"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+            self._condition.notify_all()
+        for driver in idle:
+            self._quit(driver)
+
+    def stats(self) -> Dict:
+        with self._condition:
+            return {
+                'size': self.size,
+                'max_uses': self.max_uses,
+                'sessions_open': self._created,
+                'sessions_idle': len(self._idle),
+                'sessions_started': self.sessions_started,
+                'sessions_recycled': self.sessions_recycled,
+                'checkouts': self.checkouts,
+                'reused': self.reused,
+                'average_wait_seconds': round(self.wait_time_total / self.checkouts, 4) if self.checkouts else 0.0
+            }
+
+    def _start_session(self):
+        started = time.monotonic()
+        driver = self.driver_factory()
+        self._uses[id(driver)] = 0
+        elapsed = time.monotonic() - started
+        with self._condition:
+            self.sessions_started += 1
+        if self.on_session_started is not None:
+            self.on_session_started(elapsed)
+        print(f"Started browser session in {elapsed:.2f}s")
+        return driver
+
+    def _is_healthy(self, driver) -> bool:
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def _quit(self, driver):
+        self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
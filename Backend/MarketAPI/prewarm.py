@@ -0,0 +1,253 @@
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+Combination = Tuple[str, str, str]  # (commodity, state, district)
+
+
+class RequestLog:
+    """
+    Counts /request combinations so the crawler can learn the hot keys
+    With a path, every worker appends to the same JSON-lines file, which is
+    compacted to its last `max_lines` lines once it has grown past that.
+    Only the most frequent `max_keys` combinations are kept in memory
+    """
+
+    def __init__(self, path: Optional[str] = None, max_lines: int = 50000, max_keys: int = 5000):
+        self.path = path
+        self.max_lines = max_lines
+        self.max_keys = max_keys
+        self._counts: Counter = Counter()
+        self._appended = 0
+        self._lock = threading.Lock()
+
+    def record(self, commodity: str, state: str, district: str):
+        combination = (commodity, state, district)
+        with self._lock:
+            self._counts[combination] += 1
+            if len(self._counts) > self.max_keys:
+                # Keep the hottest half so newly seen keys can still climb in
+                self._counts = Counter(dict(self._counts.most_common(self.max_keys // 2)))
+            if self.path:
+                try:
+                    with open(self.path, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps(combination) + '\n')
+                    self._appended += 1
+                    if self._appended >= self.max_lines:
+                        self._compact()
+                except OSError as e:
+                    print(f"Could not append to request log: {e}")
+
+    def _compact(self):
+        """Rewrite the log to its last `max_lines` lines; called with the lock held"""
+        with open(self.path, encoding='utf-8') as f:
+            lines = deque(f, maxlen=self.max_lines)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(lines)
+        os.replace(tmp_path, self.path)
+        self._appended = 0
+
+    def top(self, n: int) -> List[Combination]:
+        if not self.path or not os.path.exists(self.path):
+            with self._lock:
+                return [combination for combination, _ in self._counts.most_common(n)]
+
+        counts: Counter = Counter()
+        with open(self.path, encoding='utf-8') as f:
+            lines = deque(f, maxlen=self.max_lines)
+        for line in lines:
+            try:
+                counts[tuple(json.loads(line))] += 1
+            except (ValueError, TypeError):
+                continue
+        return [combination for combination, _ in counts.most_common(n)]
+
+
+def load_watchlist(path: Optional[str]) -> List[Combination]:
+    """
+    Watchlist JSON: a list of {"commodity", "state", "district"} objects, or
+    of {"commodity", "state", "districts": [...]} to cover several districts
+    """
+    if not path:
+        return []
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+
+    combinations = []
+    for entry in entries:
+        districts = entry.get('districts') or [entry['district']]
+        for district in districts:
+            combinations.append((entry['commodity'], entry['state'], district))
+    return combinations
+
+
+class RateLimiter:
+    """Spaces out request starts to at most one per `min_interval` seconds"""
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._next_allowed = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_allowed)
+            self._next_allowed = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class PrewarmCrawler:
+    """
+    Background crawler that keeps the price cache warm for hot combinations
+    Each cycle scrapes the watchlist plus the top-N requested combinations with
+    bounded concurrency, skipping keys refreshed recently by anyone
+    """
+
+    def __init__(self, cache, fetch: Callable[[str, str, str], List[Dict]],
+                 key_for: Callable[[str, str, str], str], request_log: RequestLog,
+                 watchlist: Optional[List[Combination]] = None, top_n: int = 20,
+                 interval: float = 600, concurrency: int = 2, min_request_interval: float = 2.0,
+                 refresh_age: Optional[float] = None):
+        self.cache = cache
+        self.fetch = fetch
+        self.key_for = key_for
+        self.request_log = request_log
+        self.watchlist = list(watchlist or [])
+        self.top_n = top_n
+        self.interval = interval
+        self.concurrency = max(1, concurrency)
+        self.rate_limiter = RateLimiter(min_request_interval)
+        # Refresh keys once they are this old, before /request sees them expire
+        self.refresh_age = cache.ttl * 0.8 if refresh_age is None else refresh_age
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._key_status: Dict[Combination, Dict] = {}
+
+        # Counters for /prewarm-stats
+        self.cycles = 0
+        self.crawled = 0
+        self.failed = 0
+        self.skipped = 0
+        self.crawl_seconds = 0.0
+        self.last_cycle: Dict = {}
+
+    def combinations(self) -> List[Combination]:
+        combinations = list(dict.fromkeys(self.watchlist))
+        if self.top_n > 0:
+            for combination in self.request_log.top(self.top_n):
+                if combination not in combinations:
+                    combinations.append(combination)
+        return combinations
+
+    def crawl_once(self) -> Dict:
+        """Run one crawl cycle and return its summary"""
+        combinations = self.combinations()
+        started = time.monotonic()
+        results = Counter()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for outcome in executor.map(self._crawl_combination, combinations):
+                results[outcome] += 1
+
+        elapsed = time.monotonic() - started
+        crawled = results['crawled']
+        summary = {
+            'combinations': len(combinations),
+            'crawled': crawled,
+            'failed': results['failed'],
+            'skipped': results['skipped'],
+            'seconds': round(elapsed, 2),
+            'combinations_per_minute': round(crawled * 60 / elapsed, 2) if crawled and elapsed else 0.0,
+            'finished_at': time.time()
+        }
+        with self._lock:
+            self.cycles += 1
+            self.crawled += crawled
+            self.failed += results['failed']
+            self.skipped += results['skipped']
+            self.crawl_seconds += elapsed
+            self.last_cycle = summary
+        print(f"Prewarm cycle: {crawled}/{len(combinations)} crawled in {elapsed:.1f}s")
+        return summary
+
+    def _crawl_combination(self, combination: Combination) -> str:
+        commodity, state, district = combination
+        key = self.key_for(commodity, state, district)
+
+        entry = self.cache.get(key)
+        if entry is not None and entry[1] < self.refresh_age:
+            return 'skipped'
+
+        self.rate_limiter.wait()
+        started = time.monotonic()
+        try:
+            self.cache.refresh(key, lambda: self.fetch(state, commodity, district))
+        except Exception as e:
+            print(f"Prewarm of {combination} failed: {e}")
+            self._set_status(combination, last_error=str(e), last_error_at=time.time())
+            return 'failed'
+
+        self._set_status(combination, last_crawled_at=time.time(),
+                         last_duration_seconds=round(time.monotonic() - started, 2), last_error=None)
+        return 'crawled'
+
+    def _set_status(self, combination: Combination, **fields):
+        with self._lock:
+            self._key_status.setdefault(combination, {}).update(fields)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.crawl_once()
+            except Exception as e:
+                print(f"Prewarm cycle failed: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> Dict:
+        keys = []
+        for combination in self.combinations():
+            commodity, state, district = combination
+            entry = self.cache.get(self.key_for(commodity, state, district))
+            with self._lock:
+                status = dict(self._key_status.get(combination, {}))
+            keys.append({
+                'commodity': commodity,
+                'state': state,
+                'district': district,
+                'cached': entry is not None,
+                'age_seconds': round(entry[1], 1) if entry is not None else None,
+                'fresh': entry is not None and entry[1] < self.cache.ttl,
+                **status
+            })
+
+        with self._lock:
+            return {
+                'running': self._thread is not None and self._thread.is_alive(),
+                'interval_seconds': self.interval,
+                'concurrency': self.concurrency,
+                'cycles': self.cycles,
+                'crawled': self.crawled,
+                'failed': self.failed,
+                'skipped': self.skipped,
+                'combinations_per_minute': round(self.crawled * 60 / self.crawl_seconds, 2) if self.crawl_seconds else 0.0,
+                'last_cycle': self.last_cycle,
+                'keys': keys
+            }
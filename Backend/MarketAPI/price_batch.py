@@ -0,0 +1,44 @@
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+# Batch limits: each query is one (commodity, district) pair of the request
+MAX_BATCH_QUERIES = 100
+
+
+class ScrapePlan(NamedTuple):
+    """One scrape of a batch: a whole state grid, or a single district"""
+    commodity: str
+    state: str
+    districts: Tuple[str, ...]
+    state_grid: bool
+
+
+def batch_queries(commodities: Sequence[str], districts: Sequence[str]) -> List[Tuple[str, str]]:
+    """Unique (commodity, district) pairs in request order"""
+    queries = []
+    seen = set()
+    for commodity in commodities:
+        for district in districts:
+            key = (commodity.strip().lower(), district.strip().lower())
+            if key not in seen:
+                seen.add(key)
+                queries.append((commodity.strip(), district.strip()))
+    return queries
+
+
+def plan_scrapes(state: str, queries: List[Tuple[str, str]], always_state_grid: bool = False) -> List[ScrapePlan]:
+    """
+    Fewest scrapes covering `queries` (the pairs not answered from cache)
+    A commodity asked for in two or more districts is served from one
+    state-wide grid; a lone district gets its own district scrape
+    """
+    by_commodity: Dict[str, List[str]] = {}
+    for commodity, district in queries:
+        by_commodity.setdefault(commodity, []).append(district)
+
+    plans = []
+    for commodity, districts in by_commodity.items():
+        if always_state_grid or len(districts) > 1:
+            plans.append(ScrapePlan(commodity, state, tuple(districts), True))
+        else:
+            plans.append(ScrapePlan(commodity, state, (districts[0],), False))
+    return plans
@@ -0,0 +1,343 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class MemoryBackend:
+    """Per-process LRU store of (value, stored_at) pairs"""
+
+    name = 'memory'
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max(1, max_entries)
+        self.evictions = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: Any, stored_at: float):
+        with self._lock:
+            self._entries[key] = (value, stored_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def acquire_lease(self, key: str, owner: str, duration: float) -> bool:
+        # Only one process uses this store, in-process coalescing is enough
+        return True
+
+    def release_lease(self, key: str, owner: str):
+        pass
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class SqliteBackend:
+    """
+    LRU store in a SQLite file shared by every worker on the host
+    Leases in the same file let one worker scrape a key while the others wait
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path: str, max_entries: int = 1000, timeout: float = 30):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.timeout = timeout
+        self.evictions = 0
+        self._local = threading.local()
+
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        connection.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        connection = self._connection()
+        row = connection.execute("SELECT value, stored_at FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        connection.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value: Any, stored_at: float):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                "INSERT OR REPLACE INTO entries (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), stored_at, time.time())
+            )
+            evicted = connection.execute(
+                "DELETE FROM entries WHERE key IN "
+                "(SELECT key FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        self.evictions += max(evicted, 0)
+
+    def delete(self, key: str):
+        self._connection().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def acquire_lease(self, key: str, owner: str, duration: float) -> bool:
+        connection = self._connection()
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            # Leases of workers that died mid-scrape run out on their own
+            connection.execute("DELETE FROM leases WHERE key = ? AND expires_at < ?", (key, now))
+            acquired = connection.execute(
+                "INSERT OR IGNORE INTO leases (key, owner, expires_at) VALUES (?, ?, ?)",
+                (key, owner, now + duration)
+            ).rowcount == 1
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return acquired
+
+    def release_lease(self, key: str, owner: str):
+        self._connection().execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+class _Flight:
+    """One in-progress computation that identical requests wait on"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class PriceCache:
+    """
+    TTL cache in front of the scrapers with single-flight coalescing
+    Concurrent requests for the same key wait on one computation, within the
+    process through an in-flight table and across workers through backend leases
+    Entries past `ttl` but younger than `max_stale` are served immediately
+    while a background refresh replaces them (stale-while-revalidate)
+    """
+
+    def __init__(self, backend, ttl: float = 300, max_stale: Optional[float] = None,
+                 lease_timeout: float = 120, poll_interval: float = 0.5):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_stale = ttl if max_stale is None else max(ttl, max_stale)
+        self.lease_timeout = lease_timeout
+        self.poll_interval = poll_interval
+
+        self._inflight: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+        # Counters for /cache-stats
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stale = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Cached (value, age in seconds), whether or not it has expired"""
+        entry = self.backend.get(key)
+        if entry is None:
+            return None
+        value, stored_at = entry
+        return value, max(0.0, time.time() - stored_at)
+
+    def get_fresh(self, key: str) -> Optional[Any]:
+        entry = self.get(key)
+        if entry is not None and entry[1] < self.ttl:
+            return entry[0]
+        return None
+
+    def lookup(self, key: str, compute: Callable[[], Any]) -> Optional[Tuple[Any, str, float]]:
+        """
+        Answer from the cache without blocking: (value, HIT or STALE, age),
+        or None when `key` has to be computed first
+        """
+        entry = self.get(key)
+        if entry is not None:
+            value, age = entry
+            if age < self.ttl:
+                self._count('hits')
+                return value, 'HIT', age
+            if age < self.max_stale:
+                self._count('stale')
+                self.refresh_async(key, compute)
+                return value, 'STALE', age
+        return None
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Tuple[Any, str, float]:
+        """
+        Return (value, status, age in seconds) where status is HIT, STALE,
+        MISS or COALESCED; a STALE answer schedules a background refresh
+        """
+        answer = self.lookup(key, compute)
+        if answer is not None:
+            return answer
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+
+        if not leader:
+            flight.event.wait()
+            self._count('coalesced')
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, 'COALESCED', 0.0
+
+        value, status = self._lead(key, flight, compute)
+        return value, status, 0.0
+
+    def refresh_async(self, key: str, compute: Callable[[], Any]) -> bool:
+        """Recompute `key` on a background thread unless it is already in flight"""
+        with self._lock:
+            if key in self._inflight:
+                return False
+            flight = self._inflight[key] = _Flight()
+            self.refreshes += 1
+
+        def refresh():
+            try:
+                self._lead(key, flight, compute)
+            except Exception as e:
+                print(f"Background refresh of {key} failed: {e}")
+
+        threading.Thread(target=refresh, daemon=True).start()
+        return True
+
+    def refresh(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Recompute `key` now, joining the computation already in flight if any"""
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self.refreshes += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        return self._lead(key, flight, compute)[0]
+
+    def _lead(self, key: str, flight: _Flight, compute: Callable[[], Any]) -> Tuple[Any, str]:
+        try:
+            flight.value, status = self._compute_with_lease(key, compute)
+            return flight.value, status
+        except BaseException as e:
+            flight.error = e
+            self._count('errors')
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.event.set()
+
+    def _compute_with_lease(self, key: str, compute: Callable[[], Any]) -> Tuple[Any, str]:
+        owner = f"{os.getpid()}-{threading.get_ident()}"
+        deadline = time.monotonic() + self.lease_timeout
+
+        # Another worker holds the lease: wait for its result to land
+        while not self.backend.acquire_lease(key, owner, self.lease_timeout):
+            time.sleep(self.poll_interval)
+            value = self.get_fresh(key)
+            if value is not None:
+                self._count('coalesced')
+                return value, 'COALESCED'
+            if time.monotonic() > deadline:
+                print(f"Gave up waiting on another worker for {key}, scraping it here")
+                break
+
+        try:
+            self._count('misses')
+            value = compute()
+            self.backend.set(key, value, time.time())
+            return value, 'MISS'
+        finally:
+            self.backend.release_lease(key, owner)
+
+    def put(self, key: str, value: Any):
+        """Store a value computed elsewhere, e.g. fanned out from a state grid"""
+        self.backend.set(key, value, time.time())
+
+    def invalidate(self, key: str):
+        self.backend.delete(key)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.stale + self.misses + self.coalesced
+            stats = {
+                'backend': self.backend.name,
+                'ttl_seconds': self.ttl,
+                'max_stale_seconds': self.max_stale,
+                'hits': self.hits,
+                'stale': self.stale,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'refreshes': self.refreshes,
+                'errors': self.errors,
+                'in_flight': len(self._inflight),
+                'hit_rate': round((self.hits + self.stale + self.coalesced) / lookups, 4) if lookups else 0.0
+            }
+        stats['entries'] = len(self.backend)
+        stats['max_entries'] = self.backend.max_entries
+        stats['evictions'] = self.backend.evictions
+        return stats
+
+
+def cache_from_env(ttl: float, max_stale: Optional[float] = None) -> PriceCache:
+    """PriceCache configured from PRICE_CACHE_PATH / PRICE_CACHE_SIZE"""
+    max_entries = int(os.environ.get('PRICE_CACHE_SIZE', 1000))
+    path = os.environ.get('PRICE_CACHE_PATH')
+    backend = SqliteBackend(path, max_entries) if path else MemoryBackend(max_entries)
+    return PriceCache(backend, ttl=ttl, max_stale=max_stale,
+                      lease_timeout=float(os.environ.get('PRICE_CACHE_LEASE_TIMEOUT', 120)))
@@ -0,0 +1,227 @@
+from datetime import date, datetime
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+try:
+    import lxml.html
+except ImportError:  # Fall back to the stdlib tokenizer
+    lxml = None
+
+GRID_ID = "cphBody_GridPriceData"
+
+# Grid header text (lower-cased prefix) -> record field
+HEADER_FIELDS = [
+    ('sl no', 'serial'),
+    ('district', 'district'),
+    ('market', 'market'),
+    ('commodity', 'commodity'),
+    ('variety', 'variety'),
+    ('grade', 'grade'),
+    ('min price', 'min_price'),
+    ('max price', 'max_price'),
+    ('modal price', 'modal_price'),
+    ('price date', 'price_date'),
+]
+
+PRICE_FIELDS = ('min_price', 'max_price', 'modal_price')
+DATE_FORMATS = ('%d %b %Y', '%d-%b-%Y', '%d/%m/%Y', '%Y-%m-%d')
+
+
+def extract_grid_html(page_source: str, grid_id: str = GRID_ID) -> Optional[str]:
+    """Cut the price grid <table> out of a page without parsing the rest of it"""
+    marker = page_source.find(f'id="{grid_id}"')
+    if marker == -1:
+        return None
+    start = page_source.rfind('<table', 0, marker)
+    if start == -1:
+        return None
+
+    # Walk forward to the matching </table>; the pager row can nest a table
+    depth = 0
+    position = start
+    while True:
+        next_open = page_source.find('<table', position + 1)
+        next_close = page_source.find('</table>', position + 1)
+        if next_close == -1:
+            return page_source[start:]
+        if next_open != -1 and next_open < next_close:
+            depth += 1
+            position = next_open
+        elif depth:
+            depth -= 1
+            position = next_close
+        else:
+            return page_source[start:next_close + len('</table>')]
+
+
+class _GridRowParser(HTMLParser):
+    """Collect the text of the top-level cells of each row of one table"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows: List[List[str]] = []
+        self._table_depth = 0
+        self._row = None
+        self._cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'table':
+            self._table_depth += 1
+        elif self._table_depth == 1:
+            if tag == 'tr':
+                self._row = []
+            elif tag in ('td', 'th') and self._row is not None:
+                self._cell = []
+
+    def handle_endtag(self, tag):
+        if tag == 'table':
+            self._table_depth -= 1
+        elif self._table_depth == 1:
+            if tag in ('td', 'th') and self._cell is not None:
+                self._row.append(' '.join(''.join(self._cell).split()))
+                self._cell = None
+            elif tag == 'tr' and self._row is not None:
+                self.rows.append(self._row)
+                self._row = None
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+
+def grid_rows(grid_html: str) -> List[List[str]]:
+    """Cell texts per row of the grid table, header row included"""
+    if lxml is not None:
+        table = lxml.html.fragment_fromstring(grid_html)
+        return [
+            [' '.join(cell.text_content().split()) for cell in row.xpath('./th|./td')]
+            for row in table.xpath('./tr|./tbody/tr|./thead/tr')
+        ]
+
+    parser = _GridRowParser()
+    parser.feed(grid_html)
+    parser.close()
+    return parser.rows
+
+
+def parse_price(text: str) -> Optional[float]:
+    cleaned = text.replace(',', '').replace('Rs.', '').strip()
+    try:
+        return float(cleaned)
+    except ValueError:
+        return None
+
+
+def parse_price_date(text: str) -> Optional[date]:
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text.strip(), date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_price_grid(page_source: str) -> List[Dict]:
+    """
+    Typed records from the agmarknet price grid
+    Cells are mapped by header name; prices are floats (None when missing,
+    e.g. "NR") and price_date is a date
+    """
+    grid_html = extract_grid_html(page_source)
+    if grid_html is None:
+        return []
+
+    rows = grid_rows(grid_html)
+    if not rows:
+        return []
+
+    columns = {}
+    for position, header in enumerate(rows[0]):
+        header = header.lower()
+        for prefix, field in HEADER_FIELDS:
+            if header.startswith(prefix) and field not in columns:
+                columns[field] = position
+                break
+
+    records = []
+    for cells in rows[1:]:
+        # Pager and footer rows do not line up with the header
+        if len(cells) != len(rows[0]):
+            continue
+        record = {field: cells[position] for field, position in columns.items()}
+        for field in PRICE_FIELDS:
+            if field in record:
+                record[field] = parse_price(record[field])
+        if 'price_date' in record:
+            record['price_date'] = parse_price_date(record['price_date'])
+        records.append(record)
+
+    return records
+
+
+def format_price(value: Optional[float]) -> str:
+    if value is None:
+        return ""
+    return f"{value:.0f}" if value.is_integer() else f"{value:.2f}"
+
+
+def price_row(record: Dict, commodity, district, district_found, desired_date) -> Dict:
+    """One typed grid record in the row shape /request returns"""
+    price_date = record.get('price_date')
+    return {
+        "S.No": record.get('serial', ""),
+        "City": record['district'],
+        "Commodity": record.get('commodity') or commodity,
+        "Min Prize": format_price(record.get('min_price')),
+        "Max Prize": format_price(record.get('max_price')),
+        "Model Prize": format_price(record.get('modal_price')),
+        "Date": price_date.strftime('%d %b %Y') if price_date else desired_date.strftime('%d-%b-%Y'),
+        "District_Found": district_found,
+        "Requested_District": district
+    }
+
+
+def has_prices(record: Dict) -> bool:
+    """Whether a record is worth returning: a district and at least one price"""
+    return bool(record.get('district')) and any(record.get(field) is not None for field in PRICE_FIELDS)
+
+
+def state_average_row(averages: List[str], state, commodity, district, desired_date) -> Dict:
+    return {
+        "S.No": "SUMMARY",
+        "City": f"Average for {state}",
+        "Commodity": commodity,
+        "Min Prize": averages[0],
+        "Max Prize": averages[1],
+        "Model Prize": averages[2],
+        "Date": desired_date.strftime('%d-%b-%Y'),
+        "District_Found": False,
+        "Requested_District": district,
+        "Type": "STATE_AVERAGE"
+    }
+
+
+def build_price_response(records: List[Dict], state, commodity, district, district_found,
+                         desired_date) -> List[Dict]:
+    """
+    Rows in the shape /request has always returned, plus a STATE_AVERAGE
+    summary first when the requested district was not found
+    """
+    # Only add if we have meaningful data
+    records = [record for record in records if has_prices(record)]
+    jsonList = [price_row(record, commodity, district, district_found, desired_date) for record in records]
+
+    print(f"Processed {len(jsonList)} data entries")
+
+    # Calculate averages if district wasn't found and we have multiple entries
+    if not district_found and len(jsonList) > 1:
+        averages = []
+        for field in PRICE_FIELDS:
+            values = [record[field] for record in records if record.get(field) is not None]
+            averages.append(f"{sum(values) / len(values):.2f}" if values else "N/A")
+
+        if any(average != "N/A" for average in averages):
+            jsonList.insert(0, state_average_row(averages, state, commodity, district, desired_date))
+            print("Added summary with averages")
+
+    return jsonList
@@ -0,0 +1,359 @@
+import json
+import os
+import re
+import threading
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+EPOCH = date(1970, 1, 1)
+
+# Column file -> dtype; every series directory holds one file per column
+COLUMNS = {
+    'market': np.uint32,
+    'day': np.int32,
+    'min_price': np.float32,
+    'max_price': np.float32,
+    'modal_price': np.float32,
+}
+
+
+def slug(text: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', text.strip().lower()).strip('-') or '_'
+
+
+def to_day(value: date) -> int:
+    return (value - EPOCH).days
+
+
+def from_day(day: int) -> date:
+    return date.fromordinal(EPOCH.toordinal() + int(day))
+
+
+class CorruptSeriesError(Exception):
+    """A series whose column files hold fewer rows than its manifest records"""
+
+
+class PriceSeries:
+    """
+    Columnar price history of one (commodity, state), sorted by date
+    Each column is a flat binary file; markets are stored as ids into
+    markets.json and dates as days since 1970-01-01. manifest.json names the
+    current generation of column files and how many rows are committed.
+    Rows for the newest dates are appended to the current generation; a
+    backfill of older dates writes a new generation and switches to it with
+    one manifest replace, so a crash never leaves columns out of step
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._markets_path = os.path.join(directory, 'markets.json')
+        self._manifest_path = os.path.join(directory, 'manifest.json')
+        self._lock_path = os.path.join(directory, '.lock')
+        self._checked_order = False
+
+    def _column_path(self, column: str, generation: int) -> str:
+        # Generation 0 keeps the file names of series written before manifests
+        suffix = f".{generation}" if generation else ''
+        return os.path.join(self.directory, f"{column}{suffix}.bin")
+
+    def _load_markets(self) -> List[List[str]]:
+        if not os.path.exists(self._markets_path):
+            return []
+        with open(self._markets_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _load_manifest(self) -> Dict:
+        if os.path.exists(self._manifest_path):
+            with open(self._manifest_path, encoding='utf-8') as f:
+                return json.load(f)
+        # Series from before manifests: an interrupted append could leave
+        # some columns one row longer, so only rows every column has count
+        sizes = [os.path.getsize(path) // np.dtype(dtype).itemsize if os.path.exists(path) else 0
+                 for path, dtype in ((self._column_path(column, 0), dtype) for column, dtype in COLUMNS.items())]
+        return {'generation': 0, 'rows': min(sizes)}
+
+    def _write_manifest(self, generation: int, rows: int):
+        with open(self._manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'generation': generation, 'rows': rows}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self._manifest_path + '.tmp', self._manifest_path)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Memory-mapped columns of the committed rows; raises CorruptSeriesError if any is short"""
+        manifest = self._load_manifest()
+        rows = manifest['rows']
+        arrays = {}
+        for column, dtype in COLUMNS.items():
+            if not rows:
+                arrays[column] = np.empty(0, dtype=dtype)
+                continue
+            path = self._column_path(column, manifest['generation'])
+            available = os.path.getsize(path) // np.dtype(dtype).itemsize if os.path.exists(path) else 0
+            if available < rows:
+                raise CorruptSeriesError(f"{path} holds {available} rows, the manifest records {rows}")
+            # Rows past the manifest count are from an append that never committed
+            arrays[column] = np.memmap(path, dtype=dtype, mode='r', shape=(rows,))
+        return arrays
+
+    def _ensure_sorted(self):
+        """Sort a series written in append order (before rows were kept by date), once per process"""
+        if self._checked_order:
+            return
+        with _FileLock(self._lock_path):
+            columns = self.columns()
+            if np.any(np.diff(columns['day']) < 0):
+                order = np.lexsort((columns['market'], columns['day']))
+                self._rewrite_from(0, {column: np.asarray(array)[order] for column, array in columns.items()})
+            self._checked_order = True
+
+    def _append_rows(self, rows: Dict[str, np.ndarray]):
+        """Append to the current generation, committing the rows with the manifest"""
+        manifest = self._load_manifest()
+        for column, dtype in COLUMNS.items():
+            path = self._column_path(column, manifest['generation'])
+            with open(path, 'ab') as f:
+                # Drop rows left behind by an append that never committed
+                f.truncate(manifest['rows'] * np.dtype(dtype).itemsize)
+                rows[column].tofile(f)
+                f.flush()
+                os.fsync(f.fileno())
+        self._write_manifest(manifest['generation'], manifest['rows'] + len(rows['day']))
+
+    def _rewrite_from(self, start: int, rows: Dict[str, np.ndarray]):
+        """
+        Replace every row from position `start` on by writing a new generation
+        of column files and switching the manifest to it. Readers holding the
+        old memory maps are unaffected; the generation before the old one is removed
+        """
+        manifest = self._load_manifest()
+        old_generation = manifest['generation']
+        generation = old_generation + 1
+        for column, dtype in COLUMNS.items():
+            with open(self._column_path(column, generation), 'wb') as f:
+                old_path = self._column_path(column, old_generation)
+                if start and os.path.exists(old_path):
+                    with open(old_path, 'rb') as old:
+                        f.write(old.read(start * np.dtype(dtype).itemsize))
+                np.asarray(rows[column], dtype=dtype).tofile(f)
+                f.flush()
+                os.fsync(f.fileno())
+        self._write_manifest(generation, start + len(rows['day']))
+
+        if old_generation:
+            for column in COLUMNS:
+                try:
+                    os.remove(self._column_path(column, old_generation - 1))
+                except FileNotFoundError:
+                    pass
+
+    def append(self, records: List[Dict]) -> int:
+        """Add (district, market, day) rows not stored yet; returns how many were new"""
+        self._ensure_sorted()
+        with _FileLock(self._lock_path):
+            markets = self._load_markets()
+            market_ids = {(district, market): position for position, (district, market) in enumerate(markets)}
+
+            new_rows = {column: [] for column in COLUMNS}
+            seen = set()
+            for record in records:
+                market_key = (record['district'], record['market'])
+                if market_key not in market_ids:
+                    market_ids[market_key] = len(markets)
+                    markets.append(list(market_key))
+                market_id = market_ids[market_key]
+                day = to_day(record['price_date'])
+                if (market_id, day) in seen:
+                    continue
+                seen.add((market_id, day))
+                new_rows['market'].append(market_id)
+                new_rows['day'].append(day)
+                for column in ('min_price', 'max_price', 'modal_price'):
+                    value = record.get(column)
+                    new_rows[column].append(np.nan if value is None else value)
+
+            if not seen:
+                return 0
+            new_rows = {column: np.asarray(new_rows[column], dtype=dtype) for column, dtype in COLUMNS.items()}
+            order = np.lexsort((new_rows['market'], new_rows['day']))
+            new_rows = {column: array[order] for column, array in new_rows.items()}
+
+            # Only stored rows from the earliest new date on can be duplicates
+            existing = self.columns()
+            start = int(np.searchsorted(existing['day'], new_rows['day'][0], side='left'))
+            tail = {column: np.array(array[start:]) for column, array in existing.items()}
+            last_day = int(existing['day'][-1]) if len(existing['day']) else None
+            del existing
+
+            stored = set(zip(tail['market'].tolist(), tail['day'].tolist()))
+            keep = np.array([key not in stored for key in zip(new_rows['market'].tolist(),
+                                                              new_rows['day'].tolist())])
+            new_rows = {column: array[keep] for column, array in new_rows.items()}
+            if not len(new_rows['day']):
+                return 0
+
+            with open(self._markets_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(markets, f)
+            os.replace(self._markets_path + '.tmp', self._markets_path)
+
+            if last_day is None or new_rows['day'][0] >= last_day:
+                self._append_rows(new_rows)
+            else:
+                # Backfill of older dates: merge into the rows from the earliest new date on
+                merged = {column: np.concatenate((tail[column], new_rows[column])) for column in COLUMNS}
+                order = np.lexsort((merged['market'], merged['day']))
+                self._rewrite_from(start, {column: array[order] for column, array in merged.items()})
+            return len(new_rows['day'])
+
+    def query(self, start: Optional[date] = None, end: Optional[date] = None,
+              district: Optional[str] = None, market: Optional[str] = None) -> Dict[Tuple[str, str], Dict]:
+        """Rows in [start, end] per (district, market), sorted by date"""
+        self._ensure_sorted()
+        columns = self.columns()
+        markets = self._load_markets()
+
+        # Rows are sorted by day, so the date range is one contiguous slice
+        days = columns['day']
+        lower = 0 if start is None else int(np.searchsorted(days, to_day(start), side='left'))
+        upper = len(days) if end is None else int(np.searchsorted(days, to_day(end), side='right'))
+        selected = {column: np.asarray(array[lower:max(lower, upper)]) for column, array in columns.items()}
+
+        if district or market:
+            wanted = [
+                position for position, (market_district, market_name) in enumerate(markets)
+                if (not district or market_district.lower() == district.lower())
+                and (not market or market_name.lower() == market.lower())
+            ]
+            mask = np.isin(selected['market'], wanted)
+            selected = {column: array[mask] for column, array in selected.items()}
+
+        # A stable sort by market keeps each market's rows in date order
+        order = np.argsort(selected['market'], kind='stable')
+        selected = {column: array[order] for column, array in selected.items()}
+
+        series = {}
+        market_ids, starts = np.unique(selected['market'], return_index=True)
+        bounds = list(starts) + [len(order)]
+        for position, market_id in enumerate(market_ids):
+            rows = slice(bounds[position], bounds[position + 1])
+            district_name, market_name = markets[market_id]
+            series[(district_name, market_name)] = {column: selected[column][rows] for column in COLUMNS}
+        return series
+
+
+class _FileLock:
+    """Exclusive lock shared by threads and, where fcntl exists, processes"""
+
+    _thread_locks: Dict[str, threading.Lock] = {}
+    _guard = threading.Lock()
+
+    def __init__(self, path: str):
+        self.path = path
+        with self._guard:
+            self.thread_lock = self._thread_locks.setdefault(path, threading.Lock())
+        self.handle = None
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        if fcntl is not None:
+            self.handle = open(self.path, 'a')
+            fcntl.flock(self.handle, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self.handle is not None:
+            fcntl.flock(self.handle, fcntl.LOCK_UN)
+            self.handle.close()
+            self.handle = None
+        self.thread_lock.release()
+
+
+def rolling_mean(values: np.ndarray, window: int) -> List[Optional[float]]:
+    """Mean of the last `window` observations at each point, ignoring missing prices"""
+    present = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(present, values, 0.0), dtype=np.float64)))
+    counts = np.concatenate(([0], np.cumsum(present)))
+    ends = np.arange(1, len(values) + 1)
+    starts = np.maximum(ends - window, 0)
+    window_counts = counts[ends] - counts[starts]
+    window_sums = sums[ends] - sums[starts]
+    return [round(float(total / count), 2) if count else None
+            for total, count in zip(window_sums, window_counts)]
+
+
+def price_list(values: np.ndarray) -> List[Optional[float]]:
+    return [None if np.isnan(value) else round(float(value), 2) for value in values]
+
+
+class PriceHistoryStore:
+    """Price series for every (commodity, state), under one root directory"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._series: Dict[Tuple[str, str], PriceSeries] = {}
+        self._lock = threading.Lock()
+
+    def series(self, commodity: str, state: str) -> PriceSeries:
+        key = (slug(commodity), slug(state))
+        with self._lock:
+            if key not in self._series:
+                self._series[key] = PriceSeries(os.path.join(self.root, *key))
+            return self._series[key]
+
+    def record_scrape(self, records: List[Dict], commodity: str, state: str, desired_date: datetime) -> int:
+        """Persist the rows of one scraped grid"""
+        rows = []
+        for record in records:
+            if not record.get('district') or all(
+                    record.get(field) is None for field in ('min_price', 'max_price', 'modal_price')):
+                continue
+            rows.append({
+                **record,
+                'market': record.get('market') or record['district'],
+                'price_date': record.get('price_date') or desired_date.date()
+            })
+        if not rows:
+            return 0
+        return self.series(commodity, state).append(rows)
+
+    def history(self, commodity: str, state: str, start: Optional[date] = None, end: Optional[date] = None,
+                district: Optional[str] = None, market: Optional[str] = None, window: int = 7) -> List[Dict]:
+        """Per-market min/max/modal series with a rolling mean of the modal price"""
+        directory = os.path.join(self.root, slug(commodity), slug(state))
+        if not os.path.isdir(directory):
+            return []
+
+        result = []
+        for (district_name, market_name), columns in self.series(commodity, state).query(
+                start, end, district, market).items():
+            modal = columns['modal_price'].astype(np.float64)
+            result.append({
+                'district': district_name,
+                'market': market_name,
+                'dates': [from_day(day).isoformat() for day in columns['day']],
+                'min_price': price_list(columns['min_price']),
+                'max_price': price_list(columns['max_price']),
+                'modal_price': price_list(columns['modal_price']),
+                f'modal_rolling_mean_{window}': rolling_mean(modal, window),
+                'summary': {
+                    'observations': int(len(modal)),
+                    'lowest_min_price': _nan_reduce(np.nanmin, columns['min_price']),
+                    'highest_max_price': _nan_reduce(np.nanmax, columns['max_price']),
+                    'average_modal_price': _nan_reduce(np.nanmean, modal)
+                }
+            })
+        return result
+
+
+def _nan_reduce(function, values: np.ndarray) -> Optional[float]:
+    if not len(values) or np.isnan(values).all():
+        return None
+    return round(float(function(values)), 2)
@@ -0,0 +1,58 @@
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+
+from price_grid import PRICE_FIELDS, has_prices, price_row, state_average_row
+
+
+class StateGrid:
+    """
+    State-wide price grid for one (commodity, state, date), indexed by district
+    Built once from a single scrape; every district query for the state is
+    answered from memory, with the state averages computed up front
+    """
+
+    def __init__(self, records: List[Dict], state: str, commodity: str, desired_date: datetime):
+        self.state = state
+        self.commodity = commodity
+        self.desired_date = desired_date
+        self.records = [record for record in records if has_prices(record)]
+
+        # Prices as a (rows, 3) float matrix, NaN where the grid had none
+        self.prices = np.array(
+            [[np.nan if record.get(field) is None else record[field] for field in PRICE_FIELDS]
+             for record in self.records],
+            dtype=float
+        ).reshape(-1, len(PRICE_FIELDS))
+
+        self.rows_by_district: Dict[str, List[int]] = {}
+        for row, record in enumerate(self.records):
+            self.rows_by_district.setdefault(record['district'].strip().lower(), []).append(row)
+
+        present = ~np.isnan(self.prices)
+        counts = present.sum(axis=0)
+        sums = np.where(present, self.prices, 0.0).sum(axis=0)
+        self.averages = [
+            f"{total / count:.2f}" if count else "N/A" for total, count in zip(sums, counts)
+        ]
+
+    def __len__(self):
+        return len(self.records)
+
+    def districts(self) -> List[str]:
+        return sorted(self.rows_by_district)
+
+    def response(self, district: str) -> List[Dict]:
+        """/request rows for one district, or the whole state with its averages"""
+        rows = self.rows_by_district.get(district.strip().lower())
+        if rows is not None:
+            return [price_row(self.records[row], self.commodity, district, True, self.desired_date)
+                    for row in rows]
+
+        jsonList = [price_row(record, self.commodity, district, False, self.desired_date)
+                    for record in self.records]
+        if len(jsonList) > 1 and any(average != "N/A" for average in self.averages):
+            jsonList.insert(0, state_average_row(self.averages, self.state, self.commodity,
+                                                 district, self.desired_date))
+        return jsonList
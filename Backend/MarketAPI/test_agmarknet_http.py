@@ -0,0 +1,144 @@
+import os
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from agmarknet_http import AgmarknetFormError, AgmarknetHttpClient, AspNetForm, choose_district
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+DESIRED_DATE = datetime(2024, 1, 4)
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class StubAgmarknetServer:
+    """Local stand-in for SearchCmmMkt.aspx serving recorded pages"""
+
+    # __VIEWSTATE each recorded page carries, used to check postbacks echo it
+    VIEWSTATES = {
+        "search_form.html": "VS-INITIAL",
+        "state_results.html": "VS-STATE",
+        "district_results.html": "VS-DISTRICT",
+    }
+
+    def __init__(self):
+        self.posts = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.respond(200, "search_form.html")
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                form = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+                stub.posts.append(form)
+
+                if form.get("__VIEWSTATE") not in stub.VIEWSTATES.values() or form.get("btnGo") != "Go":
+                    self.respond(500, None)
+                elif form.get("ddlDistrict", "0") == "1":
+                    self.respond(200, "district_results.html")
+                else:
+                    self.respond(200, "state_results.html")
+
+            def respond(self, status, fixture):
+                body = load_fixture(fixture).encode() if fixture else b"Invalid postback"
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/SearchCmmMkt.aspx"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def test_parse_form_state():
+    form = AspNetForm(load_fixture("search_form.html"), "https://agmarknet.gov.in/SearchCmmMkt.aspx")
+    assert form.fields["__VIEWSTATE"] == "VS-INITIAL"
+    assert form.fields["__EVENTVALIDATION"] == "EV-INITIAL"
+    assert form.fields["ddlCommodity"] == "0"
+    assert form.submits == {"btnGo": "Go", "btnReset": "Reset"}
+    assert form.action == "https://agmarknet.gov.in/SearchCmmMkt.aspx"
+
+    form.select_text("ddlCommodity", "potato")
+    assert form.fields["ddlCommodity"] == "24"
+
+
+def test_choose_district():
+    options = [("0", "--Select--"), ("1", "Bangalore"), ("2", "Mysore")]
+    assert choose_district(options, "mysore") == (True, "2")
+    assert choose_district(options, "Udupi") == (False, "0")
+    assert choose_district([("7", "Mysore")], "Udupi") == (False, "7")
+    assert choose_district([], "Udupi") == (False, None)
+
+
+def test_fetch_prices_for_known_district():
+    with StubAgmarknetServer() as stub:
+        client = AgmarknetHttpClient(url=stub.url)
+        rows = client.fetch_prices("Karnataka", "Potato", "Bangalore", DESIRED_DATE)
+
+    assert [row["City"] for row in rows] == ["Bangalore", "Bangalore"]
+    assert rows[0]["Model Prize"] == "1600"
+    assert rows[0]["Date"] == "04 Jan 2024"
+    assert all(row["District_Found"] for row in rows)
+
+    # The first postback echoes the initial form state with our selections
+    first, second = stub.posts
+    assert first["__VIEWSTATE"] == "VS-INITIAL"
+    assert first["__EVENTVALIDATION"] == "EV-INITIAL"
+    assert (first["ddlCommodity"], first["ddlState"], first["txtDate"]) == ("24", "KK", "04-Jan-2024")
+    assert "btnReset" not in first
+
+    # The second one carries the state page's view state and the district
+    assert second["__VIEWSTATE"] == "VS-STATE"
+    assert second["ddlDistrict"] == "1"
+
+
+def test_unknown_district_falls_back_to_state_average():
+    with StubAgmarknetServer() as stub:
+        client = AgmarknetHttpClient(url=stub.url)
+        rows = client.fetch_prices("Karnataka", "Potato", "Udupi", DESIRED_DATE)
+
+    summary = rows[0]
+    assert summary["Type"] == "STATE_AVERAGE"
+    assert summary["Min Prize"] == "1300.00"
+    assert summary["Model Prize"] == "1475.00"
+    assert len(rows) == 6
+    assert not any(row["District_Found"] for row in rows)
+    assert stub.posts[1]["ddlDistrict"] == "0"
+
+
+def test_unknown_commodity_raises():
+    with StubAgmarknetServer() as stub:
+        client = AgmarknetHttpClient(url=stub.url)
+        try:
+            client.fetch_prices("Karnataka", "Saffron", "Bangalore", DESIRED_DATE)
+        except AgmarknetFormError as e:
+            assert "Saffron" in str(e)
+        else:
+            raise AssertionError("Expected AgmarknetFormError")
+        assert stub.posts == []
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"{name}: ok")
@@ -0,0 +1,52 @@
+from price_cache import MemoryBackend, PriceCache
+from prewarm import PrewarmCrawler, RequestLog
+
+
+def test_request_log_counts_hot_combinations_in_memory():
+    log = RequestLog(max_keys=4)
+    for district in ['Mysore', 'Mysore', 'Mysore', 'Hassan', 'Hassan', 'Udupi']:
+        log.record('Potato', 'Karnataka', district)
+
+    assert log.top(2) == [('Potato', 'Karnataka', 'Mysore'), ('Potato', 'Karnataka', 'Hassan')]
+
+    for district in range(10):
+        log.record('Onion', 'Karnataka', str(district))
+    assert len(log._counts) <= 4
+    assert log.top(1) == [('Potato', 'Karnataka', 'Mysore')]
+
+
+def test_request_log_file_is_compacted_to_its_tail(tmp_path):
+    path = tmp_path / "requests.jsonl"
+    log = RequestLog(str(path), max_lines=10)
+    for position in range(35):
+        log.record('Potato', 'Karnataka', 'Mysore' if position < 25 else 'Hassan')
+
+    assert sum(1 for _ in open(path)) < 20
+    # Only the last 10 lines count: 10 Hassan requests
+    assert log.top(1) == [('Potato', 'Karnataka', 'Hassan')]
+
+
+def test_crawl_once_skips_fresh_keys_and_crawls_the_rest():
+    cache = PriceCache(MemoryBackend(), ttl=300)
+    log = RequestLog()
+    log.record('Onion', 'Karnataka', 'Hassan')
+    fetched = []
+
+    def fetch(state, commodity, district):
+        fetched.append((commodity, state, district))
+        return [{'district': district}]
+
+    def key_for(commodity, state, district):
+        return f"{commodity}|{state}|{district}"
+
+    cache.put(key_for('Potato', 'Karnataka', 'Mysore'), [{'district': 'Mysore'}])
+    crawler = PrewarmCrawler(cache, fetch, key_for, log,
+                             watchlist=[('Potato', 'Karnataka', 'Mysore'), ('Potato', 'Karnataka', 'Udupi')],
+                             min_request_interval=0)
+
+    summary = crawler.crawl_once()
+
+    assert summary['combinations'] == 3
+    assert (summary['crawled'], summary['skipped'], summary['failed']) == (2, 1, 0)
+    assert sorted(fetched) == [('Onion', 'Karnataka', 'Hassan'), ('Potato', 'Karnataka', 'Udupi')]
+    assert cache.get(key_for('Onion', 'Karnataka', 'Hassan'))[0] == [{'district': 'Hassan'}]
@@ -0,0 +1,89 @@
+import json
+import os
+
+import pytest
+
+os.environ['PRICE_HISTORY_DIR'] = ''
+import APIwebScraping
+from price_batch import ScrapePlan, batch_queries, plan_scrapes
+from price_cache import MemoryBackend, PriceCache
+from prewarm import RequestLog
+
+
+def test_batch_queries_are_unique_pairs_in_request_order():
+    assert batch_queries(["Potato", " potato", "Onion"], ["Mysore", "Hassan ", "mysore"]) == [
+        ("Potato", "Mysore"), ("Potato", "Hassan"), ("Onion", "Mysore"), ("Onion", "Hassan")]
+
+
+def test_plan_scrapes_shares_state_grids_between_districts():
+    queries = [("Potato", "Mysore"), ("Onion", "Hassan"), ("Potato", "Hassan")]
+
+    assert plan_scrapes("Karnataka", queries) == [
+        ScrapePlan("Potato", "Karnataka", ("Mysore", "Hassan"), True),
+        ScrapePlan("Onion", "Karnataka", ("Hassan",), False),
+    ]
+    assert all(plan.state_grid for plan in plan_scrapes("Karnataka", queries, always_state_grid=True))
+
+
+class FakeGrid:
+    def response(self, district):
+        return [{"City": district, "District_Found": True}]
+
+
+@pytest.fixture
+def batch_api(monkeypatch):
+    scrapes = []
+
+    def script(state, commodity, district):
+        scrapes.append(("district", commodity, district))
+        return [{"City": district, "District_Found": True}]
+
+    def state_grid(state, commodity):
+        scrapes.append(("state", commodity, state))
+        if commodity == "Garlic":
+            raise RuntimeError("agmarknet unavailable")
+        return FakeGrid()
+
+    monkeypatch.setattr(APIwebScraping, 'script', script)
+    monkeypatch.setattr(APIwebScraping, 'state_grid', state_grid)
+    monkeypatch.setattr(APIwebScraping, 'cache', PriceCache(MemoryBackend(), ttl=300))
+    monkeypatch.setattr(APIwebScraping, 'request_log', RequestLog())
+    return scrapes
+
+
+def post_batch(body):
+    response = APIwebScraping.app.test_client().post('/request/batch', json=body)
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    return response, lines
+
+
+def test_batch_streams_cached_and_scraped_pairs(batch_api):
+    APIwebScraping.cache.put(APIwebScraping.price_cache_key("Onion", "Karnataka", "Mysore"), [{"City": "cached"}])
+
+    response, lines = post_batch({"state": "Karnataka", "commodities": ["Onion", "Potato", "Garlic"],
+                                  "districts": ["Mysore", "Hassan"]})
+
+    assert response.mimetype == "application/x-ndjson"
+    results = {(line["commodity"], line["district"]): line for line in lines[:-1]}
+    assert len(results) == 6
+    assert lines[0]["commodity"] == "Onion" and lines[0]["data"] == [{"City": "cached"}]
+    assert results[("Potato", "Hassan")]["cache"] == "STATE_GRID"
+    assert results[("Onion", "Hassan")]["data"] == [{"City": "Hassan", "District_Found": True}]
+    assert "agmarknet unavailable" in results[("Garlic", "Mysore")]["error"]
+    assert "agmarknet unavailable" in results[("Garlic", "Hassan")]["error"]
+    # One district scrape for the lone uncached Onion pair, one state grid per other commodity
+    assert sorted(batch_api) == [("district", "Onion", "Hassan"), ("state", "Garlic", "Karnataka"),
+                                 ("state", "Potato", "Karnataka")]
+
+    summary = lines[-1]["summary"]
+    assert (summary["queries"], summary["from_cache"], summary["scrapes"], summary["failed"]) == (6, 1, 3, 2)
+
+
+def test_batch_rejects_malformed_and_oversized_requests(batch_api):
+    client = APIwebScraping.app.test_client()
+
+    assert client.post('/request/batch', json={"state": "Karnataka", "commodities": ["Potato"]}).status_code == 400
+    too_many = {"state": "Karnataka", "commodities": [f"c{i}" for i in range(11)],
+                "districts": [f"d{i}" for i in range(10)]}
+    assert client.post('/request/batch', json=too_many).status_code == 400
+    assert batch_api == []
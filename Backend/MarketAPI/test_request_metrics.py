@@ -0,0 +1,43 @@
+import os
+
+import pytest
+
+os.environ['PRICE_HISTORY_DIR'] = ''
+import APIwebScraping
+from price_cache import MemoryBackend, PriceCache
+from prewarm import RequestLog
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def script(state, commodity, district):
+        if commodity == "Garlic":
+            raise RuntimeError("agmarknet unavailable")
+        return [{"City": district, "District_Found": True}]
+
+    monkeypatch.setattr(APIwebScraping, 'script', script)
+    monkeypatch.setattr(APIwebScraping, 'cache', PriceCache(MemoryBackend(), ttl=300))
+    monkeypatch.setattr(APIwebScraping, 'request_log', RequestLog())
+    return APIwebScraping.app.test_client()
+
+
+def request_count(status):
+    prefix = f'scraper_http_request_seconds_count{{endpoint="/request",method="GET",status="{status}"}} '
+    for line in APIwebScraping.metrics.registry.render().splitlines():
+        if line.startswith(prefix):
+            return int(line[len(prefix):])
+    return 0
+
+
+def test_failed_scrape_answers_502_and_is_counted_as_an_error(client):
+    before = {status: request_count(status) for status in (200, 400, 502)}
+
+    ok = client.get('/request', query_string={'commodity': 'Potato', 'state': 'Karnataka', 'district': 'Mysore'})
+    failed = client.get('/request', query_string={'commodity': 'Garlic', 'state': 'Karnataka', 'district': 'Mysore'})
+    missing = client.get('/request', query_string={'commodity': 'Potato'})
+
+    assert ok.status_code == 200
+    assert failed.status_code == 502
+    assert failed.get_json() == {"error": "agmarknet unavailable"}
+    assert missing.status_code == 400
+    assert {status: request_count(status) - before[status] for status in before} == {200: 1, 400: 1, 502: 1}
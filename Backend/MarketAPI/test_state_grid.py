@@ -0,0 +1,36 @@
+from price_grid import build_price_response, parse_price_grid
+from state_grid import StateGrid
+from test_agmarknet_http import DESIRED_DATE, load_fixture
+
+
+def state_grid():
+    return parse_price_grid(load_fixture("state_results.html"))
+
+
+def test_district_answer_matches_a_district_scrape():
+    records = state_grid()
+    grid = StateGrid(records, "Karnataka", "Potato", DESIRED_DATE)
+
+    bangalore = [record for record in records if record["district"] == "Bangalore"]
+    assert grid.response("bangalore ") == build_price_response(bangalore, "Karnataka", "Potato", "bangalore ",
+                                                               True, DESIRED_DATE)
+    assert len(grid.response("Mysore")) == 1
+
+
+def test_unknown_district_gets_the_state_with_its_averages():
+    records = state_grid()
+    grid = StateGrid(records, "Karnataka", "Potato", DESIRED_DATE)
+
+    response = grid.response("Udupi")
+
+    assert response == build_price_response(records, "Karnataka", "Potato", "Udupi", False, DESIRED_DATE)
+    assert len(response) == len(records) + 1
+    assert not any(row.get("District_Found") for row in response)
+
+
+def test_districts_are_indexed_once():
+    grid = StateGrid(state_grid(), "Karnataka", "Potato", DESIRED_DATE)
+
+    assert len(grid) == 5
+    assert grid.districts() == ["bangalore", "belgaum", "hassan", "mysore"]
+    assert grid.averages == ["1300.00", "1600.00", "1475.00"]
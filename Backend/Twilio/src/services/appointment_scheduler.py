@@ -1,12 +1,26 @@
+import heapq
+import itertools
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import threading
 import time
 from .twilio_service import TwilioService
 import re
 
+# Reminder calls placed at once, so one slow Twilio request doesn't hold back the next reminder
+REMINDER_CALL_WORKERS = int(os.getenv('REMINDER_CALL_WORKERS', '4'))
+
+
+def local_datetime(value: str) -> datetime:
+    """Parse a stored ISO time as naive local time, like datetime.now(); offsets are converted"""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
 class AppointmentScheduler:
     def __init__(self):
         self.twilio_service = TwilioService()
@@ -14,6 +28,29 @@ class AppointmentScheduler:
         self.appointments: List[Dict] = self.load_appointments()
         self.running = False
         self.scheduler_thread = None
+
+        # Pending reminders as (reminder time, sequence, appointment), earliest first;
+        # the condition wakes the scheduler when an earlier reminder is pushed
+        self._wakeup = threading.Condition()
+        # Orders file writes, which happen outside the condition
+        self._save_lock = threading.Lock()
+        self._sequence = itertools.count()
+        self._reminders: List[Tuple[datetime, int, Dict]] = []
+        self._save_pending = False
+        self._calls = ThreadPoolExecutor(max_workers=REMINDER_CALL_WORKERS, thread_name_prefix='reminder-call')
+        # Bookings and call outcomes are written by one background saver, never on
+        # request or scheduler threads
+        self._saver = ThreadPoolExecutor(max_workers=1, thread_name_prefix='appointment-save')
+        for appointment in self.appointments:
+            if appointment.get("status") == "scheduled":
+                entry = self._reminder_entry(appointment)
+                if entry:
+                    self._reminders.append(entry)
+        heapq.heapify(self._reminders)
+
+        # Reminders left from a previous run fire without waiting for a new booking
+        if self._reminders:
+            self.start_scheduler()
     
     def load_appointments(self) -> List[Dict]:
         """Load appointments from file"""
@@ -26,12 +63,41 @@ class AppointmentScheduler:
         return []
     
     def save_appointments(self):
-        """Save appointments to file"""
+        """Save appointments to file, from a snapshot taken under the scheduler lock"""
         try:
-            with open(self.appointments_file, 'w') as f:
-                json.dump(self.appointments, f, indent=2)
+            with self._save_lock:
+                with self._wakeup:
+                    snapshot = [dict(appointment) for appointment in self.appointments]
+                with open(self.appointments_file, 'w') as f:
+                    json.dump(snapshot, f, indent=2)
         except Exception as e:
             print(f"Error saving appointments: {e}")
+
+    def _request_save(self):
+        """Queue a save unless one is already queued; call with the scheduler lock held"""
+        if not self._save_pending:
+            self._save_pending = True
+            self._saver.submit(self._save_pending_appointments)
+
+    def _save_pending_appointments(self):
+        # Updates made after this point queue the next save
+        with self._wakeup:
+            self._save_pending = False
+        self.save_appointments()
+
+    def _reminder_entry(self, appointment: Dict) -> Optional[Tuple[datetime, int, Dict]]:
+        """Heap entry of a stored appointment in local time, None if its times can't be read"""
+        try:
+            if "reminder_datetime" in appointment:
+                reminder_time = local_datetime(appointment["reminder_datetime"])
+            else:
+                # Older records only kept the appointment time
+                appointment_time = appointment.get("appointment_datetime") or appointment["appointment_date"]
+                reminder_time = local_datetime(appointment_time) - timedelta(hours=1)
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Skipping reminder for appointment {appointment.get('id')}: {e}")
+            return None
+        return reminder_time, next(self._sequence), appointment
     
     def schedule_appointment_reminder(self, phone_number: str, appointment_datetime: str, appointment_type: str = "gynacologist") -> Dict:
         """Schedule an appointment reminder 1 hour before the appointment"""
@@ -60,8 +126,12 @@ class AppointmentScheduler:
                 "created_at": datetime.now().isoformat()
             }
             
-            self.appointments.append(appointment)
-            self.save_appointments()
+            with self._wakeup:
+                self.appointments.append(appointment)
+                heapq.heappush(self._reminders, (reminder_time, next(self._sequence), appointment))
+                self._wakeup.notify()
+                # Rewriting the file is O(appointments); a burst of bookings shares one queued save
+                self._request_save()
             
             # Start scheduler if not running
             if not self.running:
@@ -204,48 +274,65 @@ class AppointmentScheduler:
             print("Appointment scheduler started")
     
     def _scheduler_loop(self):
-        """Main scheduler loop - checks every 30 seconds"""
+        """Main scheduler loop - sleeps until the earliest pending reminder or a new booking"""
         while self.running:
             try:
-                now = datetime.now()
-                
-                for appointment in self.appointments[:]:
-                    if appointment["status"] != "scheduled":
+                with self._wakeup:
+                    due = []
+                    now = datetime.now()
+                    while self._reminders and self._reminders[0][0] <= now:
+                        due.append(heapq.heappop(self._reminders)[2])
+
+                    if not due:
+                        timeout = (self._reminders[0][0] - now).total_seconds() if self._reminders else None
+                        self._wakeup.wait(timeout)
                         continue
-                    
-                    reminder_time = datetime.fromisoformat(appointment["reminder_datetime"])
-                    
-                    # Check if it's time for the reminder (within 1 minute window)
-                    if now >= reminder_time and now <= reminder_time + timedelta(minutes=1):
-                        print(f"Making reminder call for appointment: {appointment['id']}")
-                        
-                        try:
-                            call_sid = self.twilio_service.make_appointment_reminder_call(
-                                appointment["phone_number"],
-                                appointment["appointment_type"]
-                            )
-                            
-                            appointment["status"] = "called"
-                            appointment["call_sid"] = call_sid
-                            appointment["called_at"] = now.isoformat()
-                            
-                            print(f"Reminder call made successfully: {call_sid}")
-                            
-                        except Exception as e:
-                            print(f"Failed to make reminder call: {e}")
-                            appointment["status"] = "failed"
-                            appointment["error"] = str(e)
-                        
-                        self.save_appointments()
-                
-                time.sleep(30)  # Check every 30 seconds
-                
+
+                for appointment in due:
+                    self._calls.submit(self._send_reminder, appointment)
+
             except Exception as e:
                 print(f"Error in scheduler loop: {e}")
                 time.sleep(60)
-    
+
+    def _send_reminder(self, appointment: Dict):
+        """Place one reminder call; reminders whose appointment has already passed are marked missed"""
+        now = datetime.now()
+        with self._wakeup:
+            # The appointment may have been updated since it was queued
+            if appointment.get("status") != "scheduled":
+                return
+            try:
+                appointment_time = local_datetime(appointment.get("appointment_datetime") or appointment.get("appointment_date"))
+            except (TypeError, ValueError):
+                appointment_time = None
+            phone_number = appointment.get("phone_number")
+            appointment_type = appointment.get("appointment_type")
+
+            if appointment_time and appointment_time <= now:
+                print(f"Skipping reminder for past appointment: {appointment['id']}")
+                appointment["status"] = "missed"
+                self._request_save()
+                return
+
+        # The call itself runs without the lock; only its outcome is applied under it
+        print(f"Making reminder call for appointment: {appointment['id']}")
+        try:
+            call_sid = self.twilio_service.make_appointment_reminder_call(phone_number, appointment_type)
+            outcome = {"status": "called", "call_sid": call_sid, "called_at": now.isoformat()}
+            print(f"Reminder call made successfully: {call_sid}")
+
+        except Exception as e:
+            print(f"Failed to make reminder call: {e}")
+            outcome = {"status": "failed", "error": str(e)}
+
+        # One queued save covers a burst of finished calls
+        with self._wakeup:
+            appointment.update(outcome)
+            self._request_save()
+
     def get_appointments(self, phone_number: Optional[str] = None) -> List[Dict]:
         """Get appointments"""
-        if phone_number:
-            return [apt for apt in self.appointments if apt["phone_number"] == phone_number]
-        return self.appointments
\ No newline at end of file
+        with self._wakeup:
+            return [dict(apt) for apt in self.appointments
+                    if not phone_number or apt["phone_number"] == phone_number]
\ No newline at end of file
@@ -0,0 +1,121 @@
+import json
+import os
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from services import appointment_scheduler
+from services.appointment_scheduler import AppointmentScheduler
+
+
+class FakeTwilioService:
+    def __init__(self):
+        self.calls = []
+        self.called = threading.Event()
+
+    def make_appointment_reminder_call(self, phone_number, appointment_type):
+        self.calls.append((phone_number, appointment_type))
+        self.called.set()
+        return f"CA{len(self.calls)}"
+
+
+@pytest.fixture
+def make_scheduler(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(appointment_scheduler, 'TwilioService', FakeTwilioService)
+    schedulers = []
+
+    def make(appointments=None):
+        if appointments is not None:
+            with open("scheduled_appointments.json", 'w') as f:
+                json.dump(appointments, f)
+        scheduler = AppointmentScheduler()
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield make
+    for scheduler in schedulers:
+        with scheduler._wakeup:
+            scheduler.running = False
+            scheduler._wakeup.notify()
+        scheduler._calls.shutdown(wait=True)
+        scheduler._saver.shutdown(wait=True)
+
+
+def stored(appointment_id, appointment_time, reminder_time=None):
+    appointment = {"id": appointment_id, "phone_number": "+910000000000", "appointment_type": "gynacologist",
+                   "appointment_datetime": appointment_time.isoformat(), "status": "scheduled"}
+    if reminder_time is not None:
+        appointment["reminder_datetime"] = reminder_time.isoformat()
+    return appointment
+
+
+def saved(scheduler):
+    scheduler._saver.submit(lambda: None).result()
+    with open(scheduler.appointments_file) as f:
+        return {appointment["id"]: appointment for appointment in json.load(f)}
+
+
+def test_an_earlier_booking_wakes_the_scheduler(make_scheduler):
+    scheduler = make_scheduler()
+    now = datetime.now()
+    scheduler.schedule_appointment_reminder("+910000000001", (now + timedelta(days=2)).isoformat())
+    assert not scheduler.twilio_service.called.wait(0.2)
+
+    result = scheduler.schedule_appointment_reminder("+910000000002", (now + timedelta(hours=1, seconds=0.5)).isoformat())
+
+    assert result["success"]
+    assert scheduler.twilio_service.called.wait(5)
+    assert scheduler.twilio_service.calls == [("+910000000002", "gynacologist")]
+
+
+def test_past_due_reminders_fire_on_startup_and_past_appointments_are_missed(make_scheduler):
+    now = datetime.now()
+    scheduler = make_scheduler([
+        stored("due", now + timedelta(minutes=30), now - timedelta(minutes=30)),
+        stored("past", now - timedelta(hours=2)),
+    ])
+
+    assert scheduler.twilio_service.called.wait(5)
+    scheduler._calls.shutdown(wait=True)
+
+    appointments = saved(scheduler)
+    assert scheduler.twilio_service.calls == [("+910000000000", "gynacologist")]
+    assert appointments["due"]["status"] == "called"
+    assert appointments["past"]["status"] == "missed"
+
+
+def test_a_burst_of_bookings_is_saved_in_one_write(make_scheduler, monkeypatch):
+    scheduler = make_scheduler()
+    writes = []
+    save_appointments = scheduler.save_appointments
+    monkeypatch.setattr(scheduler, 'save_appointments', lambda: (writes.append(1), save_appointments()))
+    # Hold the saver so every booking finds a save already queued
+    release = threading.Event()
+    scheduler._saver.submit(release.wait)
+
+    appointment_time = datetime.now() + timedelta(days=1)
+    for number in range(5):
+        scheduler.schedule_appointment_reminder(f"+91000000000{number}", appointment_time.isoformat())
+    release.set()
+
+    assert len(saved(scheduler)) == 5
+    assert writes == [1]
+
+
+def test_naive_and_aware_reminder_times_load_as_local_time(make_scheduler):
+    later = datetime.now() + timedelta(days=1)
+    aware = (later + timedelta(hours=1)).astimezone(timezone(timedelta(hours=5, minutes=30)))
+    scheduler = make_scheduler([
+        stored("aware", aware + timedelta(hours=1), aware),
+        stored("naive", later + timedelta(hours=1), later),
+    ])
+
+    reminders = sorted(scheduler._reminders)
+
+    assert [appointment["id"] for _, _, appointment in reminders] == ["naive", "aware"]
+    assert all(reminder_time.tzinfo is None for reminder_time, _, _ in reminders)
+    assert reminders[1][0] == later + timedelta(hours=1)
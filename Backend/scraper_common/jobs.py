@@ -0,0 +1,201 @@
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, Optional
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class JobQueueFull(Exception):
+    """Raised when too many scrape jobs are already waiting"""
+
+
+class Job:
+    """One background scrape; identical requests share the same job"""
+
+    def __init__(self, key: str):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = PENDING
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.requests = 1
+        self.event = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def to_dict(self) -> Dict:
+        data = {
+            'job_id': self.id,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'merged_requests': self.requests
+        }
+        if self.status == DONE:
+            data['result'] = self.result
+        elif self.status == FAILED:
+            data['error'] = self.error
+        return data
+
+
+class JobQueue:
+    """
+    Runs scrapes on a bounded thread pool so request workers return at once
+    Submitting a key that is already queued or running returns the existing
+    job; finished jobs are kept for `result_ttl` seconds and reused meanwhile
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 50, result_ttl: float = 300):
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='scrape-job')
+        self._jobs: Dict[str, Job] = {}
+        self._by_key: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+        # Counters for the stats endpoints
+        self.submitted = 0
+        self.merged = 0
+        self.completed = 0
+        self.failed = 0
+
+    def submit(self, key: str, compute: Callable[[], Any]) -> Job:
+        with self._lock:
+            self._purge()
+            job = self._by_key.get(key)
+            if job is not None and job.status != FAILED:
+                job.requests += 1
+                self.merged += 1
+                return job
+
+            pending = sum(1 for job in self._jobs.values() if not job.finished)
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"{pending} scrape jobs are already queued")
+
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._by_key[key] = job
+            self.submitted += 1
+
+        self._executor.submit(self._run, job, compute)
+        return job
+
+    def _run(self, job: Job, compute: Callable[[], Any]):
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = compute()
+            job.status = DONE
+        except Exception as e:
+            print(f"Job {job.id} for {job.key} failed: {e}")
+            job.error = str(e)
+            job.status = FAILED
+        job.finished_at = time.time()
+        with self._lock:
+            if job.status == DONE:
+                self.completed += 1
+            else:
+                self.failed += 1
+                # Let the next request retry instead of reusing the failure
+                if self._by_key.get(job.key) is job:
+                    del self._by_key[job.key]
+        job.event.set()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._purge()
+            return self._jobs.get(job_id)
+
+    def _purge(self):
+        cutoff = time.time() - self.result_ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and job.finished_at < cutoff]
+        for job_id in expired:
+            job = self._jobs.pop(job_id)
+            if self._by_key.get(job.key) is job:
+                del self._by_key[job.key]
+
+    def events(self, job: Job, heartbeat: float = 15) -> Iterator[str]:
+        """Server-sent events for a job: status updates, then the result or error"""
+        yield f"event: status\ndata: {json.dumps({'job_id': job.id, 'status': job.status})}\n\n"
+        while not job.event.wait(heartbeat):
+            yield f"event: status\ndata: {json.dumps({'job_id': job.id, 'status': job.status})}\n\n"
+        event = 'result' if job.status == DONE else 'error'
+        yield f"event: {event}\ndata: {json.dumps(job.to_dict())}\n\n"
+
+    def stats(self) -> Dict:
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+            return {
+                'max_workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'pending': statuses.count(PENDING),
+                'running': statuses.count(RUNNING),
+                'retained': len(statuses),
+                'submitted': self.submitted,
+                'merged': self.merged,
+                'completed': self.completed,
+                'failed': self.failed
+            }
+
+
+def job_response(job: Job):
+    """202 with the job state while it runs, 200 with the data once it is done"""
+    from flask import jsonify
+
+    if job.status == DONE:
+        response = jsonify(job.result)
+        response.headers['X-Job-Id'] = job.id
+        status = 200
+    else:
+        response = jsonify(job.to_dict())
+        response.headers['Location'] = f"/jobs/{job.id}"
+        status = 500 if job.status == FAILED else 202
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response, status
+
+
+def register_job_routes(app, queue: JobQueue):
+    """GET /jobs/<id>, GET /jobs/<id>/events (server-sent events) and GET /job-stats"""
+    from flask import Response, jsonify, stream_with_context
+
+    def not_found(job_id):
+        response = jsonify({"error": f"Unknown or expired job {job_id}"})
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        return response, 404
+
+    @app.route('/jobs/<job_id>', methods=['GET'])
+    def jobPage(job_id):
+        job = queue.get(job_id)
+        if job is None:
+            return not_found(job_id)
+        response = jsonify(job.to_dict())
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        return response
+
+    @app.route('/jobs/<job_id>/events', methods=['GET'])
+    def jobEventsPage(job_id):
+        job = queue.get(job_id)
+        if job is None:
+            return not_found(job_id)
+        response = Response(stream_with_context(queue.events(job)), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        return response
+
+    @app.route('/job-stats', methods=['GET'])
+    def jobStatsPage():
+        return jsonify(queue.stats())
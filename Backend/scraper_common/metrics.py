@@ -0,0 +1,187 @@
+import bisect
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Seconds; scrapes run from tens of milliseconds (cache) to about a minute
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 60)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with labels, e.g. failures by scraper and engine"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in values]
+
+
+class CallbackMetric:
+    """Counter or gauge read from existing stats when /metrics is scraped"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 callback: Callable[[], Dict[Tuple, float]], kind: str = 'counter'):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self.kind = kind
+
+    def samples(self) -> List[str]:
+        try:
+            values = self.callback()
+        except Exception as e:
+            print(f"Could not collect {self.name}: {e}")
+            return []
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+                for key, value in sorted(values.items())]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, e.g. seconds per scrape phase"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            values = self._values.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+            values[position] += 1
+            values[-1] += value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._values.items())
+        lines = []
+        for key, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), values[:-1]):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(values[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Metrics of one app, rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, labelnames: Sequence[str],
+                 callback: Callable[[], Dict[Tuple, float]], kind: str = 'counter') -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, labelnames, callback, kind))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+class ScraperMetrics:
+    """The metrics both scraper APIs export"""
+
+    def __init__(self, scraper: str, registry: Optional[Registry] = None):
+        self.scraper = scraper
+        self.registry = registry or Registry()
+        self.phase_seconds = self.registry.histogram(
+            'scraper_phase_seconds', 'Time spent in each scrape phase', ['scraper', 'phase', 'outcome'])
+        self.request_seconds = self.registry.histogram(
+            'scraper_http_request_seconds', 'Time to answer each API endpoint', ['endpoint', 'method', 'status'])
+        self.scrapes = self.registry.counter(
+            'scraper_scrapes_total', 'Scrapes run, by engine and outcome', ['scraper', 'engine', 'outcome'])
+        self.fallbacks = self.registry.counter(
+            'scraper_district_fallbacks_total', 'Scrapes answered with state-level data (District_Found=False)',
+            ['scraper'])
+
+    def observe_phase(self, phase: str, seconds: float, timed_out: bool = False):
+        """LatencyTracker hook: one histogram sample per finished step"""
+        self.phase_seconds.observe(seconds, scraper=self.scraper, phase=phase,
+                                   outcome='timeout' if timed_out else 'ok')
+
+    def scrape(self, engine: str, outcome: str):
+        self.scrapes.inc(scraper=self.scraper, engine=engine, outcome=outcome)
+
+    def fallback(self):
+        self.fallbacks.inc(scraper=self.scraper)
+
+    def register_routes(self, app):
+        """Time every request per endpoint and serve GET /metrics"""
+        from flask import Response, g, request
+
+        @app.before_request
+        def start_request_timer():
+            g.metrics_started = time.monotonic()
+
+        @app.after_request
+        def observe_request(response):
+            started = getattr(g, 'metrics_started', None)
+            if started is not None:
+                endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+                self.request_seconds.observe(time.monotonic() - started, endpoint=endpoint,
+                                             method=request.method, status=response.status_code)
+            return response
+
+        @app.route('/metrics', methods=['GET'])
+        def metricsPage():
+            return Response(self.registry.render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,122 @@
+import json
+import os
+import threading
+from collections import Counter
+from typing import Dict, List
+
+# Nothing the ASP.NET form postbacks need: styling, media, fonts and trackers.
+# Same-origin scripts (WebResource.axd, ScriptResource.axd) stay allowed.
+DEFAULT_BLOCKED_URLS = [
+    '*.css', '*.css?*',
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.svg', '*.ico', '*.webp', '*.bmp',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.mp3', '*.pdf',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*facebook.net*', '*facebook.com*', '*twitter.com*', '*platform.twitter.com*',
+    '*addthis.com*', '*sharethis.com*', '*hotjar.com*',
+    '*fonts.googleapis.com*', '*fonts.gstatic.com*', '*youtube.com*', '*ytimg.com*',
+]
+
+
+def blocked_url_patterns() -> List[str]:
+    """
+    URL patterns to block, from the environment:
+    SCRAPER_BLOCK_RESOURCES=0 turns blocking off, SCRAPER_BLOCKED_URLS adds
+    comma-separated patterns and SCRAPER_UNBLOCKED_URLS removes defaults
+    """
+    if os.environ.get('SCRAPER_BLOCK_RESOURCES', '1').lower() in ('0', 'false', 'no'):
+        return []
+    extra = [pattern.strip() for pattern in os.environ.get('SCRAPER_BLOCKED_URLS', '').split(',') if pattern.strip()]
+    unblocked = {pattern.strip() for pattern in os.environ.get('SCRAPER_UNBLOCKED_URLS', '').split(',')}
+    return [pattern for pattern in DEFAULT_BLOCKED_URLS + extra if pattern not in unblocked]
+
+
+def configure_chrome_options(chrome_options):
+    """Turn off images at the renderer and record network events for PageWeightMeter"""
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    return chrome_options
+
+
+def enable_resource_blocking(driver, patterns: List[str]) -> bool:
+    """Block `patterns` for the whole session through the DevTools protocol"""
+    if not patterns:
+        return False
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+        return True
+    except Exception as e:
+        print(f"Could not enable resource blocking: {e}")
+        return False
+
+
+class PageWeightMeter:
+    """
+    Per-scrape request counts and transferred bytes from Chrome's performance log
+    Call start() before a scrape and finish() after it; blocked requests are
+    counted by resource type
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.scrapes = 0
+        self.requests = 0
+        self.bytes_transferred = 0
+        self.requests_blocked = 0
+        self.blocked_by_type: Counter = Counter()
+
+    def start(self, driver):
+        # Drop events left over from the previous scrape on a pooled session
+        self._read_events(driver)
+
+    def finish(self, driver) -> Dict:
+        types = {}
+        summary = {'requests': 0, 'bytes_transferred': 0, 'requests_blocked': 0, 'blocked_by_type': Counter()}
+        for method, params in self._read_events(driver):
+            if method == 'Network.requestWillBeSent':
+                summary['requests'] += 1
+                types[params.get('requestId')] = params.get('type', 'Other')
+            elif method == 'Network.loadingFinished':
+                summary['bytes_transferred'] += int(params.get('encodedDataLength', 0))
+            elif method == 'Network.loadingFailed' and params.get('blockedReason'):
+                summary['requests_blocked'] += 1
+                summary['blocked_by_type'][types.get(params.get('requestId'), params.get('type', 'Other'))] += 1
+
+        with self._lock:
+            self.scrapes += 1
+            self.requests += summary['requests']
+            self.bytes_transferred += summary['bytes_transferred']
+            self.requests_blocked += summary['requests_blocked']
+            self.blocked_by_type.update(summary['blocked_by_type'])
+
+        blocked = ', '.join(f"{count} {kind}" for kind, count in summary['blocked_by_type'].most_common())
+        print(f"Page weight: {summary['requests']} requests, {summary['bytes_transferred'] / 1024:.0f} KB "
+              f"transferred, {summary['requests_blocked']} blocked ({blocked or 'none'})")
+        summary['blocked_by_type'] = dict(summary['blocked_by_type'])
+        return summary
+
+    def _read_events(self, driver):
+        try:
+            entries = driver.get_log('performance')
+        except Exception:
+            return []
+        events = []
+        for entry in entries:
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError, TypeError):
+                continue
+            events.append((message.get('method'), message.get('params', {})))
+        return events
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'blocked_url_patterns': len(blocked_url_patterns()),
+                'scrapes': self.scrapes,
+                'requests_blocked': self.requests_blocked,
+                'blocked_by_type': dict(self.blocked_by_type),
+                'average_requests': round(self.requests / self.scrapes, 1) if self.scrapes else 0.0,
+                'average_kb_transferred': round(self.bytes_transferred / 1024 / self.scrapes, 1) if self.scrapes else 0.0
+            }
@@ -0,0 +1,89 @@
+import threading
+
+import pytest
+from flask import Flask
+
+from scraper_common.jobs import DONE, FAILED, JobQueue, JobQueueFull, job_response, register_job_routes
+
+
+def test_identical_requests_share_one_job():
+    queue = JobQueue(max_workers=1)
+    release = threading.Event()
+    calls = []
+
+    def scrape():
+        calls.append(1)
+        release.wait(5)
+        return [{'price': 1600}]
+
+    first = queue.submit('potato|karnataka', scrape)
+    second = queue.submit('potato|karnataka', scrape)
+    release.set()
+    first.event.wait(5)
+
+    assert second is first
+    assert first.requests == 2
+    assert first.status == DONE and first.result == [{'price': 1600}]
+    assert calls == [1]
+    assert queue.submit('potato|karnataka', scrape) is first
+    assert queue.stats()['merged'] == 2
+
+
+def test_failed_job_is_retried_by_the_next_request():
+    queue = JobQueue(max_workers=1)
+    failed = queue.submit('onion', lambda: 1 / 0)
+    failed.event.wait(5)
+    assert failed.status == FAILED and 'division' in failed.error
+
+    retry = queue.submit('onion', lambda: 'ok')
+    retry.event.wait(5)
+    assert retry is not failed
+    assert retry.result == 'ok'
+
+
+def test_queue_rejects_jobs_beyond_max_pending():
+    queue = JobQueue(max_workers=1, max_pending=1)
+    release = threading.Event()
+    job = queue.submit('slow', lambda: release.wait(5))
+    try:
+        with pytest.raises(JobQueueFull):
+            queue.submit('other', lambda: None)
+    finally:
+        release.set()
+        job.event.wait(5)
+
+
+def test_events_stream_status_then_result():
+    queue = JobQueue(max_workers=1)
+    release = threading.Event()
+    job = queue.submit('potato', lambda: release.wait(5) and 'rows')
+
+    events = queue.events(job, heartbeat=0.01)
+    assert next(events).startswith('event: status\n')
+    assert next(events).startswith('event: status\n')
+    release.set()
+    remaining = list(events)
+
+    assert remaining[-1].startswith('event: result\n')
+    assert '"result": "rows"' in remaining[-1]
+
+
+def test_job_routes_answer_202_then_200():
+    app = Flask(__name__)
+    queue = JobQueue(max_workers=1)
+    register_job_routes(app, queue)
+    release = threading.Event()
+    job = queue.submit('potato', lambda: release.wait(5) and {'rows': 3})
+
+    with app.test_request_context():
+        response, status = job_response(job)
+        assert status == 202
+        assert response.headers['Location'] == f"/jobs/{job.id}"
+
+    release.set()
+    job.event.wait(5)
+    client = app.test_client()
+    assert client.get(f"/jobs/{job.id}").get_json()['result'] == {'rows': 3}
+    assert client.get("/jobs/unknown").status_code == 404
+    with app.test_request_context():
+        assert job_response(job)[1] == 200
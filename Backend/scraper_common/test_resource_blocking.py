@@ -0,0 +1,62 @@
+import json
+
+from scraper_common.resource_blocking import (DEFAULT_BLOCKED_URLS, PageWeightMeter, blocked_url_patterns,
+                                              enable_resource_blocking)
+
+
+class FakeDriver:
+    def __init__(self, events=()):
+        self.commands = []
+        self.events = list(events)
+
+    def execute_cdp_cmd(self, command, params):
+        self.commands.append((command, params))
+
+    def get_log(self, kind):
+        assert kind == 'performance'
+        events, self.events = self.events, []
+        return [{'message': json.dumps({'message': {'method': method, 'params': params}})}
+                for method, params in events]
+
+
+def test_blocked_url_patterns_follow_the_environment(monkeypatch):
+    monkeypatch.delenv('SCRAPER_BLOCK_RESOURCES', raising=False)
+    monkeypatch.setenv('SCRAPER_BLOCKED_URLS', '*.js?v=*, *ads.example.com*')
+    monkeypatch.setenv('SCRAPER_UNBLOCKED_URLS', '*.css,*.css?*')
+
+    patterns = blocked_url_patterns()
+
+    assert '*.css' not in patterns and '*.png' in patterns
+    assert patterns[-2:] == ['*.js?v=*', '*ads.example.com*']
+
+    monkeypatch.setenv('SCRAPER_BLOCK_RESOURCES', 'false')
+    assert blocked_url_patterns() == []
+
+
+def test_enable_resource_blocking_sends_the_patterns():
+    driver = FakeDriver()
+
+    assert enable_resource_blocking(driver, DEFAULT_BLOCKED_URLS)
+    assert driver.commands == [('Network.enable', {}), ('Network.setBlockedURLs', {'urls': DEFAULT_BLOCKED_URLS})]
+    assert not enable_resource_blocking(FakeDriver(), [])
+
+
+def test_page_weight_counts_requests_bytes_and_blocked_types():
+    driver = FakeDriver([('Network.requestWillBeSent', {'requestId': 'old'})])
+    meter = PageWeightMeter()
+    meter.start(driver)
+
+    driver.events = [
+        ('Network.requestWillBeSent', {'requestId': '1', 'type': 'Document'}),
+        ('Network.requestWillBeSent', {'requestId': '2', 'type': 'Image'}),
+        ('Network.requestWillBeSent', {'requestId': '3', 'type': 'Stylesheet'}),
+        ('Network.loadingFinished', {'requestId': '1', 'encodedDataLength': 2048}),
+        ('Network.loadingFailed', {'requestId': '2', 'blockedReason': 'inspector'}),
+        ('Network.loadingFailed', {'requestId': '3', 'blockedReason': 'inspector'}),
+    ]
+    summary = meter.finish(driver)
+
+    assert summary == {'requests': 3, 'bytes_transferred': 2048, 'requests_blocked': 2,
+                       'blocked_by_type': {'Image': 1, 'Stylesheet': 1}}
+    stats = meter.stats()
+    assert stats['scrapes'] == 1 and stats['average_kb_transferred'] == 2.0
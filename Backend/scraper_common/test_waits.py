@@ -0,0 +1,35 @@
+from scraper_common.waits import LatencyTracker
+
+
+def test_timeout_adapts_to_recent_latency():
+    tracker = LatencyTracker(min_samples=5, multiplier=3.0, floor=0.1)
+    assert tracker.timeout('postback', 20) == 20
+
+    for _ in range(20):
+        tracker.record('postback', 0.1)
+
+    assert tracker.timeout('postback', 20) == 0.1 * 3.0
+    assert tracker.timeout('postback', 20, ceiling=0.2) == 0.2
+
+
+def test_timeout_recovers_after_the_site_slows_down():
+    tracker = LatencyTracker(min_samples=5, multiplier=3.0, floor=0.1)
+    for _ in range(20):
+        tracker.record('postback', 0.1)
+
+    # The site now takes 1s: each wait that runs out is recorded as a timeout
+    latency = 1.0
+    attempts = 0
+    while True:
+        attempts += 1
+        assert attempts <= 10, "timeout never grew past the new latency"
+        timeout = tracker.timeout('postback', 20)
+        if latency <= timeout:
+            break
+        tracker.record('postback', timeout, timed_out=True)
+
+    tracker.record('postback', latency)
+    stats = tracker.stats()['postback']
+    assert stats['timeouts'] == attempts - 1
+    assert stats['count'] == 20 + attempts
+    assert tracker.timeout('postback', 20) <= 40
@@ -0,0 +1,169 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+
+# Fingerprint of the ASP.NET view state; the full value can be hundreds of KB
+VIEWSTATE_SCRIPT = """
+var field = document.getElementById('__VIEWSTATE');
+return field ? field.value.length + ':' + field.value.slice(-64) : null;
+"""
+
+# Counts DOM mutations under a target element, if it is on the page; a full
+# postback loads a new document, which drops the counter altogether (-1)
+OBSERVE_SCRIPT = """
+var target = arguments[0] && document.getElementById(arguments[0]);
+if (window.__scraperObserver) { window.__scraperObserver.disconnect(); window.__scraperObserver = null; }
+window.__scraperMutations = 0;
+if (target) {
+    window.__scraperObserver = new MutationObserver(function (mutations) {
+        window.__scraperMutations += mutations.length;
+    });
+    window.__scraperObserver.observe(target, {childList: true, subtree: true, attributes: true, characterData: true});
+}
+"""
+
+STATE_SCRIPT = """
+return [document.readyState, window.__scraperMutations === undefined ? -1 : window.__scraperMutations];
+"""
+
+
+class LatencyTracker:
+    """
+    Recent durations per scrape step, used for adaptive timeouts
+    Until a step has `min_samples` observations its default timeout is used;
+    afterwards the timeout is `multiplier` x its p95, kept within bounds.
+    A timed-out wait is kept as a censored sample at the time it waited, so
+    when the site slows down the timeout grows back instead of staying pinned
+    to the fast runs. `on_record(step, seconds, timed_out)` also receives
+    every observation
+    """
+
+    def __init__(self, window: int = 50, min_samples: int = 5, multiplier: float = 3.0,
+                 floor: float = 2.0, on_record: Optional[Callable[[str, float, bool], None]] = None):
+        self.window = window
+        self.on_record = on_record
+        self.min_samples = min_samples
+        self.multiplier = multiplier
+        self.floor = floor
+        self._durations: Dict[str, deque] = {}
+        self._totals: Dict[str, List[float]] = {}  # step -> [count, seconds, timeouts]
+        self._lock = threading.Lock()
+
+    def record(self, step: str, seconds: float, timed_out: bool = False):
+        with self._lock:
+            # For a timeout the real duration is at least `seconds`
+            self._durations.setdefault(step, deque(maxlen=self.window)).append(seconds)
+            totals = self._totals.setdefault(step, [0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] += int(timed_out)
+        if self.on_record is not None:
+            self.on_record(step, seconds, timed_out)
+
+    def percentile(self, step: str, fraction: float) -> Optional[float]:
+        with self._lock:
+            durations = sorted(self._durations.get(step, ()))
+        if not durations:
+            return None
+        return durations[min(len(durations) - 1, int(fraction * len(durations)))]
+
+    def timeout(self, step: str, default: float, ceiling: Optional[float] = None) -> float:
+        with self._lock:
+            samples = len(self._durations.get(step, ()))
+        if samples < self.min_samples:
+            return default
+        ceiling = default * 2 if ceiling is None else ceiling
+        return min(ceiling, max(self.floor, self.percentile(step, 0.95) * self.multiplier))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            steps = {step: list(totals) for step, totals in self._totals.items()}
+        result = {}
+        for step, (count, seconds, timeouts) in steps.items():
+            p50 = self.percentile(step, 0.5)
+            p95 = self.percentile(step, 0.95)
+            result[step] = {
+                'count': count,
+                'timeouts': timeouts,
+                'total_seconds': round(seconds, 3),
+                'mean_seconds': round(seconds / count, 3) if count else 0.0,
+                'p50_seconds': round(p50, 3) if p50 is not None else None,
+                'p95_seconds': round(p95, 3) if p95 is not None else None
+            }
+        return result
+
+
+class StepTimer:
+    """Times the steps of one scrape and feeds them into a LatencyTracker"""
+
+    def __init__(self, tracker: LatencyTracker, name: str = 'scrape'):
+        self.tracker = tracker
+        self.name = name
+        self.steps: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def step(self, step: str):
+        started = time.monotonic()
+        timed_out = False
+        try:
+            yield
+        except TimeoutException:
+            timed_out = True
+            raise
+        finally:
+            elapsed = time.monotonic() - started
+            self.steps.append((step, elapsed))
+            self.tracker.record(step, elapsed, timed_out)
+
+    def wait(self, driver, step: str, condition: Callable, default_timeout: float,
+             ceiling: Optional[float] = None):
+        """WebDriverWait on `condition` with the step's adaptive timeout, timed as `step`"""
+        timeout = self.tracker.timeout(step, default_timeout, ceiling)
+        with self.step(step):
+            return WebDriverWait(driver, timeout, poll_frequency=0.1).until(condition)
+
+    def summary(self) -> str:
+        total = sum(seconds for _, seconds in self.steps)
+        parts = ', '.join(f"{step} {seconds:.2f}s" for step, seconds in self.steps)
+        return f"{self.name} took {total:.2f}s: {parts}"
+
+
+class PostbackWatcher:
+    """
+    Detects when an ASP.NET postback has finished
+    arm() before triggering it; wait() returns once a new document loaded, the
+    __VIEWSTATE changed or the DOM under `target_id` mutated (partial
+    postbacks), and the document has finished loading, instead of sleeping a
+    fixed time. Mutations only count if `target_id` was on the page when armed,
+    so click-time changes elsewhere (spinners, __EVENTTARGET) never end the wait
+    """
+
+    def __init__(self, driver, target_id: Optional[str] = None):
+        self.driver = driver
+        self.target_id = target_id
+        self._viewstate = None
+
+    def arm(self):
+        self._viewstate = self.driver.execute_script(VIEWSTATE_SCRIPT)
+        self.driver.execute_script(OBSERVE_SCRIPT, self.target_id)
+
+    def completed(self, driver) -> bool:
+        try:
+            ready_state, mutations = driver.execute_script(STATE_SCRIPT)
+            if ready_state == 'loading':
+                return False
+            # -1: a new document replaced the one the counter was set up in
+            if mutations == -1 or mutations > 0:
+                return True
+            return driver.execute_script(VIEWSTATE_SCRIPT) != self._viewstate
+        except WebDriverException:
+            # The old document is going away mid-navigation
+            return False
+
+    def wait(self, timer: StepTimer, step: str, default_timeout: float = 20):
+        return timer.wait(self.driver, step, self.completed, default_timeout)